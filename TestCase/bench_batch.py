@@ -0,0 +1,94 @@
+"""Batch question answering vs one call per question, against the stub LLM.
+
+Indexes one synthetic paper, then answers the same question list with
+  sequential  paper_reviewer_rag / conference_bot once per question (as the UI did)
+  batch       paper_reviewer_batch / conference_bot_batch (one embedding batch,
+              one FAISS search, concurrent LLM calls under the shared rate limiter)
+  stream      the *_batch_stream generators; reports time to first answer
+and checks the batch answers come back in input order.
+
+    python TestCase/bench_batch.py --questions 16 --concurrency 6 --latency 0.3
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_rag import QUESTIONS, bots, clear_caches, use_fake_embeddings
+from stub_llm_server import start_stub
+from synthetic_corpus import generate_corpus
+
+
+async def first_and_total(gen):
+    start, first, n = time.perf_counter(), None, 0
+    async for _ in gen:
+        n += 1
+        first = first or time.perf_counter() - start
+    return first, time.perf_counter() - start, n
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--bots", default="reviewer,conference",
+                        type=lambda s: [b.strip() for b in s.split(",") if b.strip()])
+    parser.add_argument("--latency", type=float, default=0.3, help="stub LLM seconds to first token")
+    parser.add_argument("--tokens", type=int, default=80, help="stub LLM completion length")
+    parser.add_argument("--rpm", type=float, default=0, help="shared rate limit, requests/minute (0: none)")
+    parser.add_argument("--embeddings", choices=["hf", "fake"], default="fake")
+    parser.add_argument("--workdir", default=".bench")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir).resolve()
+    pdf = str(generate_corpus(workdir / "corpus", 1, 8)[0])
+    os.chdir(workdir)
+    clear_caches("faiss", "docs", "embeddings")
+
+    server, url, stub = start_stub(latency=args.latency, tokens=args.tokens)
+    os.environ["GROQ_API_BASE"] = url
+    os.environ["GROQ_API_KEY"] = "benchmark-key"
+
+    from src.utils import batch
+    batch.LLM_LIMITER.rate = args.rpm / 60.0
+    questions = [f"{QUESTIONS[i % len(QUESTIONS)]} (#{i + 1})" for i in range(args.questions)]
+    modules = bots()
+    if args.embeddings == "fake":
+        use_fake_embeddings(modules[name][0] for name in args.bots)
+
+    for name in args.bots:
+        module = modules[name][0]
+        module.build_index(pdf)
+        if name == "reviewer":
+            single = lambda q: module.paper_reviewer_rag(pdf, q)
+            run_batch = lambda: module.paper_reviewer_batch(pdf, questions, max_concurrency=args.concurrency)
+            stream = lambda: module.paper_reviewer_batch_stream(pdf, questions, max_concurrency=args.concurrency)
+        else:
+            single = lambda q: module.conference_bot(q, source=pdf)
+            run_batch = lambda: module.conference_bot_batch(questions, source=pdf, max_concurrency=args.concurrency)
+            stream = lambda: module.conference_bot_batch_stream(questions, source=pdf, max_concurrency=args.concurrency)
+
+        requests = stub.requests
+        start = time.perf_counter()
+        for q in questions:
+            single(q)
+        sequential = time.perf_counter() - start
+        sequential_requests, requests = stub.requests - requests, stub.requests
+
+        start = time.perf_counter()
+        results = run_batch()
+        batched = time.perf_counter() - start
+        batch_requests = stub.requests - requests
+        assert [r["question"] for r in results] == questions, "batch answers out of input order"
+        errors = [r["error"] for r in results if r["error"]]
+
+        first, streamed, n = asyncio.run(first_and_total(stream()))
+        print(f"{name:<11} {len(questions)} questions: sequential {sequential:6.2f}s ({sequential_requests} calls)"
+              f"  batch {batched:6.2f}s ({batch_requests} calls, {sequential / batched:4.1f}x, {len(errors)} errors)"
+              f"  stream first {first:5.2f}s / all {streamed:5.2f}s ({n} answers)")
+    server.shutdown()
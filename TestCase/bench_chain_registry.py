@@ -0,0 +1,40 @@
+from pathlib import Path
+import os
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Chains are only constructed here, never invoked, so any key works
+os.environ.setdefault("GROQ_API_KEY", "benchmark-key")
+
+from src.utils import chains
+
+BOTS = ["citation", "idea", "conference", "questionaire", "sample_size",
+        "statistical", "reviewer", "analyst", "writer"]
+N = 200
+
+errors = chains.build_all(BOTS)
+for bot_id, error in errors.items():
+    print(f"{bot_id}: could not build ({error})")
+
+print(f"{'bot':<14}{'rebuild per request':>22}{'registry lookup':>18}")
+for bot_id in BOTS:
+    if bot_id in errors:
+        continue
+    builder = chains._BUILDERS[bot_id]
+
+    # Before: every request built its own client, prompt and pipe
+    start = time.perf_counter()
+    for _ in range(N):
+        chains.get_llm.cache_clear()
+        builder()
+    rebuild = (time.perf_counter() - start) / N
+
+    # After: one dict lookup
+    start = time.perf_counter()
+    for _ in range(N * 100):
+        chains.get_chain(bot_id)
+    lookup = (time.perf_counter() - start) / (N * 100)
+
+    print(f"{bot_id:<14}{rebuild * 1e6:>19.1f} us{lookup * 1e6:>15.2f} us")
@@ -0,0 +1,45 @@
+from pathlib import Path
+import random
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.citrationmaker.citration import STYLE_MAP, _split_authors, _join_authors
+
+# Synthetic 100k-entry bibliography (already parsed, so only formatting is timed).
+# Authors are drawn from a pool so names recur the way they do in real reference lists.
+random.seed(0)
+FIRST = ["John", "Jane", "Ada", "Alan", "Grace", "Kim", "Wei", "Fatima", "Omar", "Lena"]
+LAST = ["Doe", "Smith", "Lovelace", "Turing", "Hopper", "Lee", "Zhang", "Khan", "Ali", "Berg"]
+POOL = [f"{f} {l}" for f in FIRST for l in LAST] + [f"{l}, {f}" for f in FIRST for l in LAST]
+AUTHOR_LISTS = [" and ".join(random.sample(POOL, random.randint(1, 5))) for _ in range(5000)]
+
+N = 100_000
+entries = []
+for i in range(N):
+    e = {
+        "ID": f"ref{i}",
+        "ENTRYTYPE": random.choice(["article", "inproceedings", "book"]),
+        "title": f"A study of topic {i}",
+        "author": random.choice(AUTHOR_LISTS),
+        "year": str(1990 + i % 35),
+    }
+    if e["ENTRYTYPE"] == "article":
+        e.update(journal="Journal of AI Research", volume=str(i % 40), number=str(i % 12), pages=f"{i % 90}--{i % 90 + 10}")
+    elif e["ENTRYTYPE"] == "inproceedings":
+        e.update(booktitle="Proceedings of NeurIPS", pages=f"{i % 9}--{i % 9 + 8}")
+    else:
+        e.update(publisher="Academic Press")
+    entries.append(e)
+
+for style_name, style_fn in STYLE_MAP.items():
+    _split_authors.cache_clear()
+    _join_authors.cache_clear()
+    start = time.perf_counter()
+    for e in entries:
+        style_fn(e)
+    elapsed = time.perf_counter() - start
+    info = _join_authors.cache_info()
+    print(f"{style_name:<10} {N / elapsed:>10.0f} entries/s  "
+          f"author cache hits={info.hits} misses={info.misses}")
@@ -0,0 +1,158 @@
+"""Conference-site crawler against a local static server: cold, revalidated and after an edit.
+
+Writes a synthetic conference site (home, CFP, dates, committee, venue and a
+tree of sub-pages), serves it with http.server and runs the conference bot's
+crawler and build_index over it three times:
+  cold     empty HTTP cache: every page fetched, parsed and embedded
+  warm     nothing changed: every page answered 304, every chunk embedding cached
+  edited   one page changed: only it is re-fetched in full and re-embedded
+The server can validate with Last-Modified (http.server's own behaviour) or
+ETag, and add per-request latency to show the effect of --concurrency.
+
+    python TestCase/bench_crawler.py --pages 40 --latency 0.05 --concurrency 8 --validator etag
+"""
+from pathlib import Path
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+SECTIONS = ["cfp", "dates", "committee", "venue", "registration", "program", "workshops", "awards"]
+
+
+def write_site(root, pages):
+    """Home page linking to section pages, each linking to its own sub-pages."""
+    root = Path(root)
+    shutil.rmtree(root, ignore_errors=True)
+    (root / "conf").mkdir(parents=True)
+    per_section = max(0, (pages - 1 - len(SECTIONS)) // len(SECTIONS))
+    links = "".join(f'<li><a href="{s}.html">{s.title()}</a></li>' for s in SECTIONS)
+    (root / "conf" / "index.html").write_text(
+        f"<html><head><title>SynthConf 2026</title><style>body{{}}</style></head><body>"
+        f"<h1>SynthConf 2026</h1><p>The synthetic conference on benchmarking.</p><ul>{links}</ul>"
+        f'<a href="https://example.org/elsewhere">off-site</a><a href="/other/x.html">out of scope</a></body></html>')
+    for section in SECTIONS:
+        sub = "".join(f'<a href="{section}/{i}.html#top">Item {i}</a> ' for i in range(per_section))
+        (root / "conf" / f"{section}.html").write_text(
+            f"<html><head><title>{section.title()} | SynthConf</title></head><body><h2>{section.title()}</h2>"
+            f"<p>Details about the {section} of SynthConf 2026. " + "Lorem ipsum dolor sit amet. " * 30 +
+            f'</p><a href="index.html">Home</a> {sub}<script>var ignored = 1;</script></body></html>')
+        (root / "conf" / section).mkdir()
+        for i in range(per_section):
+            (root / "conf" / section / f"{i}.html").write_text(
+                f"<html><head><title>{section} {i}</title></head><body><p>{section} item {i}: "
+                + f"deadline {i + 1} March 2026. " * 20 + "</p></body></html>")
+    return root
+
+
+class Handler(SimpleHTTPRequestHandler):
+    """Static files with optional latency, ETag validation and a per-status request log."""
+
+    latency = 0.0
+    validator = "last-modified"
+    log = Counter()
+    lock = threading.Lock()
+
+    def send_head(self):
+        time.sleep(self.latency)
+        if self.validator == "etag":
+            path = self.translate_path(self.path)
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    etag = '"%s"' % hashlib.sha1(f.read()).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return None
+                self._etag = etag
+        return super().send_head()
+
+    def end_headers(self):
+        etag = getattr(self, "_etag", None)
+        if etag:
+            self.send_header("ETag", etag)
+            self._etag = None
+        super().end_headers()
+
+    def send_response(self, code, message=None):
+        with self.lock:
+            self.log[code] += 1
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        # in ETag mode the client can only revalidate by ETag
+        if not (self.validator == "etag" and keyword == "Last-Modified"):
+            super().send_header(keyword, value)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(root, latency, validator):
+    Handler.latency, Handler.validator = latency, validator
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/conf/index.html"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="server seconds per request")
+    parser.add_argument("--validator", choices=["last-modified", "etag"], default="last-modified")
+    parser.add_argument("--workdir", default=".bench/crawl")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir).resolve()
+    site = write_site(workdir / "site", args.pages)
+    # caches live under ./.cache
+    os.chdir(workdir)
+    shutil.rmtree(".cache", ignore_errors=True)
+    server, url = serve(site, args.latency, args.validator)
+
+    from bench_rag import clear_caches, counter_delta, counters, use_fake_embeddings
+    from src.conferencebot import bot, crawler
+    from src.utils.tracing import METRICS
+    use_fake_embeddings([bot])
+    bot.crawl_site = partial(crawler.crawl_site, max_pages=args.pages, max_depth=args.depth,
+                             concurrency=args.concurrency)
+
+    def run(label):
+        Handler.log.clear()
+        before = counters(METRICS)
+        start = time.perf_counter()
+        bot.build_index(url, refresh=True)
+        elapsed = time.perf_counter() - start
+        cache, _ = counter_delta(before, counters(METRICS))
+        statuses = " ".join(f"{code}={n}" for code, n in sorted(Handler.log.items()))
+        http, emb = cache.get("http", {}), cache.get("embedding", {})
+        print(f"{label:<8}{elapsed:>8.2f}s  {statuses:<16} http hit/miss {http.get('hit', 0)}/{http.get('miss', 0)}"
+              f"  embedding hit/miss {emb.get('hit', 0)}/{emb.get('miss', 0)}")
+        return cache
+
+    pages = bot.crawl_site(url)
+    print(f"{len(pages)} pages in scope of {url}")
+    clear_caches("http")
+    run("cold")
+    warm = run("warm")
+    edited = site / "conf" / "dates.html"
+    edited.write_text(edited.read_text().replace("Details about", "Updated details about"))
+    # Last-Modified has one-second resolution
+    os.utime(edited, (time.time() + 2, time.time() + 2))
+    changed = run("edited")
+    server.shutdown()
+
+    assert warm["http"]["miss"] == 0 and warm["embedding"]["miss"] == 0, "warm re-index re-fetched or re-embedded"
+    assert changed["http"]["miss"] == 1, "expected exactly the edited page to be re-fetched"
@@ -0,0 +1,148 @@
+"""Embedding backends compared: throughput and retrieval-quality drift.
+
+Chunks a synthetic corpus the way the RAG bots do and builds a held-out
+question set: one sentence is cut out of each sampled chunk and used as the
+question, and that chunk (indexed without the sentence) is the right answer.
+Per backend (src/utils/embeddings.py BACKENDS) it reports:
+  load      seconds to load the model
+  chunks/s  batch embedding throughput over the whole corpus
+  query     p50/p95 latency of single-question embedding
+  hit@1, hit@k, MRR   retrieval quality on the held-out questions
+  cos       mean cosine between this backend's chunk vectors and the reference's
+  overlap@k mean share of top-k results shared with the reference backend
+The first backend listed is the reference (torch, the current production model).
+
+    python TestCase/bench_embeddings.py --backends torch,onnx,onnx-int8 --docs 6 --pages 8
+"""
+from pathlib import Path
+import argparse
+import json
+import random
+import re
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from bench_rag import rss_mb
+from synthetic_corpus import generate_corpus
+from src.utils.embeddings import BACKENDS, backend_available, get_embeddings
+from src.utils.ocr import load_pdf
+
+SENTENCE_RE = re.compile(r"(?<=\.)\s+")
+
+
+def held_out_set(chunks, n, seed):
+    """Cut one sentence out of n random chunks; returns (chunks, [(question, chunk_index)])."""
+    rng = random.Random(seed)
+    chunks = list(chunks)
+    questions = []
+    candidates = [i for i, c in enumerate(chunks) if len(SENTENCE_RE.split(c)) >= 3]
+    for i in rng.sample(candidates, min(n, len(candidates))):
+        sentences = SENTENCE_RE.split(chunks[i])
+        j = rng.randrange(len(sentences))
+        questions.append((sentences.pop(j), i))
+        chunks[i] = " ".join(sentences)
+    return chunks, questions
+
+
+def normalise(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run_backend(backend, chunks, questions, k, batch):
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    model = get_embeddings(backend)
+    model.embed_documents(["warm up"])
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    doc_vecs = []
+    for i in range(0, len(chunks), batch):
+        doc_vecs.extend(model.embed_documents(chunks[i:i + batch]))
+    embed = time.perf_counter() - start
+    doc_vecs = normalise(doc_vecs)
+
+    latencies, query_vecs = [], []
+    for question, _ in questions:
+        start = time.perf_counter()
+        query_vecs.append(model.embed_query(question))
+        latencies.append(time.perf_counter() - start)
+    query_vecs = normalise(query_vecs)
+
+    ranking = np.argsort(-(query_vecs @ doc_vecs.T), axis=1)
+    truth = np.array([i for _, i in questions])
+    rank_of_truth = np.argmax(ranking == truth[:, None], axis=1)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {
+        "load_s": load,
+        "chunks_per_s": len(chunks) / embed,
+        "query_p50_ms": float(p50) * 1e3,
+        "query_p95_ms": float(p95) * 1e3,
+        "rss_delta_mb": rss_mb() - rss_before,
+        "hit@1": float(np.mean(rank_of_truth == 0)),
+        f"hit@{k}": float(np.mean(rank_of_truth < k)),
+        "mrr": float(np.mean(1.0 / (rank_of_truth + 1))),
+        "_doc_vecs": doc_vecs,
+        "_topk": ranking[:, :k],
+    }
+
+
+def compare(result, reference, k):
+    result["cos"] = float(np.mean(np.sum(result["_doc_vecs"] * reference["_doc_vecs"], axis=1)))
+    result[f"overlap@{k}"] = float(np.mean([len(set(a) & set(b)) / k
+                                            for a, b in zip(result["_topk"], reference["_topk"])]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8",
+                        type=lambda s: [b.strip() for b in s.split(",") if b.strip()])
+    parser.add_argument("--docs", type=int, default=6)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3, help="retriever k used by the bots")
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=".bench")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    unknown = [b for b in args.backends if b not in BACKENDS]
+    if unknown:
+        sys.exit(f"unknown backend(s) {', '.join(unknown)}; choose from {', '.join(BACKENDS)}")
+    missing = [b for b in args.backends if not backend_available(b)]
+    if missing:
+        sys.exit(f"backend(s) {', '.join(missing)} not installed "
+                 "(torch needs sentence-transformers, onnx needs sentence-transformers[onnx])")
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    pages = [doc for pdf in generate_corpus(Path(args.workdir) / "corpus", args.docs, args.pages, args.seed)
+             for doc in load_pdf(str(pdf))]
+    chunks, questions = held_out_set([c.page_content for c in splitter.split_documents(pages)],
+                                     args.questions, args.seed)
+    print(f"{len(chunks)} chunks, {len(questions)} held-out questions")
+
+    results = {}
+    for backend in args.backends:
+        results[backend] = run_backend(backend, chunks, questions, args.k, args.batch)
+        compare(results[backend], results[args.backends[0]], args.k)
+
+    k = args.k
+    print(f"{'backend':<11}{'load s':>8}{'chunks/s':>10}{'q p50 ms':>10}{'q p95 ms':>10}{'RSS MB':>8}"
+          f"{'hit@1':>8}{f'hit@{k}':>8}{'MRR':>7}{'cos':>8}{f'overlap@{k}':>11}")
+    for backend, r in results.items():
+        print(f"{backend:<11}{r['load_s']:>8.2f}{r['chunks_per_s']:>10.1f}{r['query_p50_ms']:>10.2f}"
+              f"{r['query_p95_ms']:>10.2f}{r['rss_delta_mb']:>8.0f}{r['hit@1']:>8.3f}{r[f'hit@{k}']:>8.3f}"
+              f"{r['mrr']:>7.3f}{r['cos']:>8.4f}{r[f'overlap@{k}']:>11.3f}")
+
+    if args.json:
+        clean = {b: {m: v for m, v in r.items() if not m.startswith("_")} for b, r in results.items()}
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps({"config": vars(args), "results": clean}, indent=2))
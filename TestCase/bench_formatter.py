@@ -0,0 +1,128 @@
+from pathlib import Path
+import random
+import re
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils import formatter
+
+N = 50
+random.seed(7)
+
+WORDS = ("the proposed method improves robustness of transformer models under distribution shift "
+         "while the ablation study lacks statistical tests and the related work omits recent baselines").split()
+
+
+def sentence():
+    return " ".join(random.choice(WORDS) for _ in range(random.randint(8, 25))).capitalize() + random.choice(".!?")
+
+
+def review(structured, messy):
+    """A long reviewer answer (~25 KB), with or without the canonical headings."""
+    sep = "\r\n" if messy else "\n"
+    space = "  " if messy else " "
+    sections = []
+    names = ["Title Assessment", "Abstract Evaluation", "Strengths", "Weaknesses",
+             "Detailed Comments", "Overall Recommendation"]
+    for name in names:
+        body = [space.join(sentence() for _ in range(6)) for _ in range(8)]
+        body += ["- " + sentence() for _ in range(6)]
+        head = f"## {name}" if structured else f"{name}:"
+        sections.append(head + sep + (sep * (3 if messy else 2)).join(body))
+    return (sep * 3).join(sections)
+
+
+# Old implementation, kept here as the baseline
+def legacy_clean_text(text):
+    txt = text.replace('\r\n', '\n').replace('\r', '\n')
+    txt = re.sub(r"\n{3,}", "\n\n", txt)
+    txt = re.sub(r"[ \t]+", " ", txt)
+    return txt.strip()
+
+
+def legacy_headings(text):
+    text = legacy_clean_text(text)
+    headings = formatter.REVIEWER_HEADINGS
+    for h in headings:
+        if re.search(rf"^#*\s*{re.escape(h)}", text, flags=re.IGNORECASE | re.MULTILINE):
+            return text
+    parts = {}
+    m_s = re.search(r"(Strengths?[:\-])", text, flags=re.IGNORECASE)
+    m_w = re.search(r"(Weaknesses?[:\-])", text, flags=re.IGNORECASE)
+    if m_s and m_w:
+        parts[headings[0]] = text[:m_s.start()].strip() or "(no title provided)"
+        parts[headings[2]] = text[m_s.start():m_w.start()].strip()
+        parts[headings[3]] = text[m_w.start():].strip()
+    else:
+        parts[headings[4]] = text
+    out = [f"## {h}\n{legacy_clean_text(parts[h])}\n" for h in headings if h in parts]
+    return "\n".join(out) if out else text
+
+
+def legacy_chunks(text, max_chars):
+    text = legacy_clean_text(text)
+    buf = ''
+    for s in re.split(r'(?<=[.!?])\s+', text):
+        if len(buf) + len(s) + 1 <= max_chars:
+            buf = (buf + ' ' + s).strip()
+        else:
+            if buf:
+                yield buf
+            buf = s
+    if buf:
+        yield buf
+
+
+def legacy_pipeline(text):
+    return list(legacy_chunks(legacy_headings(legacy_clean_text(text)), 240))
+
+
+def pipeline(text):
+    return list(formatter.chunk_text_for_stream(formatter.format_for_bot("reviewer", text), 240, clean=False))
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    for _ in range(N):
+        fn(text)
+    return (time.perf_counter() - start) / N
+
+
+cases = {
+    "structured, clean": review(True, False),
+    "structured, messy": review(True, True),
+    "unstructured, clean": review(False, False),
+    "unstructured, messy": review(False, True),
+}
+
+print(f"{'review':<22}{'size':>8}{'before':>12}{'after':>12}{'speedup':>9}")
+for name, text in cases.items():
+    assert formatter.clean_text(text) == legacy_clean_text(text)
+    assert pipeline(text) == legacy_pipeline(text)
+
+    # the incremental normaliser must match clean_text for any fragmentation
+    norm = formatter.StreamNormalizer()
+    pos, out = 0, []
+    while pos < len(text):
+        step = random.randint(1, 12)
+        out.append(norm.feed(text[pos:pos + step]))
+        pos += step
+    out.append(norm.flush())
+    assert "".join(out) == legacy_clean_text(text)
+
+    # live-stream formatting must match formatting the whole answer
+    for bot_id in ("reviewer", "conference"):
+        chunker, fmt = formatter.StreamChunker(max_latency=float("inf")), formatter.BotStreamFormatter(bot_id)
+        pos, out = 0, []
+        while pos < len(text):
+            step = random.randint(1, 12)
+            out.extend(fmt.feed(c) for c in chunker.feed(text[pos:pos + step], now=0))
+            pos += step
+        out.extend(fmt.feed(c) for c in chunker.flush())
+        out.append(fmt.flush())
+        assert "".join(out) == formatter.format_for_bot(bot_id, text)
+
+    before, after = timed(legacy_pipeline, text), timed(pipeline, text)
+    print(f"{name:<22}{len(text) // 1024:>6}KB{before * 1e3:>10.2f}ms{after * 1e3:>10.2f}ms{before / after:>8.1f}x")
@@ -0,0 +1,66 @@
+"""OCR throughput for scanned PDFs: sequential vs process pool, cold vs cached.
+
+Builds an image-only ("scanned") copy of a synthetic paper, then loads it with
+src.utils.ocr.load_pdf and reports pages/sec. Needs pytesseract, pillow and
+the tesseract binary.
+
+    python TestCase/bench_ocr.py --pages 12 --workers 4
+"""
+from pathlib import Path
+import argparse
+import os
+import shutil
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pymupdf
+
+from synthetic_corpus import generate_pdf
+from src.utils import ocr
+
+
+def make_scanned(src, dst, dpi=150):
+    """Copy a PDF as page images only, like a scanner would produce."""
+    with pymupdf.open(src) as doc, pymupdf.open() as out:
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi)
+            new = out.new_page(width=page.rect.width, height=page.rect.height)
+            new.insert_image(new.rect, stream=pix.tobytes("png"))
+        out.save(dst)
+    return dst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=ocr.OCR_WORKERS)
+    parser.add_argument("--workdir", default=".bench/ocr")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    scanned = make_scanned(generate_pdf(workdir / "paper.pdf", pages=args.pages), str(workdir / "scanned.pdf"))
+    # the OCR cache lives under ./.cache/ocr
+    os.chdir(workdir)
+
+    docs = ocr.load_pdf(scanned, ocr=False, cache=False)
+    print(f"{len(docs)} pages, {len(ocr.scanned_pages(docs))} without a text layer")
+    if not ocr.ocr_available():
+        sys.exit("pytesseract/tesseract not available; install them to measure OCR throughput")
+
+    def run(label, workers):
+        start = time.perf_counter()
+        pages = ocr.load_pdf(scanned, workers=workers, cache=False)
+        elapsed = time.perf_counter() - start
+        chars = sum(len(d.page_content) for d in pages)
+        print(f"{label:<28}{elapsed:>8.2f}s{len(pages) / elapsed:>10.1f} pages/s{chars:>10} chars")
+
+    shutil.rmtree(".cache/ocr", ignore_errors=True)
+    run("sequential, cold", 1)
+    shutil.rmtree(".cache/ocr", ignore_errors=True)
+    ocr._pool(args.workers).submit(int).result()  # start the pool outside the timing
+    run(f"{args.workers} processes, cold", args.workers)
+    run(f"{args.workers} processes, cached", args.workers)
@@ -0,0 +1,231 @@
+"""Offline benchmark for the three RAG bots (conference, reviewer, analyst).
+
+Generates a synthetic PDF corpus, starts the local stub LLM and measures per bot:
+  index_cold    build_index with empty memory and disk caches
+  index_parsed  build_index re-chunking and re-embedding from the parsed-document cache
+  index_embed   build_index with parsed pages and chunk embeddings cached (FAISS rebuilt)
+  index_disk    build_index with the FAISS index on disk only
+  index_memory  build_index with the vector store already in memory
+  answer        answering questions against the indexed documents
+Each phase reports throughput, p50/p95/p99 latency, RSS and cache hits/misses.
+
+Use --json to save results and --baseline to compare against a saved run; the
+exit code is 1 when any phase's p95 regressed by more than --tolerance, so the
+script can gate CI.
+
+    python TestCase/bench_rag.py --docs 4 --pages 8 --embeddings fake --json .bench/rag.json
+"""
+from pathlib import Path
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+
+from stub_llm_server import start_stub
+from synthetic_corpus import generate_corpus
+
+QUESTIONS = [
+    "What is the main contribution of the paper?",
+    "Which datasets and baselines are used in the experiments?",
+    "What are the limitations discussed by the authors?",
+    "Summarise the results section.",
+]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def counters(metrics):
+    """Snapshot of cache and token counters from the tracing metrics."""
+    with metrics._lock:
+        return {(name, labels): value for (name, labels), value in metrics.counters.items()
+                if name in ("bot_cache_total", "bot_tokens_total")}
+
+
+def counter_delta(before, after):
+    cache, tokens = {}, 0
+    for key, value in after.items():
+        diff = value - before.get(key, 0)
+        if not diff:
+            continue
+        name, labels = key
+        labels = dict(labels)
+        if name == "bot_cache_total":
+            cache.setdefault(labels["cache"], {"hit": 0, "miss": 0})[labels["result"]] += int(diff)
+        else:
+            tokens += int(diff)
+    return cache, tokens
+
+
+def run_phase(fn, jobs, concurrency, metrics):
+    """Run fn(*job) for every job; returns latency/throughput/memory/cache stats."""
+    def timed(job):
+        start = time.perf_counter()
+        fn(*job)
+        return time.perf_counter() - start
+
+    before, rss_before = counters(metrics), rss_mb()
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(timed, jobs))
+    else:
+        latencies = [timed(job) for job in jobs]
+    wall = time.perf_counter() - start
+    cache, tokens = counter_delta(before, counters(metrics))
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "n": len(latencies),
+        "throughput": len(latencies) / wall,
+        "mean": float(np.mean(latencies)),
+        "p50": float(p50), "p95": float(p95), "p99": float(p99),
+        "rss_mb": rss_mb(), "rss_delta_mb": rss_mb() - rss_before,
+        "cache": cache, "tokens": tokens,
+    }
+
+
+def use_fake_embeddings(modules, size=384):
+    """Swap the embedding model for hash-based vectors (no model download, no torch)."""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    fake = DeterministicFakeEmbedding(size=size)
+    for module in modules:
+        module.get_embeddings = lambda backend=None, **kwargs: fake
+
+
+def clear_caches(*names):
+    """Remove .cache/<name> directories (and the in-process embedding stores over them)."""
+    from src.utils.embedcache import get_store
+    for name in names:
+        shutil.rmtree(Path(".cache") / name, ignore_errors=True)
+    if "embeddings" in names:
+        get_store.cache_clear()
+
+
+def bots():
+    from src.conferencebot import bot as conference
+    from src.paperReviewerBot import bot as reviewer
+    from src.Reseach_AnalysisBot import bot as analyst
+    return {
+        "conference": (conference, lambda pdf, q: conference.conference_bot(q, source=pdf)),
+        "reviewer": (reviewer, lambda pdf, q: reviewer.paper_reviewer_rag(pdf, q)),
+        "analyst": (analyst, lambda pdf, q: analyst.Research_paper_analyst(pdf)),
+    }
+
+
+def benchmark(args):
+    workdir = Path(args.workdir).resolve()
+    pdfs = [str(p) for p in generate_corpus(workdir / "corpus", args.docs, args.pages, args.seed)]
+    # build_index caches under ./.cache/faiss, so run inside the work directory
+    os.chdir(workdir)
+
+    server, url, stub = start_stub(latency=args.latency, tps=args.tps, tokens=args.tokens, seed=args.seed)
+    os.environ["GROQ_API_BASE"] = url
+    os.environ["GROQ_API_KEY"] = "benchmark-key"
+
+    from src.utils.tracing import METRICS
+    selected = {name: spec for name, spec in bots().items() if name in args.bots}
+    if args.embeddings == "fake":
+        use_fake_embeddings(module for module, _ in selected.values())
+
+    results = {}
+    for name, (module, answer) in selected.items():
+        # bots share the caches under .cache, so every bot starts cold
+        clear_caches("faiss", "docs", "embeddings")
+        module._VECTORSTORE_CACHE.clear()
+        index = [(pdf,) for pdf in pdfs]
+
+        phases = {"index_cold": run_phase(module.build_index, index, 1, METRICS)}
+        clear_caches("faiss", "embeddings")
+        module._VECTORSTORE_CACHE.clear()
+        phases["index_parsed"] = run_phase(module.build_index, index, 1, METRICS)
+        clear_caches("faiss")
+        module._VECTORSTORE_CACHE.clear()
+        phases["index_embed"] = run_phase(module.build_index, index, 1, METRICS)
+        module._VECTORSTORE_CACHE.clear()
+        phases["index_disk"] = run_phase(module.build_index, index, 1, METRICS)
+        phases["index_memory"] = run_phase(module.build_index, index, 1, METRICS)
+        jobs = [(pdf, q) for pdf in pdfs for q in QUESTIONS[:args.questions]]
+        phases["answer"] = run_phase(answer, jobs, args.concurrency, METRICS)
+        results[name] = phases
+
+    server.shutdown()
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+        "llm_requests": stub.requests,
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }
+
+
+def report(run):
+    print(f"{'bot':<11}{'phase':<14}{'n':>4}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'RSS MB':>9}{'tokens':>8}  cache hit/miss")
+    for bot, phases in run["results"].items():
+        for phase, r in phases.items():
+            cache = " ".join(f"{c}={v['hit']}/{v['miss']}" for c, v in sorted(r["cache"].items()))
+            print(f"{bot:<11}{phase:<14}{r['n']:>4}{r['throughput']:>9.2f}{r['p50'] * 1e3:>10.1f}"
+                  f"{r['p95'] * 1e3:>10.1f}{r['p99'] * 1e3:>10.1f}{r['rss_mb']:>9.0f}{r['tokens']:>8}  {cache}")
+    print(f"{run['llm_requests']} stub LLM requests, peak RSS {run['peak_rss_mb']:.0f} MB")
+
+
+def regressions(run, baseline, tolerance):
+    found = []
+    for bot, phases in run["results"].items():
+        for phase, r in phases.items():
+            base = baseline.get("results", {}).get(bot, {}).get(phase)
+            if base and r["p95"] > base["p95"] * (1 + tolerance):
+                found.append(f"{bot}/{phase}: p95 {base['p95'] * 1e3:.1f} ms -> {r['p95'] * 1e3:.1f} ms")
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--bots", default="conference,reviewer,analyst",
+                        type=lambda s: [b.strip() for b in s.split(",") if b.strip()])
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM seconds to first token")
+    parser.add_argument("--tps", type=float, default=400.0, help="stub LLM tokens per second")
+    parser.add_argument("--tokens", type=int, default=150, help="stub LLM completion length")
+    parser.add_argument("--embeddings", choices=["hf", "fake"], default="hf",
+                        help="hf: all-MiniLM-L6-v2 on $EMBEDDING_BACKEND as in production; "
+                             "fake: hash vectors, no model needed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=".bench")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown vs baseline")
+    args = parser.parse_args()
+
+    json_path = Path(args.json).resolve() if args.json else None
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    run = benchmark(args)
+    report(run)
+    if json_path:
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        json_path.write_text(json.dumps(run, indent=2))
+    if baseline:
+        found = regressions(run, baseline, args.tolerance)
+        for line in found:
+            print("REGRESSION", line)
+        sys.exit(1 if found else 0)
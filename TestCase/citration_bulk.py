@@ -0,0 +1,48 @@
+from pathlib import Path
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.citrationmaker.citration import format_bibliography
+
+TEMPLATES = [
+    """@article{{art{i},
+  title={{Deep Learning for AI, part {i}}},
+  author={{John Doe and Jane Smith}},
+  journal={{Journal of AI Research}},
+  volume={{12}},
+  number={{3}},
+  pages={{45--60}},
+  year={{20{y:02d}}}
+}}""",
+    """@inproceedings{{conf{i},
+  title={{Federated Learning at Scale {i}}},
+  author={{Smith, Jane and Lee, Kim}},
+  booktitle={{Proceedings of NeurIPS}},
+  pages={{1--9}},
+  year={{20{y:02d}}}
+}}""",
+    """@book{{book{i},
+  title={{Statistics for Researchers {i}}},
+  author={{Ada Lovelace}},
+  publisher={{Academic Press}},
+  year={{20{y:02d}}}
+}}""",
+]
+
+n = 2000
+bib = "\n\n".join(TEMPLATES[i % 3].format(i=i, y=i % 25) for i in range(n))
+# add duplicates to exercise dedupe
+bib += "\n\n" + "\n\n".join(TEMPLATES[0].format(i=i, y=i % 25) for i in range(0, 30, 3))
+
+styles = ["APA", "IEEE", "MLA"]
+start = time.perf_counter()
+results = list(format_bibliography(bib, styles, sort_by="year"))
+elapsed = time.perf_counter() - start
+
+# rates come from the formatted output; the duplicates appended past n are dropped by dedupe
+entries = len(results) // len(styles)
+print(results[0])
+print(f"{entries} entries x {len(styles)} styles in {elapsed:.2f}s "
+      f"({entries / elapsed:.0f} entries/s, {len(results) / elapsed:.0f} citations/s)")
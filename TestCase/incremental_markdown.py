@@ -0,0 +1,53 @@
+"""Incremental markdown rendering must match one-shot rendering.
+
+Feeds each document to IncrementalMarkdownRenderer in random fragment sizes
+and compares the joined fragments with safe_markdown_to_html(whole text),
+ignoring the whitespace between top-level blocks. Loose lists (items
+separated by blank lines) and indented continuations are the cases a
+blank-line splitter gets wrong.
+
+    python TestCase/incremental_markdown.py
+"""
+from pathlib import Path
+import random
+import re
+import sys
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.formatter import IncrementalMarkdownRenderer, safe_markdown_to_html
+
+CASES = {
+    "loose ordered list": "1. one\n\n2. two\n\n3. three",
+    "loose bullet list": "Intro paragraph.\n\n- alpha\n\n- beta\n\n\n- gamma\n\nAfter the list.",
+    "indented continuation": "1. first item\n\n    more about the first item\n\n2. second item\n\nDone.",
+    "nested list": "- outer\n\n    - inner one\n\n    - inner two\n\n- outer again",
+    "indented code": "Code follows:\n\n    a = 1\n\n    b = 2\n\nText again.",
+    "fenced code": "## Heading\n\n```\nx = 1\n\ny = 2\n```\n\n1. after\n\n2. fence",
+    "tight list": "### Summary\nDeadline is March 1.\n\n- CFP open\n- Venue: Lisbon\n\nSee the site.",
+}
+
+
+def normalise(html_text):
+    return re.sub(r">\s+<", "><", html_text).strip()
+
+
+def incremental(text, rng):
+    renderer = IncrementalMarkdownRenderer()
+    pos, out = 0, []
+    while pos < len(text):
+        step = rng.randint(1, 12)
+        out.extend(renderer.feed(text[pos:pos + step]))
+        pos += step
+    out.extend(renderer.flush())
+    return "".join(out)
+
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+    for name, text in CASES.items():
+        expected = normalise(safe_markdown_to_html(text))
+        for _ in range(50):
+            got = normalise(incremental(text, rng))
+            assert got == expected, f"{name}:\n  incremental {got}\n  one-shot    {expected}"
+        print(f"{name:<24} ok")
@@ -0,0 +1,288 @@
+"""Load test for /bot/{bot_id} and /bot/{bot_id}/stream.
+
+Starts the stub LLM (stub_llm_server.py) and N single-process app workers on
+local ports, then replays a mixed workload with a growing number of
+closed-loop users (each sends its next request as soon as the previous one
+finished):
+  citation     POST /bot/citation             (BibTeX formatting)
+  sample_size  POST /bot/sample_size          (power analysis)
+  question     POST /bot/reviewer/stream      (repeat questions on a corpus PDF)
+  upload       POST /bot/reviewer/stream      (PDF upload, indexing starts)
+Per step it reports throughput, latency percentiles (and time to first byte for
+streams), errors, event-loop lag scraped from each worker's /metrics and each
+worker's RSS; --json also keeps the per-second memory/lag timeline.
+
+    python TestCase/load_test.py --workers 2 --users 1,4,16,32 --step 15 --embeddings fake
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+
+BIBTEX = [
+    "@article{doe2020,author={Doe, John and Roe, Jane},title={Deep Learning for Segmentation},"
+    "journal={Journal of Imaging},year={2020},volume={6},pages={1--10}}",
+    "@inproceedings{lee2019,author={Lee, Kim},title={Graph Methods},booktitle={Proceedings of NeurIPS},year={2019}}",
+    "@book{smith2018,author={Smith, Adam},title={Statistics},publisher={Springer},year={2018}}",
+]
+SAMPLE_SIZE = [
+    {"mode": "ttest", "effect_size": "0.5"},
+    {"mode": "anova", "effect_size": "0.25", "groups": "3"},
+    {"mode": "correlation", "effect_size": "0.3"},
+    {"mode": "regression", "predictors": "5"},
+]
+QUESTIONS = ["What is the main contribution?", "Which baselines are used?", "What are the limitations?"]
+LAG_RE = re.compile(r'^bot_event_loop_lag_seconds\{pid="(\d+)"\} (\S+)$', re.MULTILINE)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return float("nan")
+
+
+def serve(port):
+    """Worker entry point: one uvicorn process serving the app."""
+    if os.environ.get("LOAD_TEST_FAKE_EMBEDDINGS"):
+        from bench_rag import bots, use_fake_embeddings
+        use_fake_embeddings(module for module, _ in bots().values())
+    import uvicorn
+    from app import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_workers(args, workdir, stub_url):
+    # the app resolves templates/ and static/ from its working directory and
+    # writes .cache/ there; link the former so caches stay in the work directory
+    for name in ("templates", "static"):
+        link = workdir / name
+        if not link.exists():
+            link.symlink_to(ROOT / name)
+    env = {**os.environ, "GROQ_API_BASE": stub_url, "GROQ_API_KEY": "load-test-key",
+           "PYTHONPATH": os.pathsep.join([str(ROOT), os.environ.get("PYTHONPATH", "")])}
+    if args.embeddings == "fake":
+        env["LOAD_TEST_FAKE_EMBEDDINGS"] = "1"
+    workers = []
+    for _ in range(args.workers):
+        port = free_port()
+        proc = subprocess.Popen([sys.executable, __file__, "--serve", str(port)], cwd=workdir, env=env)
+        workers.append((proc, f"http://127.0.0.1:{port}"))
+    return workers
+
+
+async def wait_ready(client, url, proc, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"worker {url} exited with {proc.returncode}")
+        try:
+            if (await client.get(url + "/metrics")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"worker {url} did not start")
+
+
+def scenarios(pdfs):
+    async def citation(client, base, rng):
+        data = {"bibtex": rng.choice(BIBTEX), "style": rng.choice(["APA", "MLA", "IEEE"])}
+        return await client.post(base + "/bot/citation", data=data), None
+
+    async def sample_size(client, base, rng):
+        return await client.post(base + "/bot/sample_size", data=rng.choice(SAMPLE_SIZE)), None
+
+    async def streamed(client, base, **kwargs):
+        start = time.perf_counter()
+        ttfb = None
+        async with client.stream("POST", base + "/bot/reviewer/stream", **kwargs) as resp:
+            async for _ in resp.aiter_bytes():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+        return resp, ttfb
+
+    async def question(client, base, rng):
+        return await streamed(client, base, data={"pdf_path": rng.choice(pdfs), "question": rng.choice(QUESTIONS)})
+
+    async def upload(client, base, rng):
+        pdf = rng.choice(pdfs)
+        with open(pdf, "rb") as f:
+            files = {"pdf_file": (Path(pdf).name, f.read(), "application/pdf")}
+        return await streamed(client, base, files=files)
+
+    return {"citation": citation, "sample_size": sample_size, "question": question, "upload": upload}
+
+
+async def run_step(client, workers, users, duration, mix, handlers, seed):
+    """Closed-loop users for `duration` seconds; returns per-request samples and a resource timeline."""
+    names, weights = zip(*mix.items())
+    samples, timeline = [], []
+    end = time.monotonic() + duration
+
+    async def user(i):
+        rng = random.Random(seed * 1000 + i)
+        n = i
+        while time.monotonic() < end:
+            name = rng.choices(names, weights)[0]
+            base = workers[n % len(workers)][1]
+            n += 1
+            start = time.perf_counter()
+            try:
+                resp, ttfb = await handlers[name](client, base, rng)
+                ok = resp.status_code < 400
+            except Exception:
+                ok, ttfb = False, None
+            samples.append((name, time.perf_counter() - start, ttfb, ok))
+
+    async def monitor():
+        while time.monotonic() < end:
+            point = {"t": time.monotonic(), "users": users, "rss_mb": {}, "lag_s": {}}
+            for proc, url in workers:
+                point["rss_mb"][proc.pid] = rss_mb(proc.pid)
+                try:
+                    text = (await client.get(url + "/metrics", timeout=5)).text
+                    for pid, lag in LAG_RE.findall(text):
+                        point["lag_s"][int(pid)] = float(lag)
+                except Exception:
+                    pass
+            timeline.append(point)
+            await asyncio.sleep(1.0)
+
+    start = time.perf_counter()
+    await asyncio.gather(monitor(), *(user(i) for i in range(users)))
+    return samples, timeline, time.perf_counter() - start
+
+
+def summarise(users, samples, timeline, wall):
+    def stats(latencies):
+        if not latencies:
+            return {}
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+    per_scenario = {}
+    for name in sorted({s[0] for s in samples}):
+        rows = [s for s in samples if s[0] == name]
+        ttfbs = [s[2] for s in rows if s[2] is not None]
+        per_scenario[name] = {
+            "n": len(rows),
+            "errors": sum(1 for s in rows if not s[3]),
+            **stats([s[1] for s in rows]),
+            "ttfb_p50": float(np.median(ttfbs)) if ttfbs else None,
+        }
+    lags = [lag for point in timeline for lag in point["lag_s"].values()]
+    rss = {}
+    for point in timeline:
+        for pid, mb in point["rss_mb"].items():
+            rss[pid] = max(rss.get(pid, 0), mb)
+    return {
+        "users": users,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s[3]),
+        "throughput": len(samples) / wall,
+        **stats([s[1] for s in samples]),
+        "loop_lag_max": max(lags, default=0.0),
+        "loop_lag_mean": float(np.mean(lags)) if lags else 0.0,
+        "rss_max_mb": rss,
+        "scenarios": per_scenario,
+    }
+
+
+def report(steps):
+    print(f"{'users':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+          f"{'lag max ms':>12}  worker RSS MB")
+    for s in steps:
+        rss = " ".join(f"{mb:.0f}" for mb in s["rss_max_mb"].values())
+        print(f"{s['users']:>5}{s['throughput']:>9.2f}{s.get('p50', 0) * 1e3:>9.0f}{s.get('p95', 0) * 1e3:>9.0f}"
+              f"{s.get('p99', 0) * 1e3:>9.0f}{s['errors']:>8}{s['loop_lag_max'] * 1e3:>12.1f}  {rss}")
+        for name, sc in s["scenarios"].items():
+            ttfb = f"  ttfb p50 {sc['ttfb_p50'] * 1e3:.0f} ms" if sc["ttfb_p50"] is not None else ""
+            print(f"{'':>5}  {name:<12}n={sc['n']:<5} p50 {sc.get('p50', 0) * 1e3:.0f} ms  "
+                  f"p95 {sc.get('p95', 0) * 1e3:.0f} ms  errors {sc['errors']}{ttfb}")
+    base = steps[0].get("p95")
+    for s in steps[1:]:
+        if base and s.get("p95", 0) > 3 * base:
+            print(f"Latency knee: p95 above 3x the {steps[0]['users']}-user level from {s['users']} users")
+            break
+
+
+async def main(args):
+    import httpx
+    from stub_llm_server import start_stub
+    from synthetic_corpus import generate_corpus
+
+    workdir = Path(args.workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    pdfs = [str(p) for p in generate_corpus(workdir / "corpus", args.docs, args.pages, args.seed)]
+    stub, stub_url, _ = start_stub(latency=args.latency, tps=args.tps, tokens=args.tokens, seed=args.seed)
+    workers = start_workers(args, workdir, stub_url)
+    mix = dict((k, float(v)) for k, v in (item.split("=") for item in args.mix.split(",")))
+    limits = httpx.Limits(max_connections=max(args.users) * 2 + 2 * len(workers))
+    steps, timeline = [], []
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            for proc, url in workers:
+                await wait_ready(client, url, proc)
+            handlers = scenarios(pdfs)
+            for users in args.users:
+                samples, points, wall = await run_step(client, workers, users, args.step, mix, handlers, args.seed)
+                steps.append(summarise(users, samples, points, wall))
+                timeline.extend(points)
+    finally:
+        for proc, _ in workers:
+            proc.terminate()
+        for proc, _ in workers:
+            proc.wait()
+        stub.shutdown()
+
+    report(steps)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"config": vars(args), "steps": steps, "timeline": timeline}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--users", default="1,4,16", type=lambda s: [int(u) for u in s.split(",")],
+                        help="concurrent users per step")
+    parser.add_argument("--step", type=float, default=15.0, help="seconds per step")
+    parser.add_argument("--mix", default="citation=3,sample_size=3,question=3,upload=1",
+                        help="scenario weights")
+    parser.add_argument("--docs", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub LLM seconds to first token")
+    parser.add_argument("--tps", type=float, default=300.0, help="stub LLM tokens per second")
+    parser.add_argument("--tokens", type=int, default=150, help="stub LLM completion length")
+    parser.add_argument("--embeddings", choices=["hf", "fake"], default="hf")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=".bench/load")
+    parser.add_argument("--json", help="write steps and timeline to this file")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+    else:
+        asyncio.run(main(args))
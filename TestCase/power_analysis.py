@@ -0,0 +1,46 @@
+from pathlib import Path
+import sys
+import time
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.sample_sizeBot import power
+
+# Reference sample sizes (alpha = 0.05) from G*Power 3.1 and Cohen (1988)
+REFERENCE = [
+    ("t-test d=0.2, per group", power.ttest_n, (0.2,), 394),
+    ("t-test d=0.5, per group", power.ttest_n, (0.5,), 64),
+    ("t-test d=0.8, per group", power.ttest_n, (0.8,), 26),
+    ("t-test d=0.5, power=0.9", power.ttest_n, (0.5, 0.90), 86),
+    ("ANOVA f=0.25, k=3", power.anova_n, (0.25, 3), 159),
+    ("ANOVA f=0.25, k=4", power.anova_n, (0.25, 4), 180),
+    ("ANOVA f=0.40, k=3", power.anova_n, (0.40, 3), 66),
+    ("chi-square w=0.3, df=1", power.chisquare_n, (0.3, 1), 88),
+    ("chi-square w=0.3, df=2", power.chisquare_n, (0.3, 2), 108),
+    ("correlation r=0.3", power.correlation_n, (0.3,), 85),
+    ("correlation r=0.5", power.correlation_n, (0.5,), 30),
+    ("regression f2=0.15, 5 predictors", power.regression_n, (0.15, 5), 92),
+    ("regression f2=0.15, 10 predictors", power.regression_n, (0.15, 10), 118),
+]
+
+failures = 0
+start = time.perf_counter()
+for label, fn, args, expected in REFERENCE:
+    got = fn(*args)
+    status = "ok" if got == expected else "MISMATCH"
+    failures += got != expected
+    print(f"{label:<36} expected={expected:<5} got={got:<5} {status}")
+cold = time.perf_counter() - start
+
+start = time.perf_counter()
+for _, fn, args, _ in REFERENCE:
+    fn(*args)
+warm = time.perf_counter() - start
+
+start = time.perf_counter()
+power.warm_cache()
+grid = time.perf_counter() - start
+
+print(f"\ncold solve: {cold / len(REFERENCE) * 1000:.2f} ms/call, "
+      f"cached: {warm / len(REFERENCE) * 1e6:.1f} us/call, full warm_cache grid: {grid:.2f}s")
+sys.exit(1 if failures else 0)
@@ -0,0 +1,46 @@
+from pathlib import Path
+import json
+import sys
+import time
+from itertools import product
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.Statistical_test_selector.stat import StatisticalTestSelectorBot, RULES_PATH
+
+bot = StatisticalTestSelectorBot()
+names, table, assumptions = bot.attributes, bot.table, bot.assumptions_map
+
+# 1. Exhaustive enumeration: every design in the attribute space has at least
+#    one ranked test, and every ranked test has documented assumptions.
+with open(RULES_PATH, encoding="utf-8") as f:
+    attributes = json.load(f)["attributes"]
+space = list(product(*attributes.values()))
+assert len(space) == len(table), (len(space), len(table))
+for key in space:
+    ranked = table[key]
+    assert ranked, f"no test for design {dict(zip(names, key))}"
+    assert len(set(ranked)) == len(ranked), f"duplicate tests for {key}"
+    for test in ranked:
+        assert assumptions.get(test), f"no assumptions for {test}"
+print(f"{len(space)} designs enumerated, all resolve to ranked tests")
+
+# 2. The original four-way selector is preserved under default design attributes
+LEGACY = [
+    (("categorical", "categorical", None), "Chi-square Test"),
+    (("categorical", "continuous", 2), "Independent t-test"),
+    (("categorical", "continuous", 3), "ANOVA"),
+    (("categorical", "continuous", None), "ANOVA"),
+    (("continuous", "continuous", None), "Pearson Correlation"),
+    (("continuous", "categorical", None), "Logistic Regression"),
+]
+for (iv, dv, groups), expected in LEGACY:
+    got = bot.select_test(iv_type=iv, dv_type=dv, groups=groups)
+    assert got == expected, (iv, dv, groups, got)
+print("legacy selections unchanged")
+
+# 3. Lookup cost
+start = time.perf_counter()
+for _ in range(100_000):
+    bot.rank_tests("categorical", "continuous", groups=2, paired=True, distribution="non-normal", sample_size=20)
+print(f"rank_tests: {(time.perf_counter() - start) / 100_000 * 1e6:.2f} us/lookup")
@@ -0,0 +1,129 @@
+"""Local stand-in for the Groq chat completions API, for offline benchmarks.
+
+Answers every request with deterministic text after a configurable
+time-to-first-token and generation speed, so LLM latency is a controlled
+constant instead of network noise. Point the bots at it with
+GROQ_API_BASE=http://127.0.0.1:<port> (see start_stub()).
+
+    python TestCase/stub_llm_server.py --port 8765 --latency 0.2 --tps 200 --tokens 150
+"""
+from pathlib import Path
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# Ensure repository root (where `src/` lives) is on sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+WORDS = ("the study presents a clear contribution but the evaluation would benefit from "
+         "additional baselines stronger statistical analysis and a discussion of limitations").split()
+
+
+class StubConfig:
+    def __init__(self, latency=0.2, tps=200.0, tokens=150, seed=0):
+        self.latency = latency      # seconds before the first token
+        self.tps = tps              # generated tokens per second
+        self.tokens = tokens        # completion length in tokens (one word = one token)
+        self.seed = seed
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _answer(config, prompt):
+    # Deterministic per prompt, structured like a review so formatters have work to do
+    rng = random.Random(f"{config.seed}:{prompt}")
+    words = [rng.choice(WORDS) for _ in range(max(config.tokens - 12, 1))]
+    third = max(len(words) // 3, 1)
+    parts = ["## Strengths\n", *(w + " " for w in words[:third]), ".\n\n## Weaknesses\n",
+             *(w + " " for w in words[third:2 * third]), ".\n\n## Overall Recommendation\n",
+             *(w + " " for w in words[2 * third:]), "."]
+    return parts
+
+
+def _make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with config.lock:
+                config.requests += 1
+            prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+            pieces = _answer(config, prompt)
+            usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(pieces),
+                     "total_tokens": len(prompt) // 4 + len(pieces)}
+            meta = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()),
+                    "model": body.get("model", "stub")}
+            time.sleep(config.latency)
+            if body.get("stream"):
+                self._stream(meta, pieces, usage)
+            else:
+                time.sleep(len(pieces) / config.tps)
+                self._json({**meta, "object": "chat.completion", "usage": usage, "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(pieces)}}]})
+
+        def _json(self, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, meta, pieces, usage):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(payload):
+                data = f"data: {payload}\n\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            for i, piece in enumerate(pieces):
+                time.sleep(1 / config.tps)
+                delta = {"content": piece, **({"role": "assistant"} if i == 0 else {})}
+                send(json.dumps({**meta, "object": "chat.completion.chunk",
+                                 "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}))
+            send(json.dumps({**meta, "object": "chat.completion.chunk", "x_groq": {"usage": usage},
+                             "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def start_stub(port=0, **config_kwargs):
+    """Start the stub in a daemon thread; returns (server, base_url, config)."""
+    config = StubConfig(**config_kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to first token")
+    parser.add_argument("--tps", type=float, default=200.0, help="tokens per second")
+    parser.add_argument("--tokens", type=int, default=150, help="completion length")
+    args = parser.parse_args()
+    server, url, _ = start_stub(args.port, latency=args.latency, tps=args.tps, tokens=args.tokens)
+    print(f"Stub LLM listening on {url} (export GROQ_API_BASE={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,13 +1,20 @@
 from fastapi import FastAPI, Request, Form, UploadFile
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 import os
 import sys
 import io
 import tempfile
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
 from pathlib import Path
 from dotenv import load_dotenv
+from src.utils.batch import split_questions
+from src.utils.tracing import METRICS, logger, monitor_event_loop, record_error, record_request, span, start_trace
 
 load_dotenv()
 
@@ -16,6 +23,42 @@ app = FastAPI(title="Research Tools Dashboard")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+
+@app.on_event("startup")
+def warm_caches():
+    """Build every bot's chain once and precompute power-analysis sample sizes, in the background."""
+    def _warm():
+        from src.utils.chains import build_all
+        for bot_id, error in build_all().items():
+            logger.warning("Could not prebuild chain for %s: %s", bot_id, error)
+        try:
+            from src.sample_sizeBot.power import warm_cache
+            warm_cache()
+        except Exception:
+            logger.warning("Could not warm the power-analysis cache", exc_info=True)
+    import threading
+    threading.Thread(target=_warm, daemon=True).start()
+
+
+# The loop holds tasks weakly; this reference keeps the monitor alive until shutdown
+_loop_monitor: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Report event-loop lag in /metrics (bot_event_loop_lag_seconds)."""
+    global _loop_monitor
+    _loop_monitor = asyncio.get_running_loop().create_task(monitor_event_loop())
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    global _loop_monitor
+    if _loop_monitor is not None:
+        _loop_monitor.cancel()
+        await asyncio.gather(_loop_monitor, return_exceptions=True)
+        _loop_monitor = None
+
 BOTS = [
     {"id": "citation",   "name": "Citation Formatter"},
     {"id": "idea",       "name": "Idea Generator"},
@@ -27,13 +70,41 @@ BOTS = [
     {"id": "analyst",    "name": "Paper Analyst"},
     {"id": "writer",     "name": "Paper Writer Agent"},
 ]
+BOTS_BY_ID = {b["id"]: b for b in BOTS}
+
+
+def _form_flag(form, name: str) -> bool:
+    """Checkbox-style form field: "1", "true", "yes" or "on" mean set."""
+    return str(form.get(name) or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _bad_request(request: Request, bot: dict, last_values: dict, message: str):
+    """The bot page showing `message`, answered with 400."""
+    return templates.TemplateResponse(request, "bot.html", {
+        "request": request,
+        "bot": bot,
+        "result": None,
+        "error": message,
+        "last_values": last_values
+    }, status_code=400)
+
+
+def _bot_not_found():
+    # checked before any tracing so unknown ids never become metric labels
+    return HTMLResponse("<h1>404 - Bot not found</h1>", status_code=404)
 
 # Very simple function router (expand later with real logic)
 def run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
     """
-    Replace this with real calls to your bot functions
-    Return (result, error) or (None, error)
+    Return (result, error) or (None, error); timed as the run_bot_logic stage.
     """
+    with span("run_bot_logic"):
+        result, error = _run_bot_logic(bot_id, **kwargs)
+    record_request(bot_id, "error" if error else "ok")
+    return result, error
+
+
+def _run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
     try:
         if bot_id == "citation":
             from src.citrationmaker.citration import convert_bibtex_to_style
@@ -42,7 +113,19 @@ def run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
             return convert_bibtex_to_style(bibtex.strip(), style), None
 
         elif bot_id == "idea":
-            from src.idea_Bot.bot import idea_generation_Bot
+            from src.idea_Bot.bot import idea_generation_Bot, idea_generation_batch, format_idea_batch, parse_idea_request
+            topics, n_ideas = parse_idea_request(kwargs.get("topic"), kwargs.get("topics"), kwargs.get("n_ideas"))
+            if n_ideas > 1 or kwargs.get("topics"):
+                # Batch mode (several ideas, or the separate topics field): generated concurrently and deduplicated
+                result = idea_generation_batch(
+                    field=kwargs.get("field") or "Computer Science",
+                    topics=topics or ["Sample topic"],
+                    novelty=kwargs.get("novelty") or "Medium",
+                    target_venue=kwargs.get("target_venue") or "Any venue",
+                    style=kwargs.get("style") or "Formal",
+                    n=n_ideas,
+                )
+                return format_idea_batch(result), None
             return idea_generation_Bot(
                 field=kwargs.get("field", "Computer Science"),
                 topic=kwargs.get("topic", "Sample topic"),
@@ -52,9 +135,14 @@ def run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
             ), None
 
         elif bot_id == "conference":
-            from src.conferencebot.bot import conference_bot
-            question = kwargs.get("question", "")
+            from src.conferencebot.bot import conference_bot, conference_bot_batch
+            from src.utils.batch import format_batch
+            question = kwargs.get("question") or ""
             source = kwargs.get("paper_text") or kwargs.get("pdf_path") or None
+            questions = kwargs.get("questions")
+            if questions:
+                # Batch mode (the separate questions field): retrieved together and answered concurrently
+                return format_batch(conference_bot_batch(questions, source=source)), None
             # Prefer bots to return strings instead of printing; handle None safely
             output = conference_bot(question.strip(), source=source)
             if output is None:
@@ -67,7 +155,7 @@ def run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
             return paper_writer(text), None
 
         elif bot_id == "questionaire":
-            from src.Questioniare.question import generate_questionnaire
+            from src.Questioniare.question import generate_questionnaire, generate_questionnaire_batch, format_questionnaire_batch, parse_targets
             example_input = {
                 "variables": kwargs.get("variables", ""),
                 "population": kwargs.get("population", ""),
@@ -76,11 +164,17 @@ def run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
                 "scale": kwargs.get("scale", "5"),
                 "domain": kwargs.get("domain", "")
             }
+            # Localisation targets come from their own field; language and culture above
+            # describe the master version, which every target is localised from concurrently
+            targets = parse_targets(kwargs.get("targets"))
+            if targets:
+                result = generate_questionnaire_batch(example_input, targets)
+                return format_questionnaire_batch(result), None
             return generate_questionnaire(example_input), None
 
         elif bot_id == "sample_size":
-            from src.sample_sizeBot.sample_size import SampleSizeBot
-            bot = SampleSizeBot()
+            from src.utils.chains import get_chain
+            bot = get_chain("sample_size")
             mode = kwargs.get("mode", "prevalence")
             if mode == "prevalence":
                 p = float(kwargs.get("p", 0.5))
@@ -92,28 +186,71 @@ def run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
                 sd = float(kwargs.get("std_dev", 1.0))
                 d = float(kwargs.get("d", 1.0))
                 return f"Recommended sample size: {bot.mean_estimation(std_dev=sd, d=d)}", None
-            elif mode == "regression":
-                predictors = int(kwargs.get("predictors", 3))
-                return f"Recommended sample size (rule of thumb): {bot.regression(predictors=predictors)}", None
+            power = float(kwargs.get("power") or 0.80)
+            effect_size = kwargs.get("effect_size")
+            if mode == "regression":
+                predictors = int(kwargs.get("predictors") or 3)
+                f2 = float(effect_size or 0.15)
+                return f"Recommended sample size (f²={f2}, power={power}): {bot.regression(predictors=predictors, power=power, f2=f2)}", None
+            elif mode == "ttest":
+                d_eff = float(effect_size or 0.5)
+                return f"Recommended sample size per group (d={d_eff}, power={power}): {bot.t_test(d=d_eff, power=power)}", None
+            elif mode == "anova":
+                f_eff = float(effect_size or 0.25)
+                groups = int(kwargs.get("groups") or 3)
+                return f"Recommended total sample size (f={f_eff}, {groups} groups, power={power}): {bot.anova(f=f_eff, groups=groups, power=power)}", None
+            elif mode == "chisquare":
+                w = float(effect_size or 0.3)
+                df = int(kwargs.get("df") or 1)
+                return f"Recommended total sample size (w={w}, df={df}, power={power}): {bot.chi_square(w=w, df=df, power=power)}", None
+            elif mode == "correlation":
+                r = float(effect_size or 0.3)
+                return f"Recommended sample size (r={r}, power={power}): {bot.correlation(r=r, power=power)}", None
 
         elif bot_id == "statistical":
-            from src.Statistical_test_selector.stat import StatisticalTestSelectorBot
-            selector = StatisticalTestSelectorBot()
+            from src.utils.chains import get_chain
+            selector = get_chain("statistical")
+            data_path = kwargs.get("data_path")
+            if data_path:
+                report = selector.select_from_data(data_path, dv=kwargs.get("dv_column") or None)
+                return selector.format_data_report(report), None
             iv = kwargs.get("iv_type", "categorical")
             dv = kwargs.get("dv_type", "continuous")
             groups = kwargs.get("groups")
             try:
                 groups = int(groups) if groups else None
-            except Exception:
+            except ValueError:
                 groups = None
-            test = selector.select_test(iv_type=iv, dv_type=dv, groups=groups)
-            assumptions = selector.assumptions(test)
-            return f"Recommended test: {test}\nAssumptions:\n- " + "\n- ".join(assumptions), None
+            try:
+                sample_n = int(kwargs.get("sample_n")) if kwargs.get("sample_n") else None
+            except ValueError:
+                sample_n = None
+            ranked = selector.rank_tests(
+                iv_type=iv,
+                dv_type=dv,
+                groups=groups,
+                paired=kwargs.get("paired") == "yes",
+                distribution=kwargs.get("distribution") or "normal",
+                sample_size=sample_n,
+                dvs=2 if kwargs.get("multi_dv") == "yes" else 1,
+            )
+            if not ranked:
+                return None, f"No test rule matches {iv} IV / {dv} DV"
+            test, assumptions = ranked[0]["test"], ranked[0]["assumptions"]
+            out = f"Recommended test: {test}\nAssumptions:\n- " + "\n- ".join(assumptions)
+            if len(ranked) > 1:
+                out += "\nAlternatives: " + ", ".join(r["test"] for r in ranked[1:])
+            return out, None
 
         elif bot_id == "reviewer":
-            from src.paperReviewerBot.bot import paper_reviewer_rag
+            from src.paperReviewerBot.bot import paper_reviewer_rag, paper_reviewer_batch
+            from src.utils.batch import format_batch
             doc = kwargs.get("paper_text") or kwargs.get("pdf_path") or ""
             question = kwargs.get("question") or "Please provide a structured review of the paper."
+            questions = kwargs.get("questions")
+            if questions:
+                # Batch mode (the separate questions field): retrieved together and answered concurrently
+                return format_batch(paper_reviewer_batch(doc, questions)), None
             return paper_reviewer_rag(doc, question), None
 
         elif bot_id == "analyst":
@@ -125,12 +262,40 @@ def run_bot_logic(bot_id: str, **kwargs) -> tuple[str | None, str | None]:
         return None, f"{bot_id} is not fully implemented yet"
 
     except Exception as e:
+        logger.exception("%s bot failed", bot_id)
+        record_error("run_bot_logic", e)
         return None, str(e)
 
 
+async def _save_data_upload(form):
+    """Save an uploaded CSV/Parquet dataset (form field 'data_file') to a temp file and return its path."""
+    uploaded = form.get('data_file')
+    if uploaded is None or not getattr(uploaded, 'filename', ''):
+        return None
+    suffix = Path(uploaded.filename).suffix.lower() or '.csv'
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    # copy in blocks so large datasets are never held in memory
+    while True:
+        block = await uploaded.read(1024 * 1024)
+        if not block:
+            break
+        tmp.write(block)
+    tmp.close()
+    return tmp.name
+
+
+def _discard_upload(path):
+    """Delete a temp copy made by _save_data_upload (None is ignored)."""
+    if path:
+        try:
+            os.unlink(path)
+        except OSError:
+            logger.warning("Could not delete upload %s", path, exc_info=True)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {
+    return templates.TemplateResponse(request, "index.html", {
         "request": request,
         "bots": BOTS
     })
@@ -138,11 +303,11 @@ async def home(request: Request):
 
 @app.get("/bot/{bot_id}", response_class=HTMLResponse)
 async def bot_page(request: Request, bot_id: str):
-    bot = next((b for b in BOTS if b["id"] == bot_id), None)
+    bot = BOTS_BY_ID.get(bot_id)
     if not bot:
-        return "<h1>404 - Bot not found</h1>", 404
+        return _bot_not_found()
 
-    return templates.TemplateResponse("bot.html", {
+    return templates.TemplateResponse(request, "bot.html", {
         "request": request,
         "bot": bot,
         "result": None,
@@ -167,9 +332,10 @@ async def execute_bot(
     pdf_path: str = Form(None),
     input_text: str = Form(None),
 ):
-    bot = next((b for b in BOTS if b["id"] == bot_id), None)
+    bot = BOTS_BY_ID.get(bot_id)
     if not bot:
-        return "<h1>404</h1>", 404
+        return _bot_not_found()
+    trace = start_trace(bot_id)
 
     # Read raw form to capture uploaded file if present (file input uses multipart forms)
     form = await request.form()
@@ -182,10 +348,14 @@ async def execute_bot(
         tmp.close()
         pdf_path = tmp.name
 
+    dv_column = form.get('dv_column') or None
+
     # Fall back to explicit params if form values aren't present
     paper_text = form.get('paper_text') or paper_text
     pdf_path = form.get('pdf_path') or pdf_path
     question = form.get('question') or question
+    questions_text = form.get('questions') or None
+    topics = form.get('topics') or None
 
     # Extract additional form fields used by newly added bots
     population = form.get('population') or None
@@ -193,22 +363,33 @@ async def execute_bot(
     d = form.get('d') or None
     std_dev = form.get('std_dev') or None
     predictors = form.get('predictors') or None
+    effect_size = form.get('effect_size') or None
+    power = form.get('power') or None
+    df = form.get('df') or None
     mode = form.get('mode') or None
     iv_type = form.get('iv_type') or None
     dv_type = form.get('dv_type') or None
     groups = form.get('groups') or None
+    paired = form.get('paired') or None
+    distribution = form.get('distribution') or None
+    sample_n = form.get('sample_n') or None
+    multi_dv = form.get('multi_dv') or None
     variables = form.get('variables') or None
     culture = form.get('culture') or None
     language = form.get('language') or None
+    targets = form.get('targets') or None
     scale = form.get('scale') or None
+    n_ideas = form.get('n_ideas') or None
     domain = form.get('domain') or None
 
     last_values = {
         "bibtex": bibtex,
         "style": style,
         "question": question,
+        "questions": questions_text,
         "field": field,
         "topic": topic,
+        "topics": topics,
         "novelty": novelty,
         "target_venue": target_venue,
         "style_text": style_text,
@@ -220,25 +401,47 @@ async def execute_bot(
         "d": d,
         "std_dev": std_dev,
         "predictors": predictors,
+        "effect_size": effect_size,
+        "power": power,
+        "df": df,
         "mode": mode,
         "iv_type": iv_type,
         "dv_type": dv_type,
         "groups": groups,
+        "paired": paired,
+        "distribution": distribution,
+        "sample_n": sample_n,
+        "multi_dv": multi_dv,
         "variables": variables,
         "culture": culture,
         "language": language,
+        "targets": targets,
         "scale": scale,
+        "n_ideas": n_ideas,
         "domain": domain,
+        "dv_column": dv_column,
     }
 
+    try:
+        # several questions at once only through the separate questions field
+        questions = split_questions(questions_text)
+        if bot_id == "idea":
+            from src.idea_Bot.bot import parse_idea_request
+            parse_idea_request(topic, topics, n_ideas)
+        if bot_id == "questionaire":
+            from src.Questioniare.question import parse_targets
+            parse_targets(targets)
+    except ValueError as e:
+        return _bad_request(request, bot, last_values, str(e))
+
     # If PDF / document provided but no question, build an index and/or run automatic analysis
-    if bot_id in ("reviewer", "analyst", "conference") and (paper_text or pdf_path) and not question:
+    if bot_id in ("reviewer", "analyst", "conference") and (paper_text or pdf_path) and not (question or questions):
         try:
             if bot_id == "reviewer":
                 from src.paperReviewerBot.bot import build_index as reviewer_build
                 msg = reviewer_build(paper_text or pdf_path)
                 # for reviewer we only index and return a readiness message
-                return templates.TemplateResponse("bot.html", {
+                return templates.TemplateResponse(request, "bot.html", {
                     "request": request,
                     "bot": bot,
                     "result": msg,
@@ -251,7 +454,7 @@ async def execute_bot(
                 from src.Reseach_AnalysisBot.bot import build_index as analyst_build, Research_paper_analyst
                 _ = analyst_build(paper_text or pdf_path)
                 analysis = Research_paper_analyst(paper_text or pdf_path)
-                return templates.TemplateResponse("bot.html", {
+                return templates.TemplateResponse(request, "bot.html", {
                     "request": request,
                     "bot": bot,
                     "result": analysis,
@@ -261,9 +464,9 @@ async def execute_bot(
 
             else:
                 from src.conferencebot.bot import build_index as conf_build
-                msg = conf_build(paper_text or pdf_path)
+                msg = conf_build(paper_text or pdf_path, refresh=_form_flag(form, 'refresh'))
 
-                return templates.TemplateResponse("bot.html", {
+                return templates.TemplateResponse(request, "bot.html", {
                     "request": request,
                     "bot": bot,
                     "result": msg,
@@ -271,58 +474,154 @@ async def execute_bot(
                     "last_values": last_values
                 })
         except Exception as e:
-            pass
-
-    result, error = run_bot_logic(
-        bot_id,
-        bibtex=bibtex,
-        style=style,
-        question=question,
-        field=field,
-        topic=topic,
-        novelty=novelty,
-        target_venue=target_venue,
-        paper_text=paper_text,
-        pdf_path=pdf_path,
-        input_text=input_text,
-        population=population,
-        p=p,
-        d=d,
-        std_dev=std_dev,
-        predictors=predictors,
-        mode=mode,
-        iv_type=iv_type,
-        dv_type=dv_type,
-        groups=groups,
-        variables=variables,
-        culture=culture,
-        language=language,
-        scale=scale,
-        domain=domain
-       # style=style_text
-    )
+            # fall through to a normal run, which builds the index on demand
+            logger.warning("Indexing %s for %s failed", paper_text and "text" or pdf_path, bot_id, exc_info=True)
+            record_error("build_index", e)
+
+    # saved only now, so the early returns above leave no temp file behind
+    data_path = await _save_data_upload(form)
+    # batches make up to MAX_QUESTIONS model calls plus rate-limiter sleeps; keep them off the event loop
+    try:
+        result, error = await run_in_threadpool(
+            run_bot_logic,
+            bot_id,
+            bibtex=bibtex,
+            style=style,
+            question=question,
+            questions=questions,
+            field=field,
+            topic=topic,
+            topics=topics,
+            novelty=novelty,
+            target_venue=target_venue,
+            paper_text=paper_text,
+            pdf_path=pdf_path,
+            input_text=input_text,
+            population=population,
+            p=p,
+            d=d,
+            std_dev=std_dev,
+            predictors=predictors,
+            effect_size=effect_size,
+            power=power,
+            df=df,
+            mode=mode,
+            iv_type=iv_type,
+            dv_type=dv_type,
+            groups=groups,
+            paired=paired,
+            distribution=distribution,
+            sample_n=sample_n,
+            multi_dv=multi_dv,
+            variables=variables,
+            culture=culture,
+            language=language,
+            targets=targets,
+            scale=scale,
+            n_ideas=n_ideas,
+            domain=domain,
+            data_path=data_path,
+            dv_column=dv_column
+           # style=style_text
+        )
+    finally:
+        _discard_upload(data_path)
 
-    return templates.TemplateResponse("bot.html", {
+    response = templates.TemplateResponse(request, "bot.html", {
         "request": request,
         "bot": bot,
         "result": result,
         "error": error,
         "last_values": last_values
     })
+    response.headers.update(trace.headers())
+    return response
+
+
+# Typed event protocols for /bot/{bot_id}/stream (see src/utils/events.py)
+EVENT_PROTOCOLS = {'sse': 'text/event-stream', 'ndjson': 'application/x-ndjson'}
+
+
+def _stream_protocol(request: Request, form=None):
+    """Event protocol requested via ?protocol=, a form field or the Accept header; None means plain text."""
+    protocol = request.query_params.get('protocol') or (form.get('protocol') if form is not None else None)
+    if protocol in EVENT_PROTOCOLS:
+        return protocol
+    accept = request.headers.get('accept', '')
+    if 'text/event-stream' in accept:
+        return 'sse'
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    return None
+
+
+def _event_response(source, render=None, protocol='sse', bot_id=None):
+    """Run an (event, data) generator in the background and stream its events."""
+    from src.utils.events import start_stream, encode, StreamLimitError
+    try:
+        log = start_stream(source, render=render == 'html', bot_id=bot_id)
+    except StreamLimitError as e:
+        return JSONResponse({"error": str(e)}, status_code=503, headers={'Retry-After': '5'})
+    return StreamingResponse(
+        encode(log, protocol),
+        media_type=EVENT_PROTOCOLS[protocol],
+        headers={'X-Stream-Id': log.id, 'Cache-Control': 'no-cache'},
+    )
+
+
+def _stream_response(gen, render=None, protocol=None, kind='token', bot_id=None):
+    """Wrap a bot's async text generator in a StreamingResponse.
+
+    With an event protocol every chunk becomes a `kind` event. Otherwise plain
+    text is streamed; with render='html' the markdown is rendered block by block
+    on the server and each HTML fragment is followed by BLOCK_SEPARATOR, so the
+    client can append fragments as they arrive instead of re-rendering the whole text.
+    """
+    if protocol in EVENT_PROTOCOLS:
+        from src.utils.events import typed
+        return _event_response(typed(gen, kind), render, protocol, bot_id=bot_id)
+    if kind == 'error':
+        async def error_text(source=gen):
+            async for chunk in source:
+                yield f"Error: {chunk}"
+        gen = error_text()
+    if render != 'html':
+        return StreamingResponse(gen, media_type='text/plain; charset=utf-8')
+
+    from src.utils.formatter import IncrementalMarkdownRenderer, BLOCK_SEPARATOR
+
+    async def html_gen():
+        renderer = IncrementalMarkdownRenderer()
+        async for chunk in gen:
+            for fragment in renderer.feed(getattr(chunk, 'content', chunk)):
+                yield fragment + BLOCK_SEPARATOR
+        for fragment in renderer.flush():
+            yield fragment + BLOCK_SEPARATOR
+    return StreamingResponse(html_gen(), media_type='text/html; charset=utf-8')
 
 
 @app.post("/bot/{bot_id}/stream")
 async def stream_bot(request: Request, bot_id: str):
     """Stream bot output by returning chunked text. This is a simple server-side chunked stream
     (if LLM streaming is available, integrate here).
+
+    Pass render=html (query string or form field) to receive rendered HTML blocks instead,
+    and protocol=sse or protocol=ndjson (or the matching Accept header) for typed events
+    that can be resumed from GET /bot/{bot_id}/stream/{stream_id}.
     """
+    if bot_id not in BOTS_BY_ID:
+        return _bot_not_found()
     form = await request.form()
+    render = request.query_params.get('render') or form.get('render')
+    protocol = _stream_protocol(request, form)
+    trace = start_trace(bot_id)
     # extract form fields commonly used by different bots
     bibtex = form.get('bibtex')
     style = form.get('style')
     question = form.get('question')
     field = form.get('field')
     topic = form.get('topic')
+    topics = form.get('topics')
     novelty = form.get('novelty')
     target_venue = form.get('target_venue')
     paper_text = form.get('paper_text')
@@ -334,14 +633,23 @@ async def stream_bot(request: Request, bot_id: str):
     d = form.get('d')
     std_dev = form.get('std_dev')
     predictors = form.get('predictors')
+    effect_size = form.get('effect_size')
+    power = form.get('power')
+    df = form.get('df')
     mode = form.get('mode')
     iv_type = form.get('iv_type')
     dv_type = form.get('dv_type')
     groups = form.get('groups')
+    paired = form.get('paired')
+    distribution = form.get('distribution')
+    sample_n = form.get('sample_n')
+    multi_dv = form.get('multi_dv')
     variables = form.get('variables')
     culture = form.get('culture')
     language = form.get('language')
+    targets = form.get('targets')
     scale = form.get('scale')
+    n_ideas = form.get('n_ideas')
     domain = form.get('domain')
 
     # Handle uploaded file if provided
@@ -354,15 +662,29 @@ async def stream_bot(request: Request, bot_id: str):
         tmp.close()
         pdf_path = tmp.name
 
+    dv_column = form.get('dv_column')
+
+    try:
+        # several questions at once only through the separate questions field
+        questions = split_questions(form.get('questions'))
+        if bot_id == "idea":
+            from src.idea_Bot.bot import parse_idea_request
+            parse_idea_request(topic, topics, n_ideas)
+        if bot_id == "questionaire":
+            from src.Questioniare.question import parse_targets
+            parse_targets(targets)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
     # If PDF/doc provided but no question - build an index and stream a readiness message OR run analysis for analyst
-    if bot_id in ("reviewer", "analyst", "conference") and (paper_text or pdf_path) and not question:
+    if bot_id in ("reviewer", "analyst", "conference") and (paper_text or pdf_path) and not (question or questions):
         try:
             if bot_id == "reviewer":
                 from src.paperReviewerBot.bot import build_index as reviewer_build
                 msg = reviewer_build(paper_text or pdf_path, background=True)
                 async def idx_gen():
                     yield msg
-                return StreamingResponse(idx_gen(), media_type='text/plain; charset=utf-8')
+                return _stream_response(idx_gen(), render, protocol, kind='progress', bot_id=bot_id)
 
             elif bot_id == "analyst":
                 # For analyst: build index then run automatic analysis and stream the output (synchronous to get immediate analysis)
@@ -373,81 +695,317 @@ async def stream_bot(request: Request, bot_id: str):
                 analysis = Research_paper_analyst(paper_text or pdf_path)
                 async def analysis_gen():
                     yield analysis
-                return StreamingResponse(analysis_gen(), media_type='text/plain; charset=utf-8')
+                return _stream_response(analysis_gen(), render, protocol, bot_id=bot_id)
 
             else:
                 from src.conferencebot.bot import build_index as conf_build
-                msg = conf_build(paper_text or pdf_path, background=True)
+                msg = conf_build(paper_text or pdf_path, background=True, refresh=_form_flag(form, 'refresh'))
                 async def idx_gen():
                     yield msg
-                return StreamingResponse(idx_gen(), media_type='text/plain; charset=utf-8')
+                return _stream_response(idx_gen(), render, protocol, kind='progress', bot_id=bot_id)
         except Exception as e:
-            pass
+            logger.warning("Indexing %s for %s failed", paper_text and "text" or pdf_path, bot_id, exc_info=True)
+            record_error("build_index", e)
 
     # Attempt to use streaming generator from the bot module (if implemented)
     try:
-        if bot_id == 'conference':
+        if bot_id == 'conference' and questions:
+            # batch mode: answers stream in as they complete
+            from src.conferencebot.bot import conference_bot_batch_stream
+            return _stream_response(conference_bot_batch_stream(questions, source=paper_text or pdf_path), render, protocol, bot_id=bot_id)
+        elif bot_id == 'conference':
             from src.conferencebot.bot import conference_bot_stream
-            return StreamingResponse(conference_bot_stream(question or '', source=paper_text or pdf_path), media_type='text/plain; charset=utf-8')
+            return _stream_response(conference_bot_stream(question or '', source=paper_text or pdf_path), render, protocol, bot_id=bot_id)
+        elif bot_id == 'reviewer' and questions:
+            from src.paperReviewerBot.bot import paper_reviewer_batch_stream
+            return _stream_response(paper_reviewer_batch_stream(paper_text or pdf_path, questions), render, protocol, bot_id=bot_id)
         elif bot_id == 'reviewer':
             from src.paperReviewerBot.bot import paper_reviewer_rag_stream
-            return StreamingResponse(paper_reviewer_rag_stream(paper_text or pdf_path, question or ''), media_type='text/plain; charset=utf-8')
+            return _stream_response(paper_reviewer_rag_stream(paper_text or pdf_path, question or ''), render, protocol, bot_id=bot_id)
         elif bot_id == 'analyst':
             from src.Reseach_AnalysisBot.bot import Research_paper_analyst_stream
-            return StreamingResponse(Research_paper_analyst_stream(paper_text or pdf_path), media_type='text/plain; charset=utf-8')
-    except Exception:
-        pass
-
-    result, error = run_bot_logic(
-        bot_id,
-        bibtex=bibtex,
-        style=style,
-        question=question,
-        field=field,
-        topic=topic,
-        novelty=novelty,
-        target_venue=target_venue,
-        paper_text=paper_text,
-        pdf_path=pdf_path,
-        input_text=input_text,
-        population=population,
-        p=p,
-        d=d,
-        std_dev=std_dev,
-        predictors=predictors,
-        mode=mode,
-        iv_type=iv_type,
-        dv_type=dv_type,
-        groups=groups,
-        variables=variables,
-        culture=culture,
-        language=language,
-        scale=scale,
-        domain=domain
-    )
+            return _stream_response(Research_paper_analyst_stream(paper_text or pdf_path), render, protocol, bot_id=bot_id)
+        elif bot_id == 'writer' and input_text:
+            from src.paper_writerBot.agent import paper_writer_stream
+            return _stream_response(paper_writer_stream(input_text), render, protocol, bot_id=bot_id)
+    except Exception as e:
+        # fall back to the non-streaming bot below
+        logger.warning("Could not start %s stream", bot_id, exc_info=True)
+        record_error("stream", e)
 
-    # Post-process formatting for nicer UI output
-    try:
-        from src.utils.formatter import format_for_bot
-        if result:
-            result = format_for_bot(bot_id, result)
-    except Exception:
-        pass
+    # saved only now, so the early returns above leave no temp file behind
+    data_path = await _save_data_upload(form)
+
+    def run():
+        try:
+            result, error = run_bot_logic(
+                bot_id,
+                bibtex=bibtex,
+                style=style,
+                question=question,
+                questions=questions,
+                field=field,
+                topic=topic,
+                topics=topics,
+                novelty=novelty,
+                target_venue=target_venue,
+                paper_text=paper_text,
+                pdf_path=pdf_path,
+                input_text=input_text,
+                population=population,
+                p=p,
+                d=d,
+                std_dev=std_dev,
+                predictors=predictors,
+                effect_size=effect_size,
+                power=power,
+                df=df,
+                mode=mode,
+                iv_type=iv_type,
+                dv_type=dv_type,
+                groups=groups,
+                paired=paired,
+                distribution=distribution,
+                sample_n=sample_n,
+                multi_dv=multi_dv,
+                variables=variables,
+                culture=culture,
+                language=language,
+                targets=targets,
+                scale=scale,
+                n_ideas=n_ideas,
+                domain=domain,
+                data_path=data_path,
+                dv_column=dv_column
+            )
+        finally:
+            _discard_upload(data_path)
+
+        # Post-process formatting for nicer UI output
+        try:
+            from src.utils.formatter import format_for_bot
+            if result:
+                with span("format"):
+                    result = format_for_bot(bot_id, result)
+        except Exception:
+            logger.warning("Could not format %s output", bot_id, exc_info=True)
+        return result, error
+
+    if protocol in EVENT_PROTOCOLS:
+        # run in a worker thread so progress reaches the client before the result
+        async def event_gen():
+            yield 'progress', {'message': f'Running {bot_id}...'}
+            result, error = await asyncio.to_thread(run)
+            if error:
+                yield 'error', {'message': str(error)}
+                return
+            yield 'token', {'text': result or "(no result)"}
+        response = _event_response(event_gen(), render, protocol, bot_id=bot_id)
+        if response.status_code == 503:
+            # event_gen never runs, so run() cannot clean up
+            _discard_upload(data_path)
+        return response
+
+    # blocking model calls (batches included) must not stall other requests
+    result, error = await run_in_threadpool(run)
     if error:
         async def error_gen():
-            yield f"Error: {error}"
-        return StreamingResponse(error_gen(), media_type='text/plain; charset=utf-8')
+            yield str(error)
+        response = _stream_response(error_gen(), render, protocol, kind='error', bot_id=bot_id)
+        response.headers.update(trace.headers())
+        return response
 
     text = result or "(no result)"
 
     async def stream_gen():
+        if render == 'html':
+            # the renderer splits on block boundaries itself
+            yield text
+            return
         # Chunk at sentence boundaries for cleaner streaming
         from src.utils.formatter import chunk_text_for_stream
-        for chunk in chunk_text_for_stream(text, max_chars=240):
+        for chunk in chunk_text_for_stream(text, max_chars=240, clean=False):
             yield chunk
         # final newline to signal completion
         yield '\n'
-    return StreamingResponse(stream_gen(), media_type='text/plain; charset=utf-8')
+    # the whole run happened above, so the trace is complete (event protocols report it in metrics)
+    response = _stream_response(stream_gen(), render, protocol, bot_id=bot_id)
+    response.headers.update(trace.headers())
+    return response
+
+
+@app.get("/bot/{bot_id}/stream/{stream_id}")
+async def resume_stream(request: Request, bot_id: str, stream_id: str):
+    """Replay and follow a typed event stream, resuming after the Last-Event-ID header
+    (or ?last_event_id=) when given."""
+    if bot_id not in BOTS_BY_ID:
+        return _bot_not_found()
+    from src.utils.events import get_stream, parse_event_id, encode
+    log = get_stream(stream_id)
+    if log is None or log.bot_id != bot_id:
+        return JSONResponse({"error": "Unknown or expired stream"}, status_code=404)
+    last_id, seq = parse_event_id(request.headers.get('last-event-id') or request.query_params.get('last_event_id'))
+    protocol = _stream_protocol(request) or 'sse'
+    return StreamingResponse(
+        encode(log, protocol, after=seq if last_id == stream_id else -1),
+        media_type=EVENT_PROTOCOLS[protocol],
+        headers={'X-Stream-Id': log.id, 'Cache-Control': 'no-cache'},
+    )
+
+
+# Formatted citation responses keyed by the canonical request (bounded LRU); each
+# holds the ETag of its formatted output
+_CITATION_CACHE = OrderedDict()
+_CITATION_CACHE_SIZE = 256
+
+
+async def _format_citations(bibtex, styles, sort_by, dedupe):
+    """(etag, body) of a citation request; the ETag hashes the formatted output."""
+    canonical = json.dumps({"bibtex": bibtex, "styles": styles, "sort_by": sort_by, "dedupe": dedupe},
+                           sort_keys=True, ensure_ascii=False)
+    cached = _CITATION_CACHE.get(canonical)
+    if cached is not None:
+        _CITATION_CACHE.move_to_end(canonical)
+        return cached
+
+    from src.citrationmaker.citration import format_bibliography
+
+    def _format():
+        return [
+            {"id": entry_id, "style": style_name, "citation": citation}
+            for entry_id, style_name, citation in format_bibliography(bibtex, styles, sort_by=sort_by, dedupe=dedupe)
+        ]
+    # parsing a large .bib is CPU-bound; keep it off the event loop (ValueError means bad input)
+    results = await run_in_threadpool(_format)
+    body = {"count": len(results), "results": results}
+    etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest() + '"'
+    _CITATION_CACHE[canonical] = (etag, body)
+    if len(_CITATION_CACHE) > _CITATION_CACHE_SIZE:
+        _CITATION_CACHE.popitem(last=False)
+    return etag, body
+
+
+@app.get("/api/citation")
+async def citation_api_get(request: Request):
+    """Cacheable form of POST /api/citation for short bibliographies.
+
+    Query: bibtex, style (comma list, default APA), sort_by and dedupe (default on).
+    Send the ETag back in If-None-Match to get a 304.
+    """
+    params = request.query_params
+    bibtex = params.get("bibtex") or ""
+    styles = [x.strip() for x in (params.get("style") or params.get("styles") or "APA").split(",") if x.strip()]
+    dedupe = _form_flag(params, "dedupe") if "dedupe" in params else True
+    try:
+        etag, body = await _format_citations(bibtex, styles, params.get("sort_by"), dedupe)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+@app.post("/api/citation")
+async def citation_api(request: Request):
+    """Format many BibTeX entries in many styles in one JSON request.
+
+    Body: {"bibtex": "<whole .bib>"} or {"entries": ["@article{...}", ...]},
+    plus optional "styles" (default ["APA"]), "sort_by" and "dedupe" (a boolean).
+    The ETag identifies the formatted output. An If-None-Match that matches it
+    fails with 412, as for any unsafe method; use GET /api/citation for a 304.
+    """
+    try:
+        payload = await request.json()
+    except Exception:
+        return JSONResponse({"error": "Request body must be JSON"}, status_code=400)
+    if not isinstance(payload, dict):
+        return JSONResponse({"error": "Request body must be a JSON object"}, status_code=400)
+
+    entries = payload.get("entries") or []
+    if isinstance(entries, str):
+        entries = [entries]
+    styles = payload.get("styles") or [payload.get("style") or "APA"]
+    if isinstance(styles, str):
+        styles = [styles]
+    sort_by = payload.get("sort_by")
+    dedupe = payload.get("dedupe", True)
+    # anything else would fail inside the formatter with a 500
+    if not isinstance(entries, list) or not all(isinstance(e, str) for e in entries):
+        return JSONResponse({"error": "entries must be a string or a list of strings"}, status_code=400)
+    if not isinstance(styles, list) or not all(isinstance(s, str) for s in styles):
+        return JSONResponse({"error": "styles must be a string or a list of strings"}, status_code=400)
+    if sort_by is not None and not isinstance(sort_by, str):
+        return JSONResponse({"error": "sort_by must be a string"}, status_code=400)
+    # bool("false") would be True
+    if not isinstance(dedupe, bool):
+        return JSONResponse({"error": "dedupe must be true or false"}, status_code=400)
+    bibtex = payload.get("bibtex") or "\n\n".join(entries)
+    if not isinstance(bibtex, str):
+        return JSONResponse({"error": "bibtex must be a string"}, status_code=400)
+
+    try:
+        etag, body = await _format_citations(bibtex, styles, sort_by, dedupe)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    headers = {"ETag": etag}
+    if request.headers.get("if-none-match") in (etag, "*"):
+        return JSONResponse({"error": "Precondition failed: If-None-Match matches the current ETag"},
+                            status_code=412, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+@app.api_route("/api/sample_size/grid", methods=["GET", "POST"])
+async def sample_size_grid(request: Request):
+    """Export a sample size sensitivity table as CSV or JSON.
+
+    Parameters (query string or form): mode=prevalence|mean, format=csv|json,
+    confidence, and per mode p, d, population or std_dev, d. Each axis is a
+    comma list ("0.1,0.3") or an inclusive range ("0.05:0.5:0.05"). Invalid
+    values and grids past MAX_AXIS_POINTS / MAX_GRID_ROWS are answered with 400.
+    """
+    params = dict(request.query_params)
+    if request.method == "POST":
+        form = await request.form()
+        params.update({k: v for k, v in form.items() if isinstance(v, str)})
+
+    from src.sample_sizeBot.sample_size import parse_grid
+    from src.utils.chains import get_chain
+    bot = get_chain("sample_size")
+    mode = params.get("mode", "prevalence")
+    try:
+        confidence = parse_grid(params.get("confidence")) or [bot.confidence]
+        if mode == "prevalence":
+            table = bot.prevalence_grid(
+                p=parse_grid(params.get("p")) or [0.5],
+                d=parse_grid(params.get("d")) or [0.05],
+                population=parse_grid(params.get("population"), cast=int) or [None],
+                confidence=confidence,
+            )
+        elif mode == "mean":
+            table = bot.mean_estimation_grid(
+                std_dev=parse_grid(params.get("std_dev")) or [1.0],
+                d=parse_grid(params.get("d")) or [1.0],
+                confidence=confidence,
+            )
+        else:
+            return JSONResponse({"error": f"Unsupported mode: {mode}"}, status_code=400)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if params.get("format", "json").lower() == "csv":
+        return Response(
+            content=table.to_csv(index=False),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="sample_size_{mode}.csv"'},
+        )
+    return Response(content=table.to_json(orient="records"), media_type="application/json")
+
+
+@app.get('/metrics')
+async def metrics():
+    """Prometheus metrics: stage latency histograms, token, cache, error and request counters."""
+    return Response(content=METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.post('/render_markdown')
@@ -19,4 +19,27 @@ INSTRUCTIONS:
 
 OUTPUT FORMAT (STRICT):
 Variable-wise items with Likert scale labels.
-"""
\ No newline at end of file
+"""
+
+LOCALIZE_TEMPLATE = """
+TASK:
+Adapt an existing research questionnaire for a new language and culture.
+
+TARGET:
+- Language: {language}
+- Country / culture: {culture}
+- Target population: {population}
+- Measurement scale: {scale}-point Likert scale
+
+INSTRUCTIONS:
+1. Translate every item and the Likert scale labels into {language}.
+2. Keep the meaning of each item equivalent to the master version (conceptual, not literal, translation).
+3. Adapt examples, idioms and references so they are culturally appropriate for {culture}.
+4. Keep the same variables, item order and [REVERSE] markers.
+
+MASTER QUESTIONNAIRE:
+{master}
+
+OUTPUT FORMAT (STRICT):
+Variable-wise items with Likert scale labels, in {language}.
+"""
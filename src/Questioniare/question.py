@@ -1,42 +1,109 @@
-import os 
-import sys 
-from dotenv import load_dotenv,find_dotenv
-from langchain_groq import ChatGroq
-from langchain_community.document_loaders import TextLoader
-from langchain_community.vectorstores import Chroma,FAISS
+import contextvars
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 
-from .prompt import PROMPT_TEMPLATE
+from src.utils.chains import register, get_chain, get_llm
+from .prompt import PROMPT_TEMPLATE, LOCALIZE_TEMPLATE
+
+_FIELDS = ("variables", "population", "culture", "language", "scale", "domain")
+
+MAX_TARGETS = 10   # localised variants per request
+
+# Generation runs at temperature 0.0, so identical inputs give identical output
+_CACHE = OrderedDict()
+_CACHE_SIZE = 512
+_CACHE_LOCK = Lock()
+
+
+# Built once per process; the prompts read each variable from the input dict
+@register("questionaire")
+def _build_chain():
+    return ChatPromptTemplate.from_template(PROMPT_TEMPLATE) | get_llm(temperature=0.0)
+
+
+@register("questionaire_localize")
+def _build_localize_chain():
+    return ChatPromptTemplate.from_template(LOCALIZE_TEMPLATE) | get_llm(temperature=0.0)
+
+
+def _cached_invoke(chain_id, values):
+    key = (chain_id,) + tuple(sorted((k, str(v)) for k, v in values.items()))
+    with _CACHE_LOCK:
+        if key in _CACHE:
+            _CACHE.move_to_end(key)
+            return _CACHE[key]
+
+    response = get_chain(chain_id).invoke(values)
+    text = response.content if hasattr(response, 'content') else str(response)
+
+    with _CACHE_LOCK:
+        _CACHE[key] = text
+        if len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return text
 
 
 def generate_questionnaire(example_input: dict) -> str:
     """Generate questionnaire using the PROMPT_TEMPLATE and return text result."""
-    _ = load_dotenv(find_dotenv())  # read local .env file
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    os.environ["GROQ_API_KEY"] = GROQ_API_KEY
-
-    llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.0)
-
-    # Build prompt properly using from_template
-    prompt = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
-
-    # Build chain mapping prompt variables to passthroughs
-    chain = (
-        {
-            "variables": RunnablePassthrough(),
-            "population": RunnablePassthrough(),
-            "culture": RunnablePassthrough(),
-            "language": RunnablePassthrough(),
-            "scale": RunnablePassthrough(),
-            "domain": RunnablePassthrough()
-        }
-        | prompt
-        | llm
-    )
-
+    values = {k: example_input.get(k, "") for k in _FIELDS}
     try:
-        response = chain.invoke(example_input)
-        return response.content if hasattr(response, 'content') else str(response)
+        return _cached_invoke("questionaire", values)
     except Exception as e:
         return f"Invocation error: {e}"
+
+
+def parse_targets(text):
+    """Localisation targets from form input: one "Language | Culture" per line, culture optional.
+
+    Commas stay part of the value, so "Urdu | Pakistani, urban" is one target.
+    Raises ValueError past MAX_TARGETS.
+    """
+    targets = []
+    for line in (text or "").splitlines():
+        language, _, culture = line.partition("|")
+        if language.strip() or culture.strip():
+            targets.append({"language": language.strip(), "culture": culture.strip()})
+    if len(targets) > MAX_TARGETS:
+        raise ValueError(f"At most {MAX_TARGETS} localisation targets per request (got {len(targets)})")
+    return targets
+
+
+def generate_questionnaire_batch(example_input: dict, targets, max_concurrency: int = 4) -> dict:
+    """Generate the master questionnaire once, then localise it for every target concurrently.
+
+    targets is a list of {"language": ..., "culture": ...} dicts. Returns
+    {"master": text, "variants": [{"language", "culture", "text"}, ...]} in target order.
+    """
+    values = {k: example_input.get(k, "") for k in _FIELDS}
+    master = _cached_invoke("questionaire", values)
+
+    def localise(target):
+        local_values = {
+            "language": target.get("language") or values["language"],
+            "culture": target.get("culture") or values["culture"],
+            "population": values["population"],
+            "scale": values["scale"],
+            "master": master,
+        }
+        try:
+            text = _cached_invoke("questionaire_localize", local_values)
+        except Exception as e:
+            text = f"Invocation error: {e}"
+        return {"language": local_values["language"], "culture": local_values["culture"], "text": text}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(targets)))) as pool:
+        # copy the caller's context so LLM callbacks reach the request's trace
+        futures = [pool.submit(contextvars.copy_context().run, localise, t) for t in targets]
+        variants = [f.result() for f in futures]
+    return {"master": master, "variants": variants}
+
+
+def format_questionnaire_batch(result: dict) -> str:
+    parts = [f"# Master questionnaire\n\n{result['master']}"]
+    for v in result["variants"]:
+        parts.append(f"# {v['language']} ({v['culture']})\n\n{v['text']}")
+    return "\n\n".join(parts)
@@ -6,11 +6,15 @@ from dotenv import load_dotenv, find_dotenv
 
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS  # or Chroma
+from src.utils.chains import register, get_chain, get_llm
+from src.utils.formatter import stream_chunks
+from src.utils.tracing import logger, record_cache, span
+from src.utils.ocr import load_pdf
+from src.utils.embedcache import cached_embeddings
+from src.utils.embeddings import faiss_cache_dir, get_embeddings
 from .prompt import prompt
 
 
@@ -26,7 +30,7 @@ def _key_for_source(source: str):
 
 def build_index(input_data: str, background: bool = False):
     import hashlib
-    cache_root = Path('.cache/faiss')
+    cache_root = faiss_cache_dir()
     cache_root.mkdir(parents=True, exist_ok=True)
 
     key = _key_for_source(input_data)
@@ -34,34 +38,44 @@ def build_index(input_data: str, background: bool = False):
     cache_dir = cache_root / key_hash
 
     if key in _VECTORSTORE_CACHE:
+        record_cache("vectorstore", True)
         return f"Already indexed source: {key} (in-memory)"
+    record_cache("vectorstore", False)
 
     if cache_dir.exists():
         try:
-            embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-            vect = FAISS.load_local(str(cache_dir), embeddings)
+            with span("index_load"):
+                embeddings = get_embeddings()
+                # the directory is written by save_local below, so unpickling it is safe
+                vect = FAISS.load_local(str(cache_dir), embeddings, allow_dangerous_deserialization=True)
             _VECTORSTORE_CACHE[key] = vect
+            record_cache("faiss_disk", True)
             return f"Loaded index from disk for source: {key}"
         except Exception:
-            pass
+            logger.warning("Could not load index from %s, rebuilding", cache_dir, exc_info=True)
+    record_cache("faiss_disk", False)
 
     def _build_and_save():
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        if isinstance(input_data, str) and (input_data.strip().lower().endswith('.pdf') or input_data.strip().lower().startswith('http')):
-            loader = PyMuPDFLoader(input_data)
-            documents = loader.load()
-            texts = [d.page_content for d in documents]
-        else:
-            raw_text = input_data or ""
-            texts = text_splitter.split_text(raw_text)
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectordb = FAISS.from_texts(texts, embeddings)
-        try:
-            vectordb.save_local(str(cache_dir))
-        except Exception:
-            pass
-        _VECTORSTORE_CACHE[key] = vectordb
+        with span("build_index"):
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+            with span("parse"):
+                if isinstance(input_data, str) and (input_data.strip().lower().endswith('.pdf') or input_data.strip().lower().startswith('http')):
+                    # scanned pages are OCR'd (src/utils/ocr.py)
+                    documents = load_pdf(input_data)
+                    texts = [d.page_content for d in documents]
+                else:
+                    raw_text = input_data or ""
+                    texts = text_splitter.split_text(raw_text)
+
+            with span("embed"):
+                embeddings = get_embeddings()
+                vectordb = FAISS.from_texts(texts, cached_embeddings(embeddings))
+            try:
+                vectordb.save_local(str(cache_dir))
+            except Exception:
+                logger.warning("Could not save index to %s", cache_dir, exc_info=True)
+            _VECTORSTORE_CACHE[key] = vectordb
+            return len(texts)
 
     if background:
         import threading
@@ -69,93 +83,78 @@ def build_index(input_data: str, background: bool = False):
         t.start()
         return f"Indexing started in background for {key}"
 
-    _build_and_save()
-    return f"Indexed {len(texts)} chunks for {key} (saved to disk: {str(cache_dir)})"
+    n_chunks = _build_and_save()
+    return f"Indexed {n_chunks} chunks for {key} (saved to disk: {str(cache_dir)})"
 
-def Research_paper_analyst(path):
-    _ = load_dotenv(find_dotenv())  # read local .env file
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    os.environ["GROQ_API_KEY"] = GROQ_API_KEY
+ANALYSIS_QUESTION = "Explain the summary of the paper in detail."
 
-    # model define 
-    chat_model = ChatGroq(model="llama-3.3-70b-versatile")
 
+@register("analyst")
+def _build_chain():
+    # Retrieval depends on the document, so the chain takes ready-made context
+    return prompt | get_llm()
+
+
+def _retriever_for(path, cache=False):
     key = _key_for_source(path)
+    record_cache("vectorstore", key in _VECTORSTORE_CACHE)
     if key in _VECTORSTORE_CACHE:
         vectordb = _VECTORSTORE_CACHE[key]
     else:
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        if isinstance(path, str) and (path.strip().lower().endswith('.pdf') or path.strip().lower().startswith('http')):
-            loader = PyMuPDFLoader(path)
-            documents = loader.load()
-            texts = [d.page_content for d in documents]
-        else:
-            raw_text = path or ""
-            texts = text_splitter.split_text(raw_text)
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectordb = FAISS.from_texts(texts, embeddings)
-
-    retriever = vectordb.as_retriever(search_type="similarity", search_kwargs={"k":3})
-
-    chain   = (
-        {
-                "context": retriever,
-                "question": RunnablePassthrough()
-            }
-        | prompt
-        | chat_model
-    )
+        with span("build_index"):
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+            with span("parse"):
+                if isinstance(path, str) and (path.strip().lower().endswith('.pdf') or path.strip().lower().startswith('http')):
+                    # scanned pages are OCR'd (src/utils/ocr.py)
+                    documents = load_pdf(path)
+                    texts = [d.page_content for d in documents]
+                else:
+                    raw_text = path or ""
+                    texts = text_splitter.split_text(raw_text)
+
+            with span("embed"):
+                embeddings = get_embeddings()
+                vectordb = FAISS.from_texts(texts, cached_embeddings(embeddings))
+        if cache:
+            _VECTORSTORE_CACHE[key] = vectordb
+
+    return vectordb.as_retriever(search_type="similarity", search_kwargs={"k":3})
+
+
+def Research_paper_analyst(path):
+    chain = get_chain("analyst")
+    retriever = _retriever_for(path)
 
     # Run analysis prompt and return content
-    response = chain.invoke("Explain the summary of the paper in detail.")
+    with span("retrieval"):
+        context = retriever.invoke(ANALYSIS_QUESTION)
+    response = chain.invoke({"context": context, "question": ANALYSIS_QUESTION})
     return response.content if hasattr(response, 'content') else str(response)
 
 
 async def Research_paper_analyst_stream(path):
     """Async generator that yields analysis chunks as they are produced or simulated."""
-    key = _key_for_source(path)
-    if key in _VECTORSTORE_CACHE:
-        vectordb = _VECTORSTORE_CACHE[key]
-    else:
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        if isinstance(path, str) and (path.strip().lower().endswith('.pdf') or path.strip().lower().startswith('http')):
-            loader = PyMuPDFLoader(path)
-            documents = loader.load()
-            texts = [d.page_content for d in documents]
-        else:
-            raw_text = path or ""
-            texts = text_splitter.split_text(raw_text)
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectordb = FAISS.from_texts(texts, embeddings)
-        _VECTORSTORE_CACHE[key] = vectordb
-
-    retriever = vectordb.as_retriever(search_type="similarity", search_kwargs={"k":3})
-    chat_model = ChatGroq(model="llama-3.3-70b-versatile")
-
-    chain   = (
-        {
-                "context": retriever,
-                "question": RunnablePassthrough()
-            }
-        | prompt
-        | chat_model
-    )
+    retriever = _retriever_for(path, cache=True)
+    chain = get_chain("analyst")
+    with span("retrieval"):
+        context = retriever.invoke(ANALYSIS_QUESTION)
 
+    # Stream tokens from the model, re-chunked at sentence boundaries as they arrive
+    streamed = False
     try:
-        if hasattr(chat_model, 'stream'):
-            async for tok in chat_model.stream("Explain the summary of the paper in detail."):
-                yield tok
-            return
+        async for chunk in stream_chunks(chain.astream({"context": context, "question": ANALYSIS_QUESTION}), max_chars=80):
+            streamed = True
+            yield chunk
+        return
     except Exception:
-        pass
+        if streamed:
+            raise
 
-    result = chain.invoke("Explain the summary of the paper in detail.")
+    result = chain.invoke({"context": context, "question": ANALYSIS_QUESTION})
     text = result.content if hasattr(result, 'content') else str(result)
     from src.utils.formatter import format_for_bot, chunk_text_for_stream
     text = format_for_bot('analyst', text)
     import asyncio
-    for c in chunk_text_for_stream(text, max_chars=80):
+    for c in chunk_text_for_stream(text, max_chars=80, clean=False):
         yield c
-        await asyncio.sleep(0.03)
\ No newline at end of file
+        await asyncio.sleep(0.03)
@@ -0,0 +1,161 @@
+# data_profile.py
+# Single streaming pass over a CSV/Parquet file that infers variable types and
+# accumulates the sufficient statistics (moments, group moments, contingency
+# tables) needed to check test assumptions for every candidate variable pair.
+from itertools import combinations
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+
+MAX_LEVELS = 20          # more distinct values than this -> not a grouping variable
+MAX_NUMERIC_LEVELS = 10  # numeric columns with at most this many values are treated as categorical
+ALPHA = 0.05
+
+
+def iter_chunks(path, chunksize=100_000):
+    """
+    Yield DataFrame chunks from a CSV or Parquet file without loading it whole
+    """
+    if str(path).lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def _moment_frame(X):
+    # count and raw power sums of every numeric column, side by side
+    return pd.concat({"n": X.notna().astype(int), 1: X, 2: X ** 2, 3: X ** 3, 4: X ** 4}, axis=1)
+
+
+class DataProfile:
+    """
+    Streaming accumulator; call update() per chunk, then the summary methods
+    """
+
+    def __init__(self, max_levels=MAX_LEVELS):
+        self.max_levels = max_levels
+        self.rows = 0
+        self.numeric = None     # numeric column names (from the first chunk)
+        self.shift = None       # per-column shift for numerically stable moments
+        self.moments = None     # Series indexed by (power, column)
+        self.levels = {}        # candidate grouping column -> set of values
+        self.group_moments = {} # grouping column -> DataFrame (level x (power, column))
+        self.tables = {}        # (col_a, col_b) -> Series of joint counts
+
+    def update(self, chunk):
+        if self.numeric is None:
+            self.numeric = [c for c in chunk.columns
+                            if pd.api.types.is_numeric_dtype(chunk[c]) and not pd.api.types.is_bool_dtype(chunk[c])]
+            self.shift = chunk[self.numeric].mean().fillna(0.0)
+            self.levels = {c: set() for c in chunk.columns}
+        self.rows += len(chunk)
+
+        X = chunk[self.numeric].apply(pd.to_numeric, errors="coerce") - self.shift
+        frame = _moment_frame(X)
+        sums = frame.sum()
+        self.moments = sums if self.moments is None else self.moments.add(sums, fill_value=0)
+
+        # drop grouping candidates as soon as they have too many distinct values
+        for c in list(self.levels):
+            self.levels[c].update(chunk[c].dropna().unique().tolist())
+            if len(self.levels[c]) > self.max_levels:
+                del self.levels[c]
+                self.group_moments.pop(c, None)
+                for pair in [p for p in self.tables if c in p]:
+                    del self.tables[pair]
+
+        for c in self.levels:
+            g = frame.groupby(chunk[c]).sum()
+            prev = self.group_moments.get(c)
+            self.group_moments[c] = g if prev is None else prev.add(g, fill_value=0)
+
+        for a, b in combinations(self.levels, 2):
+            counts = chunk.groupby([a, b]).size()
+            prev = self.tables.get((a, b))
+            self.tables[(a, b)] = counts if prev is None else prev.add(counts, fill_value=0)
+
+    # -- variable types -------------------------------------------------
+    def constant(self):
+        """
+        Columns with fewer than two distinct values; they cannot group or vary, so are no candidates
+        """
+        return [c for c, values in self.levels.items() if len(values) < 2]
+
+    def categorical(self):
+        return [c for c, values in self.levels.items()
+                if len(values) >= 2 and (c not in self.numeric or len(values) <= MAX_NUMERIC_LEVELS)]
+
+    def continuous(self):
+        skip = set(self.categorical()) | set(self.constant())
+        return [c for c in self.numeric if c not in skip]
+
+    # -- assumption checks (vectorised over columns) ---------------------
+    @staticmethod
+    def _normality(m):
+        """
+        Jarque-Bera test from accumulated moments; m maps n, 1, 2, 3, 4 to arrays
+        """
+        n = m["n"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = m[1] / n
+            e2, e3, e4 = m[2] / n, m[3] / n, m[4] / n
+            c2 = e2 - mean ** 2
+            c3 = e3 - 3 * mean * e2 + 2 * mean ** 3
+            c4 = e4 - 4 * mean * e3 + 6 * mean ** 2 * e2 - 3 * mean ** 4
+            skew = c3 / c2 ** 1.5
+            kurt = c4 / c2 ** 2 - 3
+            jb = n / 6 * (skew ** 2 + kurt ** 2 / 4)
+        p = chi2.sf(jb, 2)
+        var = c2 * n / (n - 1)
+        return n, var, np.where(np.isfinite(p), p, np.nan)
+
+    def normality(self, columns):
+        m = self.moments.unstack(0).loc[columns]
+        n, _, p = self._normality({power: m[power].to_numpy(dtype=float) for power in ("n", 1, 2, 3, 4)})
+        return {c: {"n": int(n[j]), "p": float(p[j])} for j, c in enumerate(columns)}
+
+    def group_checks(self, group_col, dv_cols):
+        """
+        Per-group normality and Bartlett's homogeneity of variance for every DV at once
+        """
+        g = self.group_moments[group_col]
+        k = len(g)
+        out = {}
+        per_level = {power: g[power][dv_cols].to_numpy(dtype=float) for power in ("n", 1, 2, 3, 4)}
+        n, var, p_norm = self._normality(per_level)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            N = n.sum(axis=0)
+            pooled = ((n - 1) * var).sum(axis=0) / (N - k)
+            stat = ((N - k) * np.log(pooled) - ((n - 1) * np.log(var)).sum(axis=0)) / \
+                (1 + ((1 / (n - 1)).sum(axis=0) - 1 / (N - k)) / (3 * (k - 1)))
+            p_var = chi2.sf(stat, k - 1)
+        for j, dv in enumerate(dv_cols):
+            out[dv] = {
+                "groups": k,
+                "min_group_n": int(n[:, j].min()) if k else 0,
+                "normality_p": float(np.nanmin(p_norm[:, j])) if k else float("nan"),
+                "variance_p": float(p_var[j]),
+            }
+        return out
+
+    def expected_counts(self, a, b):
+        """
+        Cochran's rule: no expected count below 1 and at most 20% below 5
+        """
+        key = (a, b) if (a, b) in self.tables else (b, a)
+        table = self.tables[key].unstack(fill_value=0).to_numpy(dtype=float)
+        expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / table.sum()
+        return {
+            "min_expected": float(expected.min()),
+            "share_below_5": float((expected < 5).mean()),
+            "passed": bool(expected.min() >= 1 and (expected < 5).mean() <= 0.2),
+        }
+
+
+def profile_file(path, chunksize=100_000):
+    profile = DataProfile()
+    for chunk in iter_chunks(path, chunksize=chunksize):
+        profile.update(chunk)
+    return profile
@@ -1,48 +1,166 @@
 # statistical_test_selector_bot.py
+import json
+from functools import lru_cache
+from itertools import combinations, product
+from pathlib import Path
+from src.utils.chains import register
+
+RULES_PATH = Path(__file__).with_name("rules.json")
+SMALL_SAMPLE = 30
+
+
+def compile_rules(rules):
+    """
+    Expand a rule file into a table keyed by every combination of design
+    attributes. Each key maps to the ranked tests of all matching rules, in
+    rule order, so lookups are a single dict access.
+    """
+    attributes = rules["attributes"]
+    names = list(attributes)
+    table = {}
+    for key in product(*attributes.values()):
+        design = dict(zip(names, key))
+        ranked = []
+        for rule in rules["rules"]:
+            when = rule["when"]
+            if all(design[a] in (v if isinstance(v, list) else [v]) for a, v in when.items()):
+                ranked.extend(t for t in rule["tests"] if t not in ranked)
+        table[key] = tuple(ranked)
+    return names, table
+
+
+@lru_cache(maxsize=None)
+def load_rules(path=RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)
+    names, table = compile_rules(rules)
+    return names, table, rules["assumptions"]
+
 
 class StatisticalTestSelectorBot:
 
-    def select_test(self, iv_type, dv_type, groups=None):
+    def __init__(self, rules_path=RULES_PATH):
+        self.attributes, self.table, self.assumptions_map = load_rules(str(rules_path))
+
+    @staticmethod
+    def design_key(iv_type, dv_type, groups=None, paired=False, distribution="normal", sample_size=None, dvs=1,
+                   low_expected=False):
+        """
+        Map raw design inputs onto the rule file's attribute buckets.
+        low_expected marks a contingency table with expected cell counts below 5
+        """
+        return (
+            iv_type,
+            dv_type,
+            "2" if groups == 2 else "3+",
+            "yes" if paired else "no",
+            distribution or "normal",
+            "small" if sample_size is not None and sample_size < SMALL_SAMPLE else "large",
+            "2+" if dvs and dvs > 1 else "1",
+            "low" if low_expected else "ok",
+        )
+
+    def rank_tests(self, iv_type, dv_type, groups=None, paired=False, distribution="normal", sample_size=None, dvs=1,
+                   low_expected=False):
+        """
+        Ranked candidate tests with their assumptions for a study design
+        """
+        key = self.design_key(iv_type, dv_type, groups, paired, distribution, sample_size, dvs, low_expected)
+        return [{"test": t, "assumptions": self.assumptions(t)} for t in self.table.get(key, ())]
+
+    def select_test(self, iv_type, dv_type, groups=None, paired=False, distribution="normal", sample_size=None, dvs=1,
+                    low_expected=False):
         """
         iv_type: categorical / continuous
-        dv_type: categorical / continuous
+        dv_type: categorical / continuous / ordinal
         """
-        if iv_type == "categorical" and dv_type == "categorical":
-            return "Chi-square Test"
+        key = self.design_key(iv_type, dv_type, groups, paired, distribution, sample_size, dvs, low_expected)
+        ranked = self.table.get(key)
+        return ranked[0] if ranked else "Logistic Regression"
 
-        if iv_type == "categorical" and dv_type == "continuous":
-            return "Independent t-test" if groups == 2 else "ANOVA"
+    def assumptions(self, test):
+        return self.assumptions_map.get(test, [])
 
-        if iv_type == "continuous" and dv_type == "continuous":
-            return "Pearson Correlation"
+    def select_from_data(self, path, dv=None, iv=None, chunksize=100_000, alpha=0.05):
+        """
+        Infer variable types from a CSV/Parquet file (streamed in chunks) and
+        recommend a test with checked assumptions for every candidate IV/DV pair.
+        dv / iv restrict the pairs to the named columns.
+        """
+        from .data_profile import profile_file
 
-        return "Logistic Regression"
+        profile = profile_file(path, chunksize=chunksize)
+        categorical = profile.categorical()
+        continuous = profile.continuous()
+        kinds = {**{c: "categorical" for c in categorical}, **{c: "continuous" for c in continuous}}
 
-    def assumptions(self, test):
-        assumptions_map = {
-            "Chi-square Test": [
-                "Expected frequency > 5",
-                "Independence of observations"
-            ],
-            "Independent t-test": [
-                "Normality",
-                "Homogeneity of variance"
-            ],
-            "ANOVA": [
-                "Normality",
-                "Equal variances",
-                "Independent samples"
-            ],
-            "Pearson Correlation": [
-                "Linearity",
-                "Normality"
-            ],
-            "Logistic Regression": [
-                "Binary outcome",
-                "No multicollinearity"
-            ]
+        if dv or iv:
+            ivs = [iv] if iv else list(kinds)
+            dvs = [dv] if dv else list(kinds)
+            pairs = [(a, b) for a in ivs for b in dvs if a != b and a in kinds and b in kinds]
+        else:
+            # each unordered pair once, with the grouping variable as IV
+            pairs = [(b, a) if kinds[a] == "continuous" and kinds[b] == "categorical" else (a, b)
+                     for a, b in combinations(kinds, 2)]
+
+        normal = profile.normality(continuous) if continuous else {}
+        group_stats = {
+            g: profile.group_checks(g, [b for a, b in pairs if a == g and kinds[b] == "continuous"])
+            for g in {a for a, b in pairs if kinds[a] == "categorical" and kinds[b] == "continuous"}
         }
-        return assumptions_map.get(test, [])
+
+        results = []
+        for a, b in pairs:
+            checks = {}
+            groups = None
+            sample_size = profile.rows
+            low_expected = False
+            if kinds[a] == "categorical" and kinds[b] == "continuous":
+                stats = group_stats[a][b]
+                groups = stats["groups"]
+                sample_size = stats["min_group_n"]
+                checks["Normality"] = stats["normality_p"] >= alpha
+                checks["Homogeneity of variance"] = stats["variance_p"] >= alpha
+            elif kinds[a] == "categorical" and kinds[b] == "categorical":
+                groups = len(profile.levels[a])
+                checks["Expected frequency > 5"] = profile.expected_counts(a, b)["passed"]
+                low_expected = not checks["Expected frequency > 5"]
+            elif kinds[a] == "continuous" and kinds[b] == "continuous":
+                checks["Normality"] = normal[a]["p"] >= alpha and normal[b]["p"] >= alpha
+            else:
+                checks["Binary outcome"] = len(profile.levels.get(b, ())) == 2
+
+            distribution = "non-normal" if checks.get("Normality") is False else "normal"
+            ranked = self.rank_tests(iv_type=kinds[a], dv_type=kinds[b], groups=groups,
+                                     distribution=distribution, sample_size=sample_size, low_expected=low_expected)
+            results.append({
+                "iv": a,
+                "dv": b,
+                "test": ranked[0]["test"],
+                "assumptions": ranked[0]["assumptions"],
+                "alternatives": [r["test"] for r in ranked[1:]],
+                "checks": checks,
+            })
+        return {"rows": profile.rows, "categorical": categorical, "continuous": continuous, "pairs": results}
+
+    def format_data_report(self, report):
+        lines = [
+            f"Rows: {report['rows']}",
+            f"Categorical: {', '.join(report['categorical']) or '-'}",
+            f"Continuous: {', '.join(report['continuous']) or '-'}",
+            "",
+        ]
+        for r in report["pairs"]:
+            lines.append(f"{r['iv']} -> {r['dv']}: {r['test']}")
+            if r.get("alternatives"):
+                lines.append(f"  alternatives: {', '.join(r['alternatives'])}")
+            for name, passed in r["checks"].items():
+                lines.append(f"  - {name}: {'OK' if passed else 'VIOLATED'}")
+        return "\n".join(lines)
+
+@register("statistical")
+def _build_bot():
+    return StatisticalTestSelectorBot()
 
 if __name__ == "__main__":
     bot = StatisticalTestSelectorBot()
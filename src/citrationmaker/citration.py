@@ -1,71 +1,206 @@
+import sys
+import time
+from functools import lru_cache
+from string import Formatter
 import bibtexparser
+from src.utils.chains import register
 # 1. Load a single BibTeX entry
 def load_bibtex_entry(bibtex_str):
     return bibtexparser.loads(bibtex_str).entries[0]
-# 2. Helper to format authors
-def format_authors(authors_raw):
+
+# Load every entry of a .bib string or file in one parse
+def load_bibtex_entries(bibtex_input):
+    if hasattr(bibtex_input, "read"):
+        return bibtexparser.load(bibtex_input).entries
+    return bibtexparser.loads(bibtex_input).entries
+
+# Where the work was published, for any entry type (article, inproceedings, book, thesis, ...)
+def venue(e):
+    for field in ("journal", "booktitle", "publisher", "school", "institution", "howpublished"):
+        if e.get(field):
+            return e[field]
+    return None
+# 2. Helper to format authors (memoized: the same names recur across a bibliography)
+@lru_cache(maxsize=65536)
+def _format_name(a):
+    if "," in a:  # Already "Last, First"
+        last, first = a.split(",", 1)
+        return f"{first.strip()} {last.strip()}"
+    parts = a.split()
+    return f"{parts[-1]}, {' '.join(parts[:-1])}"
+
+@lru_cache(maxsize=65536)
+def _split_authors(authors_raw):
     if not authors_raw:
-        return ["Unknown"]
-    authors = [a.strip() for a in authors_raw.replace("\n", " ").split(" and ")]
-    final = []
-    for a in authors:
-        if "," in a:  # Already "Last, First"
-            last, first = a.split(",", 1)
-            final.append(f"{first.strip()} {last.strip()}")
-        else:
-            parts = a.split()
-            final.append(f"{parts[-1]}, {' '.join(parts[:-1])}")
-    return final
-# 3. STYLE FUNCTIONS
-def apa(e):
-    authors = format_authors(e.get("author", ""))
-    if len(authors) > 1:
-        a = ", ".join(authors[:-1]) + ", & " + authors[-1]
-    else:
-        a = authors[0]
-    return f"{a} ({e.get('year')}). {e.get('title')}. {e.get('journal')}, {e.get('volume')}({e.get('number')}), {e.get('pages')}."
-
-def mla(e):
-    authors = format_authors(e.get("author", ""))
-    a = authors[0] + (" et al." if len(authors) > 1 else "")
-    return f"{a}. \"{e.get('title')}\". {e.get('journal')}, vol. {e.get('volume')}, no. {e.get('number')}, {e.get('year')}, pp. {e.get('pages')}."
-def mla(e):
-    authors = format_authors(e.get("author", ""))
-    a = authors[0] + (" et al." if len(authors) > 1 else "")
-    return f"{a}. \"{e.get('title')}\". {e.get('journal')}, vol. {e.get('volume')}, no. {e.get('number')}, {e.get('year')}, pp. {e.get('pages')}."
-
-def ieee(e):
-    authors = ", ".join(format_authors(e.get("author", "")))
-    return f"{authors}, \"{e.get('title')},\" {e.get('journal')}, vol. {e.get('volume')}, no. {e.get('number')}, pp. {e.get('pages')}, {e.get('year')}."
-
-def chicago(e):
-    authors = ", ".join(format_authors(e.get("author", "")))
-    return f"{authors}. \"{e.get('title')}\". {e.get('journal')} {e.get('volume')}, no. {e.get('number')} ({e.get('year')}): {e.get('pages')}."
-
-def harvard(e):
-    authors = "; ".join(format_authors(e.get("author", "")))
-    return f"{authors} ({e.get('year')}) {e.get('title')}. {e.get('journal')}, {e.get('volume')}({e.get('number')}), pp. {e.get('pages')}."
-
-def vancouver(e):
-    authors = ", ".join(format_authors(e.get("author", "")))
-    return f"{authors}. {e.get('title')}. {e.get('journal')}. {e.get('year')};{e.get('volume')}({e.get('number')}):{e.get('pages')}."
+        return ("Unknown",)
+    return tuple(_format_name(a.strip()) for a in authors_raw.replace("\n", " ").split(" and "))
+
+def format_authors(authors_raw):
+    return list(_split_authors(authors_raw))
+
+@lru_cache(maxsize=65536)
+def _join_authors(authors_raw, sep, last_sep, max_names, et_al):
+    authors = _split_authors(authors_raw)
+    if max_names and len(authors) > max_names:
+        return sep.join(authors[:max_names]) + et_al
+    if last_sep and len(authors) > 1:
+        return sep.join(authors[:-1]) + last_sep + authors[-1]
+    return sep.join(authors)
+
+# 3. STYLE DEFINITIONS
+# Each style lists its author formatting and an ordered list of pieces. A piece
+# is only rendered when every field it references is present, so entries
+# without volume/number/pages (books, proceedings, theses) stay readable.
+STYLES = {
+    "APA": {
+        "authors": {"sep": ", ", "last_sep": ", & "},
+        "pieces": ["{authors}", " ({year})", ". {title}", ". {venue}", ", {volume}", "({number})", ", {pages}", "."],
+    },
+    "MLA": {
+        "authors": {"max_names": 1, "et_al": " et al."},
+        "pieces": ["{authors}.", ' "{title}".', " {venue}", ", vol. {volume}", ", no. {number}", ", {year}", ", pp. {pages}", "."],
+    },
+    "IEEE": {
+        "authors": {"sep": ", "},
+        "pieces": ["{authors}", ', "{title},"', " {venue}", ", vol. {volume}", ", no. {number}", ", pp. {pages}", ", {year}", "."],
+    },
+    "Chicago": {
+        "authors": {"sep": ", "},
+        "pieces": ["{authors}.", ' "{title}".', " {venue}", " {volume}", ", no. {number}", " ({year})", ": {pages}", "."],
+    },
+    "Harvard": {
+        "authors": {"sep": "; "},
+        "pieces": ["{authors}", " ({year})", " {title}.", " {venue}", ", {volume}", "({number})", ", pp. {pages}", "."],
+    },
+    "Vancouver": {
+        "authors": {"sep": ", "},
+        "pieces": ["{authors}.", " {title}.", " {venue}.", " {year}", ";{volume}", "({number})", ":{pages}", "."],
+    },
+}
+
+def compile_style(spec):
+    """
+    Compile a style definition into a formatter taking a parsed BibTeX entry
+    """
+    author_opts = spec.get("authors", {})
+    sep = author_opts.get("sep", ", ")
+    last_sep = author_opts.get("last_sep")
+    max_names = author_opts.get("max_names")
+    et_al = author_opts.get("et_al", "")
+
+    pieces = []
+    fields = set()
+    for template in spec["pieces"]:
+        names = tuple(name for _, name, _, _ in Formatter().parse(template) if name)
+        pieces.append((template.format_map, names))
+        fields.update(names)
+    entry_fields = tuple(fields - {"authors", "venue"})
+
+    def style_fn(e):
+        values = {f: e.get(f) for f in entry_fields}
+        values["authors"] = _join_authors(e.get("author", ""), sep, last_sep, max_names, et_al)
+        values["venue"] = venue(e)
+        return "".join(
+            render(values) for render, names in pieces
+            if all(values[n] for n in names)
+        )
+
+    return style_fn
 
 # 4. MAIN FUNCTION (Your Bot Uses This)
+STYLE_MAP = {name: compile_style(spec) for name, spec in STYLES.items()}
+
+apa = STYLE_MAP["APA"]
+mla = STYLE_MAP["MLA"]
+ieee = STYLE_MAP["IEEE"]
+chicago = STYLE_MAP["Chicago"]
+harvard = STYLE_MAP["Harvard"]
+vancouver = STYLE_MAP["Vancouver"]
+
+@register("citation")
+def _build_styles():
+    return STYLE_MAP
+
+# Case-insensitive lookup ("apa", "CHICAGO", ...)
+_STYLE_NAMES = {name.lower(): name for name in STYLE_MAP}
+
+def resolve_style(style_name):
+    if not isinstance(style_name, str):
+        return None
+    return _STYLE_NAMES.get(style_name.strip().lower())
+
 def convert_bibtex_to_style(bibtex_input, style_name):
     entry = load_bibtex_entry(bibtex_input)
-    
-    style_map = {
-        "APA": apa,
-        "MLA": mla,
-        "IEEE": ieee,
-        "Chicago": chicago,
-        "Harvard": harvard,
-        "Vancouver": vancouver
-    }
-    
-    style_fn = style_map.get(style_name)
+
+    style_fn = STYLE_MAP.get(resolve_style(style_name))
     if not style_fn:
         return f"❌ Error: '{style_name}' is not supported."
     
     return style_fn(entry)
 
+# 5. BULK MODE (whole .bib files)
+def _sort_key(field):
+    def key(e):
+        value = e.get(field) or ""
+        if field == "author":
+            value = format_authors(value)[0]
+        return value.lower()
+    return key
+
+def dedupe_entries(entries):
+    """
+    Drop repeated entries, matching on citation key or on (title, year)
+    """
+    seen = set()
+    unique = []
+    for e in entries:
+        title = " ".join((e.get("title") or "").lower().strip("{} ").split())
+        keys = [("id", e.get("ID"))] if e.get("ID") else []
+        if title:
+            keys.append(("title", title, e.get("year")))
+        if any(k in seen for k in keys):
+            continue
+        seen.update(keys)
+        unique.append(e)
+    return unique
+
+def format_bibliography(bibtex_input, styles=("APA",), sort_by=None, dedupe=True):
+    """
+    Parse a whole bibliography once and yield (entry_id, style, citation) for
+    every entry in every requested style. bibtex_input is a .bib string or an
+    open file. sort_by is one of "author", "year", "title", "ID" or None.
+    """
+    unknown = [s for s in styles if not resolve_style(s)]
+    if unknown:
+        raise ValueError(f"Unsupported style(s): {', '.join(map(str, unknown))}")
+    styles = [resolve_style(s) for s in styles]
+
+    entries = load_bibtex_entries(bibtex_input)
+    if dedupe:
+        entries = dedupe_entries(entries)
+    if sort_by:
+        entries = sorted(entries, key=_sort_key(sort_by))
+
+    style_fns = [(s, STYLE_MAP[s]) for s in styles]
+    for e in entries:
+        for style_name, style_fn in style_fns:
+            yield e.get("ID"), style_name, style_fn(e)
+
+
+if __name__ == "__main__":
+    # python -m src.citrationmaker.citration refs.bib APA,IEEE [sort_by]
+    path = sys.argv[1]
+    styles = sys.argv[2].split(",") if len(sys.argv) > 2 else ["APA"]
+    sort_by = sys.argv[3] if len(sys.argv) > 3 else None
+
+    start = time.perf_counter()
+    count = 0
+    with open(path, encoding="utf-8") as f:
+        for entry_id, style_name, citation in format_bibliography(f, styles, sort_by=sort_by):
+            count += 1
+            print(f"[{style_name}] {citation}")
+    elapsed = time.perf_counter() - start
+    entries = count // len(styles)
+    print(f"{entries} entries x {len(styles)} styles in {elapsed:.2f}s "
+          f"({entries / elapsed:.0f} entries/s)", file=sys.stderr)
+
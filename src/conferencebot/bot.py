@@ -1,19 +1,35 @@
+import asyncio
 import sys
 import os 
+import time
 from pathlib import Path
 from dotenv import load_dotenv,find_dotenv
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.document_loaders import TextLoader,WebBaseLoader,UnstructuredURLLoader
+from langchain_core.documents import Document
 from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_core.runnables import RunnablePassthrough
+from src.utils.batch import MAX_CONCURRENCY, answer_as_completed, answer_in_order, format_answer, search_many
+from src.utils.chains import register, get_chain, get_llm
+from src.utils.formatter import format_stream, stream_chunks
+from src.utils.tracing import logger, record_cache, span
+from src.utils.ocr import load_pdf
+from src.utils.embedcache import cached_embeddings
+from src.utils.embeddings import faiss_cache_dir, get_embeddings
+from .crawler import crawl_site
 from .promt import prompt
 
 # Module-level cache for vectorstores keyed by source
 _VECTORSTORE_CACHE = {}
+# Chunks retrieved per question (the retriever default)
+RETRIEVE_K = 4
+# Seconds before a site index is re-crawled on next use (0 disables); PDFs and raw text never expire
+SITE_INDEX_TTL = float(os.getenv("CONFERENCE_SITE_TTL", str(24 * 3600)))
+DEFAULT_SOURCE = "https://aziz-ashfak.github.io/profile/"
+# When each in-memory index was built or written to disk
+_INDEXED_AT = {}
 
 # Convert Documents → string
 def format_docs(docs):
@@ -26,12 +42,36 @@ def _key_for_source(source: str):
     return source
 
 
-def build_index(source: str = None, background: bool = False):
+def _expired(source, built_at):
+    """True once a crawled site's index is older than SITE_INDEX_TTL."""
+    is_site = (source or DEFAULT_SOURCE).strip().lower().startswith('http')
+    return is_site and SITE_INDEX_TTL > 0 and time.time() - built_at > SITE_INDEX_TTL
+
+
+def _site_texts(url):
+    """Chunks of every crawled page of a conference site (CFP, dates, committees, venue ...).
+
+    Pages are fetched conditionally against .cache/http (src/conferencebot/crawler.py)
+    and split per page, so an unchanged page yields the same chunks and their
+    cached embeddings.
+    """
+    pages = crawl_site(url)
+    docs = [Document(page_content=f"{p['title']}\n{p['text']}" if p["title"] else p["text"],
+                     metadata={"source": p["url"]})
+            for p in pages if p["text"]]
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+    return [doc.page_content for doc in text_splitter.split_documents(docs)]
+
+
+def build_index(source: str = None, background: bool = False, refresh: bool = False):
     """Build and cache a vectorstore for the given source (URL, local PDF path, or raw text).
     If background=True the indexing will run in a background thread and return immediately.
+    refresh=True ignores cached indexes and rebuilds; for a site only changed pages are
+    re-fetched and re-embedded. A site index older than SITE_INDEX_TTL is refreshed the
+    same way.
     """
     import hashlib
-    cache_root = Path('.cache/faiss')
+    cache_root = faiss_cache_dir()
     cache_root.mkdir(parents=True, exist_ok=True)
 
     key = _key_for_source(source)
@@ -39,52 +79,55 @@ def build_index(source: str = None, background: bool = False):
     cache_dir = cache_root / key_hash
 
     # If in-memory cache exists, return immediately
-    if key in _VECTORSTORE_CACHE:
+    if key in _VECTORSTORE_CACHE and not refresh and not _expired(source, _INDEXED_AT.get(key, 0)):
+        record_cache("vectorstore", True)
         return f"Already indexed source: {key} (in-memory)"
+    record_cache("vectorstore", False)
 
     # If on-disk cache exists, load it quickly into memory
-    if cache_dir.exists():
+    index_file = cache_dir / "index.faiss"
+    if index_file.exists() and not refresh and not _expired(source, index_file.stat().st_mtime):
         try:
-            embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-            vect = FAISS.load_local(str(cache_dir), embeddings)
+            with span("index_load"):
+                embeddings = get_embeddings()
+                # the directory is written by save_local below, so unpickling it is safe
+                vect = FAISS.load_local(str(cache_dir), embeddings, allow_dangerous_deserialization=True)
             _VECTORSTORE_CACHE[key] = vect
+            _INDEXED_AT[key] = index_file.stat().st_mtime
+            record_cache("faiss_disk", True)
             return f"Loaded index from disk for source: {key}"
         except Exception:
             # fallback to rebuilding if loading fails
-            pass
+            logger.warning("Could not load index from %s, rebuilding", cache_dir, exc_info=True)
+    record_cache("faiss_disk", False)
 
     def _build_and_save():
-        # Build texts list
-        if source and source.strip().lower().endswith('.pdf'):
-            loader = PyMuPDFLoader(source)
-            documents = loader.load()
-            texts = [d.page_content for d in documents]
-        elif source and source.strip().lower().startswith('http'):
-            loader = UnstructuredURLLoader(urls=[source])
-            data = loader.load()
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-            docs = text_splitter.split_documents(data)
-            texts = [doc.page_content for doc in docs]
-        else:
-            raw = source or "https://aziz-ashfak.github.io/profile/"
-            if raw.startswith('http'):
-                loader = UnstructuredURLLoader(urls=[raw])
-                data = loader.load()
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-                docs = text_splitter.split_documents(data)
-                texts = [doc.page_content for doc in docs]
-            else:
-                text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-                texts = text_splitter.split_text(raw)
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vect = FAISS.from_texts(texts, embeddings)
-        try:
-            vect.save_local(str(cache_dir))
-        except Exception:
-            # ignore save errors
-            pass
-        _VECTORSTORE_CACHE[key] = vect
+        with span("build_index"):
+            # Build texts list
+            with span("parse"):
+                if source and source.strip().lower().endswith('.pdf'):
+                    # scanned pages are OCR'd (src/utils/ocr.py)
+                    documents = load_pdf(source)
+                    texts = [d.page_content for d in documents]
+                elif source and source.strip().lower().startswith('http'):
+                    texts = _site_texts(source.strip())
+                else:
+                    raw = source or DEFAULT_SOURCE
+                    if raw.startswith('http'):
+                        texts = _site_texts(raw)
+                    else:
+                        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+                        texts = text_splitter.split_text(raw)
+
+            with span("embed"):
+                embeddings = get_embeddings()
+                vect = FAISS.from_texts(texts, cached_embeddings(embeddings))
+            try:
+                vect.save_local(str(cache_dir))
+            except Exception:
+                logger.warning("Could not save index to %s", cache_dir, exc_info=True)
+            _VECTORSTORE_CACHE[key] = vect
+            _INDEXED_AT[key] = time.time()
 
     if background:
         import threading
@@ -96,79 +139,88 @@ def build_index(source: str = None, background: bool = False):
     _build_and_save()
     return f"Indexed {key} (saved to disk: {str(cache_dir)})"
 
-def conference_bot(question, source: str = None):
-    _ = load_dotenv(find_dotenv())  # read local .env file
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    os.environ["GROQ_API_KEY"] = GROQ_API_KEY
+@register("conference")
+def _build_chain():
+    # Retrieval depends on the source, so the chain takes ready-made context
+    return prompt | get_llm(temperature=0.9)
 
-    llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.9)
 
+def _vectorstore_for(source):
     key = _key_for_source(source)
-    if key not in _VECTORSTORE_CACHE:
-        # build index for default or given source
+    if key not in _VECTORSTORE_CACHE or _expired(source, _INDEXED_AT.get(key, 0)):
+        # build (or re-crawl) the index for default or given source (records the cache miss)
         build_index(source)
+    else:
+        record_cache("vectorstore", True)
+    return _VECTORSTORE_CACHE[key]
+
 
-    vectorstore = _VECTORSTORE_CACHE[key]
-    retrive = vectorstore.as_retriever()
-
-    # # Chain
-    chain = (
-        {
-            "context": retrive | format_docs,
-            "question": RunnablePassthrough() 
-        }
-        | prompt
-        | llm
-    )
+def _context_for(question, source):
+    retrive = _vectorstore_for(source).as_retriever(search_kwargs={"k": RETRIEVE_K})
+    with span("retrieval"):
+        return format_docs(retrive.invoke(question))
+
+
+def conference_bot(question, source: str = None):
+    chain = get_chain("conference")
+    context = _context_for(question, source)
     # Return the resulting content so callers can display it
-    return chain.invoke(question).content
+    return chain.invoke({"context": context, "question": question}).content
 
 
 async def conference_bot_stream(question, source: str = None):
     """Async generator that yields partial outputs for the conference bot.
     It will yield sentence chunks with small delays to simulate streaming if the LLM does not support streaming directly.
     """
-    # Build or reuse index
-    key = _key_for_source(source)
-    if key not in _VECTORSTORE_CACHE:
-        build_index(source)
-
-    vectorstore = _VECTORSTORE_CACHE[key]
-    retrive = vectorstore.as_retriever()
+    chain = get_chain("conference")
+    # indexing (possibly a crawl) and retrieval are blocking; keep them off the event loop
+    context = await asyncio.to_thread(_context_for, question, source)
 
-    llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.9)
-    chain = (
-        {
-            "context": retrive | format_docs,
-            "question": RunnablePassthrough()
-        }
-        | prompt
-        | llm
-    )
-
-    # Try to call streaming-capable API if available, else fall back to full invoke and chunk
+    # Stream tokens from the model, re-chunked at sentence boundaries as they arrive and
+    # formatted like the non-streamed answer (format_for_bot); fall back to full invoke and chunk if streaming fails before any output
+    streamed = False
     try:
-        # If the llm supports a streaming 'stream' or 'invoke_stream' method, use it
-        if hasattr(llm, 'stream'):
-            async for token in llm.stream(question):
-                yield token
-            return
-        if hasattr(llm, 'invoke_stream'):
-            async for chunk in llm.invoke_stream(question):
-                yield chunk
-            return
+        tokens = chain.astream({"context": context, "question": question})
+        async for chunk in format_stream('conference', stream_chunks(tokens, max_chars=60)):
+            streamed = True
+            yield chunk
+        return
     except Exception:
-        # ignore and fallback
-        pass
+        if streamed:
+            raise
 
     # Fallback: full generation then chunk
-    result = chain.invoke(question)
+    result = chain.invoke({"context": context, "question": question})
     text = result.content if hasattr(result, 'content') else str(result)
 
     from src.utils.formatter import format_for_bot, chunk_text_for_stream
     text = format_for_bot('conference', text)
-    import asyncio
-    for chunk in chunk_text_for_stream(text, max_chars=60):
+    for chunk in chunk_text_for_stream(text, max_chars=60, clean=False):
         yield chunk
         await asyncio.sleep(0.03)
 
+
+
+def conference_bot_batch(questions, source: str = None, max_concurrency=MAX_CONCURRENCY):
+    """Answer several questions about one conference source in a single pass.
+
+    One embedding batch and one FAISS search cover all questions; model calls run
+    concurrently under the shared Groq rate limiter (src/utils/batch.py). Returns
+    one dict per question (index, question, answer, error, latency) in input order.
+    """
+    chain = get_chain("conference")
+    contexts = [format_docs(docs) for docs in search_many(_vectorstore_for(source), questions, k=RETRIEVE_K)]
+    return answer_in_order(chain, questions, contexts, max_concurrency=max_concurrency)
+
+
+async def conference_bot_batch_stream(questions, source: str = None, max_concurrency=MAX_CONCURRENCY):
+    """Async generator yielding each answer as a markdown section as soon as it completes."""
+    chain = get_chain("conference")
+    # indexing (possibly a crawl) and the FAISS search are blocking; keep them off the event loop
+    vectorstore = await asyncio.to_thread(_vectorstore_for, source)
+    docs = await asyncio.to_thread(search_many, vectorstore, questions, RETRIEVE_K)
+    contexts = [format_docs(d) for d in docs]
+    first = True
+    async for result in answer_as_completed(chain, questions, contexts, max_concurrency=max_concurrency):
+        yield ("" if first else "\n\n") + format_answer(result)
+        first = False
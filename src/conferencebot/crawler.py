@@ -0,0 +1,274 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import httpx
+
+from src.utils.tracing import METRICS, logger, record_cache, span
+
+HTTP_CACHE_DIR = Path(".cache/http")
+MAX_PAGES = 30
+MAX_DEPTH = 2
+CONCURRENCY = 4
+TIMEOUT = 15.0
+MAX_BYTES = 2 * 2**20
+USER_AGENT = "ConferenceBot/1.0 (+conference profile indexer)"
+
+# Links to these are never pages worth indexing
+SKIP_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".css", ".js", ".zip",
+                   ".gz", ".tar", ".mp4", ".mp3", ".woff", ".woff2", ".ttf", ".ics", ".bib")
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+_BLOCK_TAGS = {"p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article", "header",
+               "footer", "h1", "h2", "h3", "h4", "h5", "h6", "dt", "dd", "blockquote", "pre"}
+
+
+class _PageParser(HTMLParser):
+    """Visible text, <title> and <a href> links of an HTML page (stdlib parser, no bs4)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self.links: List[str] = []
+        self.base: Optional[str] = None
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+        elif tag == "base" and self.base is None:
+            self.base = dict(attrs).get("href")
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._in_title:
+            self.title += data
+        else:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def parse_page(body: str, url: str, content_type: str = "text/html") -> dict:
+    """Text, title and absolute links (fragments dropped) of a fetched page."""
+    if "html" not in content_type:
+        return {"title": "", "text": body.strip(), "links": []}
+    parser = _PageParser()
+    parser.feed(body)
+    parser.close()
+    base = urljoin(url, parser.base) if parser.base else url
+    links = []
+    for href in parser.links:
+        link = urldefrag(urljoin(base, href.strip()))[0]
+        if link not in links:
+            links.append(link)
+    return {"title": " ".join(parser.title.split()), "text": parser.text(), "links": links}
+
+
+def _site(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _scope(start_url: str) -> str:
+    """Path prefix pages must share with the start URL (its directory)."""
+    path = urlsplit(start_url).path or "/"
+    return path[:path.rfind("/") + 1]
+
+
+def in_scope(link: str, start_url: str) -> bool:
+    parts = urlsplit(link)
+    return (parts.scheme in ("http", "https")
+            and _site(link) == _site(start_url)
+            and (parts.path or "/").startswith(_scope(start_url))
+            and not parts.path.lower().endswith(SKIP_EXTENSIONS))
+
+
+class HttpCache:
+    """Validators (ETag / Last-Modified) and the parsed page per URL, one JSON file each."""
+
+    def __init__(self, cache_dir: Path = HTTP_CACHE_DIR):
+        self.dir = Path(cache_dir)
+
+    def _file(self, url: str) -> Path:
+        return self.dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[dict]:
+        path = self._file(url)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable HTTP cache entry %s", path, exc_info=True)
+            return None
+
+    def put(self, url: str, entry: dict):
+        path = self._file(url)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entry), encoding="utf-8")
+            tmp.replace(path)
+        except OSError:
+            logger.warning("Could not write HTTP cache entry %s", path, exc_info=True)
+
+
+def _conditional_headers(entry: Optional[dict]) -> Dict[str, str]:
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+async def fetch(client: httpx.AsyncClient, url: str, cache: HttpCache) -> Optional[dict]:
+    """Conditional GET of one page; returns its cache entry plus `changed`, or None if unusable.
+
+    304 (or a 200 with the same body) reuses the cached parse and is reported as unchanged.
+    """
+    entry = cache.get(url)
+    # streamed, so an oversized page is cut off at MAX_BYTES instead of read whole into memory
+    async with client.stream("GET", url, headers=_conditional_headers(entry)) as response:
+        if response.status_code == 304 and entry:
+            record_cache("http", True)
+            return dict(entry, changed=False)
+        if response.status_code != 200:
+            logger.info("crawl: %s returned %d", url, response.status_code)
+            return None
+        content_type = response.headers.get("content-type", "").lower()
+        if not ("html" in content_type or content_type.startswith("text/plain")):
+            return None
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk[:MAX_BYTES - len(body)]
+            if len(body) >= MAX_BYTES:
+                break
+        body = bytes(body)
+    digest = hashlib.sha1(body).hexdigest()
+    unchanged = bool(entry) and entry.get("sha1") == digest
+    record_cache("http", unchanged)
+    # a redirect's target is the base for relative links
+    page = (entry if unchanged else
+            parse_page(body.decode(response.charset_encoding or "utf-8", errors="replace"), str(response.url), content_type))
+    new_entry = {
+        "url": url,
+        "final_url": str(response.url),
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "sha1": digest,
+        "fetched_at": time.time(),
+        "title": page["title"],
+        "text": page["text"],
+        "links": page["links"],
+    }
+    cache.put(url, new_entry)
+    return dict(new_entry, changed=not unchanged)
+
+
+async def crawl(start_url: str, max_pages: int = MAX_PAGES, max_depth: int = MAX_DEPTH,
+                concurrency: int = CONCURRENCY, timeout: float = TIMEOUT,
+                cache_dir: Path = HTTP_CACHE_DIR) -> List[dict]:
+    """Breadth-first crawl of the site around start_url with at most `concurrency` requests in flight.
+
+    Follows same-site links under the start URL's directory up to max_depth hops
+    and max_pages pages. Every page is fetched conditionally against the local
+    HTTP cache, so an unchanged site costs one 304 per page. Returns one dict per
+    page (url, title, text, links, depth, changed) in discovery order.
+    """
+    cache = HttpCache(cache_dir)
+    queue: asyncio.Queue = asyncio.Queue()
+    seen = {start_url: 0}
+    pages: Dict[str, dict] = {}
+    queue.put_nowait((start_url, 0))
+
+    async def worker(client):
+        while True:
+            url, depth = await queue.get()
+            try:
+                page = await fetch(client, url, cache)
+                if page is None:
+                    continue
+                pages[url] = dict(page, depth=depth)
+                if depth >= max_depth:
+                    continue
+                for link in page["links"]:
+                    if len(seen) >= max_pages:
+                        break
+                    if link not in seen and in_scope(link, start_url):
+                        seen[link] = len(seen)
+                        queue.put_nowait((link, depth + 1))
+            except (httpx.HTTPError, UnicodeError) as e:
+                logger.info("crawl: %s failed: %s", url, e)
+            finally:
+                queue.task_done()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(follow_redirects=True, timeout=timeout, limits=limits,
+                                 headers={"User-Agent": USER_AGENT}) as client:
+        workers = [asyncio.create_task(worker(client)) for _ in range(concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    ordered = sorted(pages.values(), key=lambda p: seen[p["url"]])
+    changed = sum(1 for p in ordered if p["changed"])
+    METRICS.inc("bot_crawl_pages_total", len(ordered) - changed, result="unchanged")
+    METRICS.inc("bot_crawl_pages_total", changed, result="changed")
+    return ordered
+
+
+def crawl_site(start_url: str, **kwargs) -> List[dict]:
+    """Blocking crawl for synchronous callers such as build_index.
+
+    Called from inside a running event loop (the FastAPI handlers), the crawl
+    runs on its own loop in a helper thread.
+    """
+    start = time.perf_counter()
+    with span("crawl"):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pages = asyncio.run(crawl(start_url, **kwargs))
+        else:
+            # copy the context so cache hits still reach the request's trace
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pages = pool.submit(context.run, asyncio.run, crawl(start_url, **kwargs)).result()
+    changed = sum(1 for p in pages if p["changed"])
+    logger.info("crawl: %s: %d page(s), %d changed, in %.2fs",
+                start_url, len(pages), changed, time.perf_counter() - start)
+    return pages
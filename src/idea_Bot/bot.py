@@ -1,42 +1,170 @@
-import os 
+import contextvars
+import os
 import sys
-from dotenv import load_dotenv,find_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.chains import register, get_chain, get_llm
+from src.utils.tracing import logger
 from .prompt import prompt
-def idea_generation_Bot(field,topic,novelty,target_venue,style):
-    _ = load_dotenv(find_dotenv())
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    os.environ["GROQ_API_KEY"] = GROQ_API_KEY
-
-    llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.9)
-    # Build chain using existing 'prompt' (defined in an earlier cell)
-    chain = (
-        {
-            "field": RunnablePassthrough(),
-            "topic": RunnablePassthrough(),
-            "explicit_keywords": RunnablePassthrough(),
-            "novelty": RunnablePassthrough(),
-            "target_venue": RunnablePassthrough(),
-            "constraints": RunnablePassthrough(),
-            "style": RunnablePassthrough()
-        }
-        | prompt
-        | llm
-    )
 
-    # Example usage
-    user_input = {
+# Limits of one request; every idea is a separate model call
+MAX_TOPICS = 10
+MAX_IDEAS_PER_TOPIC = 10
+
+
+@register("idea")
+def _build_chain():
+    # The prompt reads each variable from the input dict directly
+    return prompt | get_llm(temperature=0.9)
+
+
+def _user_input(field, topic, novelty, target_venue, style, explicit_keywords="", constraints=""):
+    return {
         "field": field,
         "topic": topic,
+        "explicit_keywords": explicit_keywords,
         "novelty": novelty,
         "target_venue": target_venue,
-        
+        "constraints": constraints,
         "style": style
     }
 
+
+def idea_generation_Bot(field,topic,novelty,target_venue,style):
+    chain = get_chain("idea")
+
     # Generate research idea
-    response = chain.invoke(user_input)
+    response = chain.invoke(_user_input(field, topic, novelty, target_venue, style))
     # Return output string for the UI to display
     return response.content
+
+
+def parse_idea_request(topic, topics_text, n_ideas):
+    """Topics and ideas per topic from form input; ValueError outside the limits.
+
+    topic is one free-text topic, kept whole even across lines; several topics
+    come only from the separate topics field, one per line.
+    """
+    topics = [t.strip() for t in (topics_text or "").splitlines() if t.strip()]
+    if not topics and (topic or "").strip():
+        topics = [topic.strip()]
+    try:
+        n = int(n_ideas or 1)
+    except (TypeError, ValueError):
+        raise ValueError(f"Ideas per topic must be a whole number, got {n_ideas!r}")
+    if not 1 <= n <= MAX_IDEAS_PER_TOPIC:
+        raise ValueError(f"Ideas per topic must be between 1 and {MAX_IDEAS_PER_TOPIC}")
+    if len(topics) > MAX_TOPICS:
+        raise ValueError(f"At most {MAX_TOPICS} topics per request (got {len(topics)})")
+    return topics, n
+
+
+@lru_cache(maxsize=1)
+def _get_embeddings():
+    # same model and backend ($EMBEDDING_BACKEND) as the RAG bots
+    from src.utils.embeddings import get_embeddings
+    return get_embeddings()
+
+
+def _token_count(response):
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    return (getattr(response, "response_metadata", None) or {}).get("token_usage", {}).get("total_tokens", 0)
+
+
+def rank_diverse(ideas, queries, similarity_threshold=0.9):
+    """Order ideas by similarity to their topic and drop near-duplicates.
+
+    ideas / queries are parallel lists (idea text, topic it answers). An idea is
+    dropped when its cosine similarity to an already kept idea reaches the threshold.
+    Returns (kept, dropped) where kept is a list of (index, relevance).
+    """
+    import numpy as np
+
+    embeddings = _get_embeddings()
+    vectors = np.asarray(embeddings.embed_documents(ideas), dtype="float32")
+    unique_queries = sorted(set(queries))
+    query_vecs = dict(zip(unique_queries, np.asarray(embeddings.embed_documents(unique_queries), dtype="float32")))
+
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    relevance = np.array([vectors[i] @ (query_vecs[q] / np.linalg.norm(query_vecs[q])) for i, q in enumerate(queries)])
+
+    kept, dropped = [], []
+    for i in np.argsort(-relevance):
+        if kept and float(np.max(vectors[[k for k, _ in kept]] @ vectors[i])) >= similarity_threshold:
+            dropped.append(int(i))
+            continue
+        kept.append((int(i), float(relevance[i])))
+    return kept, dropped
+
+
+def idea_generation_batch(field, topics, novelty, target_venue, style, n=3, max_concurrency=4, similarity_threshold=0.9):
+    """Generate n ideas for each topic concurrently and return a ranked, deduplicated set.
+
+    Returns a dict with the kept ideas (topic, text, relevance, latency, tokens),
+    the number of near-duplicates removed, the failed calls (topic, error),
+    per-call latencies and total token spend. A failed call is reported instead
+    of failing the batch.
+    """
+    if isinstance(topics, str):
+        topics = [topics]
+    if len(topics) > MAX_TOPICS or not 1 <= n <= MAX_IDEAS_PER_TOPIC:
+        raise ValueError(f"At most {MAX_TOPICS} topics and {MAX_IDEAS_PER_TOPIC} ideas per topic")
+    chain = get_chain("idea")
+    jobs = [t for t in topics for _ in range(n)]
+
+    def call(topic):
+        start = time.perf_counter()
+        try:
+            response = chain.invoke(_user_input(field, topic, novelty, target_venue, style))
+        except Exception as e:
+            logger.warning("Idea for topic %r failed", topic, exc_info=e)
+            return None, time.perf_counter() - start, 0, f"{type(e).__name__}: {e}"
+        return response.content, time.perf_counter() - start, _token_count(response), None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(jobs)))) as pool:
+        # copy the caller's context so LLM callbacks reach the request's trace
+        futures = [pool.submit(contextvars.copy_context().run, call, topic) for topic in jobs]
+        outputs = [f.result() for f in futures]
+    wall_time = time.perf_counter() - start
+
+    ok = [i for i, out in enumerate(outputs) if out[3] is None]
+    kept, dropped = ([], []) if not ok else rank_diverse(
+        [outputs[i][0] for i in ok], [jobs[i] for i in ok], similarity_threshold=similarity_threshold)
+
+    return {
+        "ideas": [
+            {
+                "topic": jobs[ok[i]],
+                "text": outputs[ok[i]][0],
+                "relevance": relevance,
+                "latency": outputs[ok[i]][1],
+                "tokens": outputs[ok[i]][2],
+            }
+            for i, relevance in kept
+        ],
+        "duplicates_removed": len(dropped),
+        "errors": [{"topic": jobs[i], "error": out[3]} for i, out in enumerate(outputs) if out[3] is not None],
+        "latencies": [out[1] for out in outputs],
+        "total_tokens": sum(out[2] for out in outputs),
+        "wall_time": wall_time,
+    }
+
+
+def format_idea_batch(result):
+    parts = []
+    for i, idea in enumerate(result["ideas"], 1):
+        parts.append(f"# Idea {i} — {idea['topic']} (relevance {idea['relevance']:.2f})\n\n{idea['text']}")
+    for failure in result.get("errors", ()):
+        parts.append(f"# Failed — {failure['topic']}\n\n_{failure['error']}_")
+    latencies = sorted(result["latencies"])
+    parts.append(
+        f"---\n{len(result['ideas'])} ideas kept, {result['duplicates_removed']} near-duplicates removed. "
+        f"{len(latencies)} calls in {result['wall_time']:.1f}s "
+        f"(median {latencies[len(latencies) // 2]:.1f}s, max {latencies[-1]:.1f}s per call), "
+        f"{result['total_tokens']} tokens."
+    )
+    return "\n\n".join(parts)
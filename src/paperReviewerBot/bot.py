@@ -1,3 +1,4 @@
+import asyncio
 import os 
 import sys 
 from pathlib import Path
@@ -6,13 +7,20 @@ from langchain_groq import  ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS,Chroma
-from langchain_core.runnables import RunnablePassthrough
+from src.utils.batch import MAX_CONCURRENCY, answer_as_completed, answer_in_order, format_answer, search_many
+from src.utils.chains import register, get_chain, get_llm
+from src.utils.formatter import format_stream, stream_chunks
+from src.utils.tracing import logger, record_cache, span
+from src.utils.ocr import load_pdf
+from src.utils.embedcache import cached_embeddings
+from src.utils.embeddings import faiss_cache_dir, get_embeddings
 from .prompt import prompt
 
 # Module-level cache
 _VECTORSTORE_CACHE = {}
+# Chunks retrieved per question
+RETRIEVE_K = 3
 
 
 def _key_for_source(source: str):
@@ -26,7 +34,7 @@ def build_index(input_data: str, background: bool = False):
     If background=True the indexing runs in a background thread and returns immediately.
     """
     import hashlib
-    cache_root = Path('.cache/faiss')
+    cache_root = faiss_cache_dir()
     cache_root.mkdir(parents=True, exist_ok=True)
 
     key = _key_for_source(input_data)
@@ -34,34 +42,44 @@ def build_index(input_data: str, background: bool = False):
     cache_dir = cache_root / key_hash
 
     if key in _VECTORSTORE_CACHE:
+        record_cache("vectorstore", True)
         return f"Already indexed source: {key} (in-memory)"
+    record_cache("vectorstore", False)
 
     if cache_dir.exists():
         try:
-            embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-            vect = FAISS.load_local(str(cache_dir), embeddings)
+            with span("index_load"):
+                embeddings = get_embeddings()
+                # the directory is written by save_local below, so unpickling it is safe
+                vect = FAISS.load_local(str(cache_dir), embeddings, allow_dangerous_deserialization=True)
             _VECTORSTORE_CACHE[key] = vect
+            record_cache("faiss_disk", True)
             return f"Loaded index from disk for source: {key}"
         except Exception:
-            pass
+            logger.warning("Could not load index from %s, rebuilding", cache_dir, exc_info=True)
+    record_cache("faiss_disk", False)
 
     def _build_and_save():
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        if isinstance(input_data, str) and (input_data.strip().lower().endswith('.pdf') or input_data.strip().lower().startswith('http')):
-            loader = PyMuPDFLoader(input_data)
-            documents = loader.load()
-            texts = [d.page_content for d in documents]
-        else:
-            raw_text = input_data or ""
-            texts = text_splitter.split_text(raw_text)
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectordb = FAISS.from_texts(texts, embeddings)
-        try:
-            vectordb.save_local(str(cache_dir))
-        except Exception:
-            pass
-        _VECTORSTORE_CACHE[key] = vectordb
+        with span("build_index"):
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+            with span("parse"):
+                if isinstance(input_data, str) and (input_data.strip().lower().endswith('.pdf') or input_data.strip().lower().startswith('http')):
+                    # scanned pages are OCR'd (src/utils/ocr.py)
+                    documents = load_pdf(input_data)
+                    texts = [d.page_content for d in documents]
+                else:
+                    raw_text = input_data or ""
+                    texts = text_splitter.split_text(raw_text)
+
+            with span("embed"):
+                embeddings = get_embeddings()
+                vectordb = FAISS.from_texts(texts, cached_embeddings(embeddings))
+            try:
+                vectordb.save_local(str(cache_dir))
+            except Exception:
+                logger.warning("Could not save index to %s", cache_dir, exc_info=True)
+            _VECTORSTORE_CACHE[key] = vectordb
+            return len(texts)
 
     if background:
         import threading
@@ -69,97 +87,108 @@ def build_index(input_data: str, background: bool = False):
         t.start()
         return f"Indexing started in background for {key}"
 
-    _build_and_save()
-    return f"Indexed {len(texts)} chunks for {key} (saved to disk: {str(cache_dir)})"
+    n_chunks = _build_and_save()
+    return f"Indexed {n_chunks} chunks for {key} (saved to disk: {str(cache_dir)})"
 
-def paper_reviewer_rag(input_data, question="Please provide a structured review of the paper."):
-    """Accepts either a PDF path/URL or raw text content as `input_data`.
-    Uses cached vectorstore if available; otherwise builds and runs the review chain.
-    """
-    _ = load_dotenv(find_dotenv())  # read local .env file
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    os.environ["GROQ_API_KEY"] = GROQ_API_KEY
+@register("reviewer")
+def _build_chain():
+    # Retrieval depends on the document, so the chain takes ready-made context
+    return prompt | get_llm()
 
-    # model define 
-    chat_model = ChatGroq(model="llama-3.3-70b-versatile")
 
+def _vectorstore_for(input_data):
+    """Uses cached vectorstore if available; otherwise builds one on the fly."""
     key = _key_for_source(input_data)
+    record_cache("vectorstore", key in _VECTORSTORE_CACHE)
     if key in _VECTORSTORE_CACHE:
         vectordb = _VECTORSTORE_CACHE[key]
     else:
         # Build on the fly
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        if isinstance(input_data, str) and (input_data.strip().lower().endswith('.pdf') or input_data.strip().lower().startswith('http')):
-            loader = PyMuPDFLoader(input_data)
-            documents = loader.load()
-            texts = [d.page_content for d in documents]
-        else:
-            raw_text = input_data or ""
-            texts = text_splitter.split_text(raw_text)
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectordb = FAISS.from_texts(texts, embeddings)
-
-    retriever = vectordb.as_retriever(search_type="similarity", search_kwargs={"k":3})
-
-    chain   = (
-        {
-                "context": retriever,
-                "question": RunnablePassthrough()
-            }
-        | prompt
-        | chat_model
-    )
+        with span("build_index"):
+            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+            with span("parse"):
+                if isinstance(input_data, str) and (input_data.strip().lower().endswith('.pdf') or input_data.strip().lower().startswith('http')):
+                    # scanned pages are OCR'd (src/utils/ocr.py)
+                    documents = load_pdf(input_data)
+                    texts = [d.page_content for d in documents]
+                else:
+                    raw_text = input_data or ""
+                    texts = text_splitter.split_text(raw_text)
+
+            with span("embed"):
+                embeddings = get_embeddings()
+                vectordb = FAISS.from_texts(texts, cached_embeddings(embeddings))
+    return vectordb
+
+
+def _retriever_for(input_data):
+    return _vectorstore_for(input_data).as_retriever(search_type="similarity", search_kwargs={"k": RETRIEVE_K})
+
+
+def paper_reviewer_rag(input_data, question="Please provide a structured review of the paper."):
+    """Accepts either a PDF path/URL or raw text content as `input_data`.
+    Uses cached vectorstore if available; otherwise builds and runs the review chain.
+    """
+    chain = get_chain("reviewer")
+    retriever = _retriever_for(input_data)
 
     # Invoke the chain with the provided question and return the text
-    response = chain.invoke(question)
+    with span("retrieval"):
+        context = retriever.invoke(question)
+    response = chain.invoke({"context": context, "question": question})
     return response.content if hasattr(response, 'content') else str(response)
 
 
 async def paper_reviewer_rag_stream(input_data, question="Please provide a structured review of the paper."):
     """Async generator that yields progressive review chunks."""
-    key = _key_for_source(input_data)
-    if key in _VECTORSTORE_CACHE:
-        vectordb = _VECTORSTORE_CACHE[key]
-    else:
-        # Build on the fly
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        if isinstance(input_data, str) and (input_data.strip().lower().endswith('.pdf') or input_data.strip().lower().startswith('http')):
-            loader = PyMuPDFLoader(input_data)
-            documents = loader.load()
-            texts = [d.page_content for d in documents]
-        else:
-            raw_text = input_data or ""
-            texts = text_splitter.split_text(raw_text)
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectordb = FAISS.from_texts(texts, embeddings)
-
-    retriever = vectordb.as_retriever(search_type="similarity", search_kwargs={"k":3})
-    chat_model = ChatGroq(model="llama-3.3-70b-versatile")
-
-    chain   = (
-        {
-                "context": retriever,
-                "question": RunnablePassthrough()
-            }
-        | prompt
-        | chat_model
-    )
-
+    retriever = _retriever_for(input_data)
+    chain = get_chain("reviewer")
+    with span("retrieval"):
+        context = retriever.invoke(question)
+
+    # Stream tokens from the model, re-chunked at sentence boundaries as they arrive and
+    # formatted like the non-streamed review (format_for_bot)
+    streamed = False
     try:
-        if hasattr(chat_model, 'stream'):
-            async for tok in chat_model.stream(question):
-                yield tok
-            return
+        tokens = chain.astream({"context": context, "question": question})
+        async for chunk in format_stream('reviewer', stream_chunks(tokens, max_chars=60)):
+            streamed = True
+            yield chunk
+        return
     except Exception:
-        pass
+        if streamed:
+            raise
 
-    result = chain.invoke(question)
+    result = chain.invoke({"context": context, "question": question})
     text = result.content if hasattr(result, 'content') else str(result)
     from src.utils.formatter import format_for_bot, chunk_text_for_stream
     text = format_for_bot('reviewer', text)
     import asyncio
-    for c in chunk_text_for_stream(text, max_chars=60):
+    for c in chunk_text_for_stream(text, max_chars=60, clean=False):
         yield c
         await asyncio.sleep(0.03) 
+
+
+def paper_reviewer_batch(input_data, questions, max_concurrency=MAX_CONCURRENCY):
+    """Answer several questions about one document in a single pass.
+
+    The document is indexed once, all questions are embedded in one batch and
+    searched with one FAISS call, and the model calls run concurrently under the
+    shared Groq rate limiter (src/utils/batch.py). Returns one dict per question
+    (index, question, answer, error, latency) in input order.
+    """
+    chain = get_chain("reviewer")
+    contexts = search_many(_vectorstore_for(input_data), questions, k=RETRIEVE_K)
+    return answer_in_order(chain, questions, contexts, max_concurrency=max_concurrency)
+
+
+async def paper_reviewer_batch_stream(input_data, questions, max_concurrency=MAX_CONCURRENCY):
+    """Async generator yielding each answer as a markdown section as soon as it completes."""
+    chain = get_chain("reviewer")
+    # indexing and the FAISS search are blocking; keep them off the event loop
+    vectordb = await asyncio.to_thread(_vectorstore_for, input_data)
+    contexts = await asyncio.to_thread(search_many, vectordb, questions, RETRIEVE_K)
+    first = True
+    async for result in answer_as_completed(chain, questions, contexts, max_concurrency=max_concurrency):
+        yield ("" if first else "\n\n") + format_answer(result)
+        first = False
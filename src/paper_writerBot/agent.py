@@ -1,25 +1,53 @@
-import os 
+import os
 import sys
-from dotenv import load_dotenv,find_dotenv
-from langchain_groq import ChatGroq
+import re
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.chains import register, get_chain, get_llm
 from .task import WriterTask,PolisherTask
 
-def paper_writer(input_text):
-    _ = load_dotenv(find_dotenv())  # read local .env file
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-    os.environ["GROQ_API_KEY"] = GROQ_API_KEY
+# Paragraphs drafted/polished at the same time (bounded to stay under Groq rate limits)
+MAX_CONCURRENCY = 4
 
-    llm = ChatGroq(model="llama-3.3-70b-versatile")
 
+@register("writer")
+def _build_chain():
+    # Both stages build their prompt per paragraph and share this client
+    return get_llm()
 
+
+def split_paragraphs(input_text):
+    """Split input on blank lines; a text without blank lines is one paragraph."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", input_text or "") if p.strip()]
+    return paragraphs or [(input_text or "").strip()]
+
+
+def write_paragraph(text, llm):
+    """Run the two stages (draft, then polish) for a single paragraph."""
     # Instantiate tasks by passing field names and inject the LLM instance
-    writer_task = WriterTask(text=input_text, llm=llm)
+    writer_task = WriterTask(text=text, llm=llm)
     writer_result = writer_task()
     draft_paragraph = writer_result["paragraph"]
 
     polisher_task = PolisherTask(draft=draft_paragraph, llm=llm)
     polisher_result = polisher_task()
     polished_paragraph = polisher_result["polished"]
+    return draft_paragraph, polished_paragraph
+
+
+def paper_writer(input_text, max_concurrency=MAX_CONCURRENCY):
+    llm = get_chain("writer")
+    paragraphs = split_paragraphs(input_text)
+
+    # Paragraphs run concurrently, in input order; each worker runs in a copy of the
+    # caller's context so stage timings and tokens reach the request's trace
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(paragraphs)))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, write_paragraph, p, llm) for p in paragraphs]
+        results = [f.result() for f in futures]
+
+    draft_paragraph = "\n\n".join(d for d, _ in results)
+    polished_paragraph = "\n\n".join(p for _, p in results)
 
     # Return a structured result string containing draft and polished paragraph
     result = """
@@ -31,3 +59,25 @@ Polished Paragraph:
 """.format(draft=draft_paragraph, polished=polished_paragraph)
 
     return result
+
+
+async def paper_writer_stream(input_text, max_concurrency=MAX_CONCURRENCY):
+    """Async generator yielding each polished paragraph, in input order, as soon as it
+    and every paragraph before it are done. At most max_concurrency paragraphs are in flight.
+    """
+    llm = get_chain("writer")
+    paragraphs = split_paragraphs(input_text)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(paragraph):
+        async with semaphore:
+            return await asyncio.to_thread(write_paragraph, paragraph, llm)
+
+    tasks = [asyncio.create_task(run(p)) for p in paragraphs]
+    try:
+        for i, task in enumerate(tasks):
+            _, polished = await task
+            yield ("\n\n" if i else "") + polished.strip()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,193 @@
+# power.py
+# Power-analysis sample sizes. Each test defines power(n) from the exact
+# noncentral distribution, and the smallest n reaching the target power is
+# found by bracketing plus Brent's method instead of a linear scan.
+from math import ceil, log, sqrt
+from functools import lru_cache
+from scipy.optimize import brentq
+from scipy.stats import norm, t, f, chi2, nct, ncf, ncx2
+
+# Cohen's conventional small / medium / large effect sizes
+EFFECT_SIZES = {
+    "ttest": {"small": 0.2, "medium": 0.5, "large": 0.8},         # d
+    "anova": {"small": 0.1, "medium": 0.25, "large": 0.4},        # f
+    "chisquare": {"small": 0.1, "medium": 0.3, "large": 0.5},     # w
+    "correlation": {"small": 0.1, "medium": 0.3, "large": 0.5},   # r
+    "regression": {"small": 0.02, "medium": 0.15, "large": 0.35}, # f^2
+}
+
+_MAX_N = 10_000_000
+
+
+def _solve(power_fn, target, lower):
+    """
+    Smallest integer n >= lower with power_fn(n) >= target
+    """
+    if power_fn(lower) >= target:
+        return ceil(lower)
+    upper = max(lower * 2, 16)
+    while power_fn(upper) < target:
+        if upper > _MAX_N:
+            raise ValueError("Effect size too small: required sample size is unbounded")
+        upper *= 2
+    n = ceil(brentq(lambda x: power_fn(x) - target, lower, upper, xtol=1e-6))
+    # guard against rounding at the root
+    while power_fn(n) < target:
+        n += 1
+    return n
+
+
+def ttest_power(n, d, alpha=0.05):
+    """
+    Power of a two-sided two-sample t-test with n per group
+    """
+    df = 2 * n - 2
+    ncp = d * sqrt(n / 2)
+    crit = t.ppf(1 - alpha / 2, df)
+    return nct.sf(crit, df, ncp) + nct.cdf(-crit, df, ncp)
+
+
+def anova_power(n, f_effect, groups, alpha=0.05):
+    """
+    Power of a one-way ANOVA with n total observations across groups
+    """
+    df1, df2 = groups - 1, n - groups
+    crit = f.ppf(1 - alpha, df1, df2)
+    return ncf.sf(crit, df1, df2, f_effect ** 2 * n)
+
+
+def chisquare_power(n, w, df=1, alpha=0.05):
+    """
+    Power of a chi-square test with n total observations
+    """
+    crit = chi2.ppf(1 - alpha, df)
+    return ncx2.sf(crit, df, w ** 2 * n)
+
+
+def regression_power(n, f2, predictors, alpha=0.05):
+    """
+    Power of the overall F-test of a multiple regression with n observations
+    """
+    df1, df2 = predictors, n - predictors - 1
+    crit = f.ppf(1 - alpha, df1, df2)
+    return ncf.sf(crit, df1, df2, f2 * n)
+
+
+# Solvers are cached on normalised positional arguments, so ttest_n(0.5) and
+# ttest_n(d=0.5, power=0.8) share one entry.
+@lru_cache(maxsize=4096)
+def _ttest_n(d, power, alpha):
+    return _solve(lambda n: ttest_power(n, d, alpha), power, 2)
+
+
+@lru_cache(maxsize=4096)
+def _anova_n(f_effect, groups, power, alpha):
+    n = _solve(lambda n: anova_power(n, f_effect, groups, alpha), power, groups + 1)
+    # equal group sizes
+    return ceil(n / groups) * groups
+
+
+@lru_cache(maxsize=4096)
+def _chisquare_n(w, df, power, alpha):
+    return _solve(lambda n: chisquare_power(n, w, df, alpha), power, 1)
+
+
+@lru_cache(maxsize=4096)
+def _correlation_n(r, power, alpha):
+    c = 0.5 * log((1 + r) / (1 - r))
+    z_sum = norm.ppf(1 - alpha / 2) + norm.ppf(power)
+    return ceil((z_sum / c) ** 2 + 3)
+
+
+@lru_cache(maxsize=4096)
+def _regression_n(f2, predictors, power, alpha):
+    return _solve(lambda n: regression_power(n, f2, predictors, alpha), power, predictors + 2)
+
+
+def _check(effect, power, alpha):
+    if effect <= 0:
+        raise ValueError("Effect size must be positive")
+    if not 0 < power < 1 or not 0 < alpha < 1:
+        raise ValueError("power and alpha must be between 0 and 1")
+    return round(float(effect), 6), round(float(power), 6), round(float(alpha), 6)
+
+
+def _check_count(value, name, minimum):
+    """
+    Whole-number design parameter (groups, df, predictors) of at least minimum
+    """
+    if int(value) != value or value < minimum:
+        raise ValueError(f"{name} must be a whole number of at least {minimum} (got {value})")
+    return int(value)
+
+
+def ttest_n(d, power=0.80, alpha=0.05):
+    """
+    Sample size per group for a two-sided independent t-test
+    """
+    return _ttest_n(*_check(d, power, alpha))
+
+
+def anova_n(f_effect, groups=3, power=0.80, alpha=0.05):
+    """
+    Total sample size for a one-way ANOVA (equal group sizes)
+    """
+    f_effect, power, alpha = _check(f_effect, power, alpha)
+    groups = _check_count(groups, "groups", 2)
+    return _anova_n(f_effect, groups, power, alpha)
+
+
+def chisquare_n(w, df=1, power=0.80, alpha=0.05):
+    """
+    Total sample size for a chi-square test
+    """
+    w, power, alpha = _check(w, power, alpha)
+    df = _check_count(df, "df", 1)
+    return _chisquare_n(w, df, power, alpha)
+
+
+def correlation_n(r, power=0.80, alpha=0.05):
+    """
+    Sample size to detect correlation r (two-sided, Fisher z)
+    """
+    if abs(r) >= 1:
+        raise ValueError("r must be between -1 and 1")
+    return _correlation_n(*_check(abs(r), power, alpha))
+
+
+def regression_n(f2, predictors, power=0.80, alpha=0.05):
+    """
+    Total sample size for the overall F-test of a multiple regression
+    """
+    f2, power, alpha = _check(f2, power, alpha)
+    predictors = _check_count(predictors, "predictors", 1)
+    return _regression_n(f2, predictors, power, alpha)
+
+
+def warm_cache(powers=(0.80, 0.90), alphas=(0.05, 0.01), max_groups=6, max_predictors=20):
+    """
+    Precompute the conventional effect-size grid so interactive requests hit the cache
+    """
+    for power in powers:
+        for alpha in alphas:
+            for d in EFFECT_SIZES["ttest"].values():
+                ttest_n(d, power, alpha)
+            for r in EFFECT_SIZES["correlation"].values():
+                correlation_n(r, power, alpha)
+            for w in EFFECT_SIZES["chisquare"].values():
+                for df in range(1, 5):
+                    chisquare_n(w, df, power, alpha)
+            for f_effect in EFFECT_SIZES["anova"].values():
+                for groups in range(2, max_groups + 1):
+                    anova_n(f_effect, groups, power, alpha)
+            for f2 in EFFECT_SIZES["regression"].values():
+                for predictors in range(1, max_predictors + 1):
+                    regression_n(f2, predictors, power, alpha)
+
+
+if __name__ == "__main__":
+    print("t-test (d=0.5), per group:", ttest_n(0.5))
+    print("ANOVA (f=0.25, k=3), total:", anova_n(0.25, 3))
+    print("Chi-square (w=0.3, df=1), total:", chisquare_n(0.3, 1))
+    print("Correlation (r=0.3):", correlation_n(0.3))
+    print("Regression (f2=0.15, 5 predictors):", regression_n(0.15, 5))
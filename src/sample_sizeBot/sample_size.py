@@ -1,11 +1,70 @@
 # sample_size_bot.py
 from math import ceil
+from functools import lru_cache
+import numpy as np
+import pandas as pd
 from scipy.stats import norm
+from src.utils.chains import register
+from .power import ttest_n, anova_n, chisquare_n, correlation_n, regression_n
+
+# Limits of a sensitivity table, so one request cannot ask for millions of rows
+MAX_AXIS_POINTS = 200
+MAX_GRID_ROWS = 20000
+
+
+@lru_cache(maxsize=None)
+def z_score(confidence):
+    """
+    Two-sided z critical value, computed once per confidence level
+    """
+    return float(norm.ppf(1 - (1 - confidence) / 2))
+
+
+def parse_grid(value, cast=float):
+    """
+    Parse a grid axis: "0.1,0.3,0.5", a range "0.1:0.5:0.1" (stop inclusive) or a single value.
+    Raises ValueError for a non-positive step, non-finite values or more than MAX_AXIS_POINTS points
+    """
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple, np.ndarray)):
+        values = [cast(v) for v in value]
+    else:
+        value = str(value).strip()
+        if value.count(":") == 2:
+            start, stop, step = (float(v) for v in value.split(":"))
+            if not np.isfinite([start, stop, step]).all():
+                raise ValueError(f"Range bounds must be finite: {value}")
+            if step <= 0:
+                raise ValueError(f"Range step must be positive: {value}")
+            if (stop - start) / step + 1 > MAX_AXIS_POINTS:
+                raise ValueError(f"Range {value} has more than {MAX_AXIS_POINTS} points")
+            return [cast(round(v, 10)) for v in np.arange(start, stop + step / 2, step)]
+        values = [cast(v) for v in value.split(",") if v.strip()]
+    if len(values) > MAX_AXIS_POINTS:
+        raise ValueError(f"A grid axis takes at most {MAX_AXIS_POINTS} values")
+    if not np.isfinite(values).all():
+        raise ValueError("Grid values must be finite")
+    return values
+
+
+def _check_grid(confidence, d, **axes):
+    """
+    Validate grid axes shared by the *_grid methods; raises ValueError
+    """
+    if (confidence <= 0).any() or (confidence >= 1).any():
+        raise ValueError("confidence must be between 0 and 1 (exclusive)")
+    if (d <= 0).any():
+        raise ValueError("d must be positive")
+    rows = confidence.size * d.size * int(np.prod([a.size for a in axes.values()]))
+    if rows > MAX_GRID_ROWS:
+        raise ValueError(f"Grid of {rows} rows exceeds the limit of {MAX_GRID_ROWS}")
+
 
 class SampleSizeBot:
     def __init__(self, confidence=0.95):
         self.confidence = confidence
-        self.z = norm.ppf(1 - (1 - confidence) / 2)
+        self.z = z_score(confidence)
 
     def prevalence(self, p=0.5, d=0.05, population=None):
         """
@@ -32,11 +91,96 @@ class SampleSizeBot:
         n = (self.z ** 2 * std_dev ** 2) / (d ** 2)
         return ceil(n)
 
-    def regression(self, predictors, power=0.80):
+    def prevalence_grid(self, p, d, population=None, confidence=None):
+        """
+        Prevalence sample sizes for every combination of p x d x N x confidence.
+        Each argument is a scalar or a sequence; population entries of None/0 mean infinite.
+        Returns a DataFrame with one row per combination.
+        """
+        confidence = np.atleast_1d(confidence if confidence is not None else self.confidence).astype(float)
+        populations = [population] if population is None or np.isscalar(population) else population
+        populations = np.array([float(N) if N else np.inf for N in populations])
+        p, d = np.atleast_1d(p).astype(float), np.atleast_1d(d).astype(float)
+        if (p < 0).any() or (p > 1).any():
+            raise ValueError("p must be between 0 and 1")
+        if (populations < 0).any():
+            raise ValueError("population must be positive (0 or empty for infinite)")
+        _check_grid(confidence, d, p=p, population=populations)
+
+        P, D, N, C = np.meshgrid(p, d, populations, confidence, indexing="ij")
+        Z = np.vectorize(z_score, otypes=[float])(C)
+
+        n0 = (Z ** 2 * P * (1 - P)) / (D ** 2)
+        n = np.ceil(n0 / (1 + (n0 - 1) / N))
+
+        return pd.DataFrame({
+            "confidence": C.ravel(),
+            "p": P.ravel(),
+            "d": D.ravel(),
+            "population": np.where(np.isinf(N), np.nan, N).ravel(),
+            "sample_size": n.ravel().astype(int),
+        })
+
+    def mean_estimation_grid(self, std_dev, d, confidence=None):
         """
-        Rule-of-thumb regression sample size
+        Mean-estimation sample sizes for every combination of std_dev x d x confidence
         """
-        return predictors * 15
+        confidence = np.atleast_1d(confidence if confidence is not None else self.confidence).astype(float)
+        std_dev, d = np.atleast_1d(std_dev).astype(float), np.atleast_1d(d).astype(float)
+        if (std_dev < 0).any():
+            raise ValueError("std_dev must not be negative")
+        _check_grid(confidence, d, std_dev=std_dev)
+
+        S, D, C = np.meshgrid(std_dev, d, confidence, indexing="ij")
+        Z = np.vectorize(z_score, otypes=[float])(C)
+
+        n = np.ceil((Z ** 2 * S ** 2) / (D ** 2))
+
+        return pd.DataFrame({
+            "confidence": C.ravel(),
+            "std_dev": S.ravel(),
+            "d": D.ravel(),
+            "sample_size": n.ravel().astype(int),
+        })
+
+    @property
+    def alpha(self):
+        return 1 - self.confidence
+
+    def regression(self, predictors, power=0.80, f2=0.15):
+        """
+        Sample size for the overall F-test of a multiple regression (effect size f^2)
+        """
+        return regression_n(f2, predictors, power=power, alpha=self.alpha)
+
+    def t_test(self, d=0.5, power=0.80):
+        """
+        Sample size per group for an independent t-test (effect size d)
+        """
+        return ttest_n(d, power=power, alpha=self.alpha)
+
+    def anova(self, f=0.25, groups=3, power=0.80):
+        """
+        Total sample size for a one-way ANOVA (effect size f)
+        """
+        return anova_n(f, groups, power=power, alpha=self.alpha)
+
+    def chi_square(self, w=0.3, df=1, power=0.80):
+        """
+        Total sample size for a chi-square test (effect size w)
+        """
+        return chisquare_n(w, df, power=power, alpha=self.alpha)
+
+    def correlation(self, r=0.3, power=0.80):
+        """
+        Sample size to detect a correlation r
+        """
+        return correlation_n(r, power=power, alpha=self.alpha)
+
+
+@register("sample_size")
+def _build_bot():
+    return SampleSizeBot()
 
 
 if __name__ == "__main__":
@@ -44,3 +188,5 @@ if __name__ == "__main__":
     print("Prevalence:", bot.prevalence(p=0.3, d=0.05))
     print("Mean:", bot.mean_estimation(std_dev=10, d=2))
     print("Regression:", bot.regression(predictors=5))
+    print("t-test (per group):", bot.t_test(d=0.5))
+    print(bot.prevalence_grid(p=[0.1, 0.3, 0.5], d=[0.03, 0.05], population=[None, 1000], confidence=[0.90, 0.95, 0.99]))
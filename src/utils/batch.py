@@ -0,0 +1,151 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from src.utils.tracing import logger, span
+
+# Questions answered at the same time by one batch
+MAX_CONCURRENCY = 6
+# Questions one batch request may carry
+MAX_QUESTIONS = int(os.getenv("MAX_BATCH_QUESTIONS", "20"))
+# Groq requests per minute shared by every batch in the process (0 disables the limit)
+REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+BURST = int(os.getenv("GROQ_REQUEST_BURST", "10"))
+
+
+class RateLimiter:
+    """Token bucket shared across threads and event loops.
+
+    Each acquire reserves the next free slot under a lock and then sleeps until
+    it, so waiting callers are served in arrival order and none busy-poll.
+    """
+
+    def __init__(self, per_minute: float, burst: int = 1):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+LLM_LIMITER = RateLimiter(REQUESTS_PER_MINUTE, BURST)
+
+
+def split_questions(text: str, limit: int = MAX_QUESTIONS) -> List[str]:
+    """One question per non-empty line; ValueError past `limit` questions."""
+    questions = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    if len(questions) > limit:
+        raise ValueError(f"At most {limit} questions per batch (got {len(questions)})")
+    return questions
+
+
+def search_many(vectorstore, questions: List[str], k: int = 4) -> List[list]:
+    """Top-k documents for every question from one embedding batch and one FAISS search."""
+    embeddings = vectorstore.embeddings
+    # questions are one-off: bypass the chunk embedding cache (src/utils/embedcache.py);
+    # embed_documents equals embed_query for the sentence-transformer models used here
+    embeddings = getattr(embeddings, "embeddings", embeddings)
+    with span("embed_questions"):
+        vectors = np.asarray(embeddings.embed_documents(questions), dtype=np.float32)
+    with span("retrieval"):
+        if vectorstore._normalize_L2:
+            import faiss
+            faiss.normalize_L2(vectors)
+        _, indices = vectorstore.index.search(vectors, k)
+        return [[vectorstore.docstore.search(vectorstore.index_to_docstore_id[i]) for i in row if i != -1]
+                for row in indices]
+
+
+def _result(i, question, response=None, error=None, start=None):
+    if error is not None:
+        logger.warning("Batch question %d failed", i, exc_info=error)
+    answer = None if error is not None else (response.content if hasattr(response, "content") else str(response))
+    return {"index": i, "question": question, "answer": answer,
+            "error": None if error is None else f"{type(error).__name__}: {error}",
+            "latency": time.perf_counter() - start}
+
+
+def answer_in_order(chain, questions: List[str], contexts: list, max_concurrency: int = MAX_CONCURRENCY,
+                    limiter: Optional[RateLimiter] = LLM_LIMITER) -> List[dict]:
+    """Answer every question concurrently; one result dict per question, in input order.
+
+    contexts[i] is the chain's context for questions[i]. At most max_concurrency
+    calls are in flight and each waits for the shared rate limiter. A failed call
+    is reported in its result instead of failing the batch.
+    """
+    def ask(i):
+        if limiter is not None:
+            limiter.wait()
+        start = time.perf_counter()
+        try:
+            response = chain.invoke({"context": contexts[i], "question": questions[i]})
+        except Exception as e:
+            return _result(i, questions[i], error=e, start=start)
+        return _result(i, questions[i], response, start=start)
+
+    # each worker runs in a copy of the caller's context so LLM calls reach its trace
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(questions)))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, ask, i) for i in range(len(questions))]
+        return [f.result() for f in futures]
+
+
+async def answer_as_completed(chain, questions: List[str], contexts: list,
+                              max_concurrency: int = MAX_CONCURRENCY, limiter: Optional[RateLimiter] = LLM_LIMITER):
+    """Async generator counterpart of answer_in_order yielding results in completion order."""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def ask(i):
+        async with semaphore:
+            if limiter is not None:
+                await limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = await chain.ainvoke({"context": contexts[i], "question": questions[i]})
+            except Exception as e:
+                return _result(i, questions[i], error=e, start=start)
+            return _result(i, questions[i], response, start=start)
+
+    tasks = [asyncio.create_task(ask(i)) for i in range(len(questions))]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def format_answer(result: dict) -> str:
+    """Markdown section for one answer: the numbered question as heading, then the answer or error."""
+    body = result["answer"] if result["error"] is None else f"_Failed: {result['error']}_"
+    return f"## Q{result['index'] + 1}. {result['question']}\n\n{body}"
+
+
+def format_batch(results: List[dict]) -> str:
+    return "\n\n".join(format_answer(r) for r in results)
@@ -0,0 +1,74 @@
+import os
+import importlib
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Dict
+
+from src.utils.tracing import TRACING_CALLBACK
+
+# Bot modules that register builders; imported on first use of their bot id
+BOT_MODULES = {
+    "citation": "src.citrationmaker.citration",
+    "idea": "src.idea_Bot.bot",
+    "conference": "src.conferencebot.bot",
+    "questionaire": "src.Questioniare.question",
+    "questionaire_localize": "src.Questioniare.question",
+    "sample_size": "src.sample_sizeBot.sample_size",
+    "statistical": "src.Statistical_test_selector.stat",
+    "reviewer": "src.paperReviewerBot.bot",
+    "analyst": "src.Reseach_AnalysisBot.bot",
+    "writer": "src.paper_writerBot.agent",
+}
+
+_BUILDERS: Dict[str, Callable] = {}
+_REGISTRY: Dict[str, object] = {}
+_LOCK = Lock()
+
+
+def register(bot_id: str):
+    """Decorator registering the function that builds a bot's chain (called once per process)."""
+    def decorator(builder):
+        _BUILDERS[bot_id] = builder
+        return builder
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def get_llm(temperature=None, model="llama-3.3-70b-versatile"):
+    """Shared ChatGroq client per (model, temperature); every call is traced (see src/utils/tracing.py)."""
+    from dotenv import load_dotenv, find_dotenv
+    from langchain_groq import ChatGroq
+
+    _ = load_dotenv(find_dotenv())  # read local .env file
+    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    if GROQ_API_KEY:
+        os.environ["GROQ_API_KEY"] = GROQ_API_KEY
+    if temperature is None:
+        return ChatGroq(model=model, callbacks=[TRACING_CALLBACK])
+    return ChatGroq(model=model, temperature=temperature, callbacks=[TRACING_CALLBACK])
+
+
+def get_chain(bot_id: str):
+    """Return the prebuilt runnable for a bot, building it on first use."""
+    chain = _REGISTRY.get(bot_id)
+    if chain is not None:
+        return chain
+    with _LOCK:
+        if bot_id not in _REGISTRY:
+            if bot_id not in _BUILDERS and bot_id in BOT_MODULES:
+                importlib.import_module(BOT_MODULES[bot_id])
+            if bot_id not in _BUILDERS:
+                raise KeyError(f"No chain registered for bot '{bot_id}'")
+            _REGISTRY[bot_id] = _BUILDERS[bot_id]()
+        return _REGISTRY[bot_id]
+
+
+def build_all(bot_ids=None):
+    """Build every registered chain up front (e.g. at app startup). Returns {bot_id: error} for failures."""
+    errors = {}
+    for bot_id in bot_ids or BOT_MODULES:
+        try:
+            get_chain(bot_id)
+        except Exception as e:
+            errors[bot_id] = str(e)
+    return errors
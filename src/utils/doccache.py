@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from langchain_core.documents import Document
+
+from src.utils.tracing import logger
+
+DOC_CACHE_DIR = Path(".cache/docs")
+# Bump when extraction code changes so older entries are re-parsed; per-call
+# settings such as the OCR dpi and language are part of the cache key instead
+PARSER_VERSION = "pymupdf-1"
+COMPRESSION = "zstd"
+
+# One row per page: extracted text plus the page geometry and loader metadata
+SCHEMA = pa.schema([
+    ("page", pa.int32()),
+    ("text", pa.string()),
+    ("ocr", pa.bool_()),
+    ("width", pa.float32()),
+    ("height", pa.float32()),
+    ("rotation", pa.int16()),
+    ("metadata", pa.string()),
+])
+
+# Per-file metadata that depends on where the document was loaded from, not its content
+_LOCATION_KEYS = ("source", "file_path")
+
+
+def document_hash(path: str) -> str:
+    """sha256 of the file content, so renamed or re-uploaded copies share one entry."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(content_hash: str, **settings) -> str:
+    """Entry name for one document parsed with the given extraction settings."""
+    if not settings:
+        return content_hash
+    variant = hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return f"{content_hash}-{variant}"
+
+
+def page_layout(path: str) -> List[tuple]:
+    """(width, height, rotation) of every page; reads the page tree only, not the text."""
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        return [(page.rect.width, page.rect.height, page.rotation) for page in doc]
+
+
+def _cache_file(key: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / f"{key}.parquet"
+
+
+def read_pages(key: str, cache_dir: Path = DOC_CACHE_DIR) -> Optional[dict]:
+    """Cached pages for a document hash, or None.
+
+    Returns {"docs": [Document], "pending_ocr": int}, where pending_ocr counts
+    scanned pages that were stored without OCR text.
+    """
+    cache_file = _cache_file(key, cache_dir)
+    if not cache_file.exists():
+        return None
+    try:
+        table = pq.read_table(cache_file)
+        meta = table.schema.metadata or {}
+        if meta.get(b"parser", b"").decode() != PARSER_VERSION:
+            return None
+        docs = []
+        for row in table.to_pylist():
+            metadata = json.loads(row["metadata"])
+            metadata["page"] = row["page"]
+            if row["ocr"]:
+                metadata["ocr"] = True
+            docs.append(Document(page_content=row["text"], metadata=metadata))
+        return {"docs": docs, "pending_ocr": int(meta.get(b"pending_ocr", b"0"))}
+    except Exception:
+        logger.warning("Could not read parsed document cache %s", cache_file, exc_info=True)
+        return None
+
+
+def write_pages(key: str, docs: List[Document], layout: List[tuple], pending_ocr: int = 0,
+                cache_dir: Path = DOC_CACHE_DIR):
+    """Store parsed pages as one zstd-compressed parquet file per document."""
+    cache_file = _cache_file(key, cache_dir)
+    rows = {name: [] for name in SCHEMA.names}
+    for i, doc in enumerate(docs):
+        page = doc.metadata.get("page", i)
+        width, height, rotation = layout[page] if page < len(layout) else (None, None, None)
+        metadata = {k: v for k, v in doc.metadata.items() if k not in _LOCATION_KEYS + ("page", "ocr")}
+        rows["page"].append(page)
+        rows["text"].append(doc.page_content)
+        rows["ocr"].append(bool(doc.metadata.get("ocr")))
+        rows["width"].append(width)
+        rows["height"].append(height)
+        rows["rotation"].append(rotation)
+        rows["metadata"].append(json.dumps(metadata, default=str))
+    table = pa.Table.from_pydict(rows, schema=SCHEMA).replace_schema_metadata(
+        {"parser": PARSER_VERSION, "pending_ocr": str(pending_ocr)})
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # unique name: several threads of one process may write the same document
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", prefix=cache_file.stem + ".", dir=cache_file.parent)
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp, compression=COMPRESSION)
+            os.replace(tmp, cache_file)
+        except Exception:
+            os.unlink(tmp)
+            raise
+    except Exception:
+        logger.warning("Could not write parsed document cache %s", cache_file, exc_info=True)
+
+
+def with_location(docs: List[Document], source: str, file_path: str) -> List[Document]:
+    """Re-attach where this copy of the document was loaded from."""
+    for doc in docs:
+        doc.metadata["source"] = source
+        doc.metadata["file_path"] = file_path
+    return docs
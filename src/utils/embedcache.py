@@ -0,0 +1,181 @@
+import hashlib
+import json
+import threading
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils.tracing import record_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are serialised
+    fcntl = None
+
+EMBED_CACHE_DIR = Path(".cache/embeddings")
+_KEY_BYTES = 20
+
+
+def normalize_chunk(text: str) -> str:
+    """Whitespace and unicode differences between copies of a chunk don't change its vector."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def chunk_key(text: str) -> bytes:
+    return hashlib.sha1(normalize_chunk(text).encode("utf-8")).digest()
+
+
+def model_id_for(embeddings) -> str:
+    name = getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None)
+    if name:
+        # ONNX / quantised runtimes (src/utils/embeddings.py) give slightly different vectors
+        kwargs = getattr(embeddings, "model_kwargs", None) or {}
+        backend = kwargs.get("backend", "torch")
+        if backend != "torch":
+            file_name = (kwargs.get("model_kwargs") or {}).get("file_name")
+            return f"{name}@{backend}" + (f"/{file_name}" if file_name else "")
+        return str(name)
+    # e.g. DeterministicFakeEmbedding, whose vectors depend on its size
+    return f"{type(embeddings).__name__}-{getattr(embeddings, 'size', '')}"
+
+
+class EmbeddingStore:
+    """Append-only vectors of one model: keys.bin holds 20-byte chunk hashes,
+    vectors.f32 the float32 rows in the same order, read through a memory map.
+
+    Several workers may share the directory; appends take an exclusive file
+    lock and re-read keys other processes added first.
+    """
+
+    def __init__(self, model_id: str, cache_dir: Path = EMBED_CACHE_DIR):
+        self.model_id = model_id
+        self.dir = Path(cache_dir) / hashlib.sha1(model_id.encode("utf-8")).hexdigest()[:16]
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.keys_path = self.dir / "keys.bin"
+        self.vectors_path = self.dir / "vectors.f32"
+        self.meta_path = self.dir / "meta.json"
+        self.dim: Optional[int] = None
+        self._load_dim()
+        self._rows: Dict[bytes, int] = {}
+        self._keys_read = 0       # bytes of keys.bin already indexed
+        self._vectors = None      # memmap over the rows indexed so far
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _load_dim(self):
+        """Vector size from meta.json, which another worker may have written since we started."""
+        if self.dim is None and self.meta_path.exists():
+            try:
+                self.dim = json.loads(self.meta_path.read_text())["dim"]
+            except (OSError, ValueError, KeyError):
+                pass  # being written; the next call reads it
+
+    def _sync(self):
+        """Index keys appended since the last call (by this or another process)."""
+        if not self.keys_path.exists():
+            return
+        self._load_dim()
+        if self.dim is None:
+            return  # keys without meta.json yet: index them once the size is known
+        size = self.keys_path.stat().st_size
+        if size - size % _KEY_BYTES == self._keys_read:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_read)
+            data = f.read(size - self._keys_read)
+        data = data[:len(data) - len(data) % _KEY_BYTES]
+        first = self._keys_read // _KEY_BYTES
+        for i in range(0, len(data), _KEY_BYTES):
+            self._rows.setdefault(data[i:i + _KEY_BYTES], first + i // _KEY_BYTES)
+        self._keys_read += len(data)
+        self._vectors = None
+
+    def _matrix(self):
+        if self._vectors is None and self._rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                      shape=(self._keys_read // _KEY_BYTES, self.dim))
+        return self._vectors
+
+    def get(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        with self._lock:
+            self._sync()
+            rows = {k: self._rows[k] for k in keys if k in self._rows}
+            if not rows:
+                return {}
+            matrix = self._matrix()
+            return {k: np.array(matrix[r]) for k, r in rows.items()}
+
+    def put(self, keys: List[bytes], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, open(self.dir / "lock", "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._load_dim()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self.meta_path.write_text(json.dumps({"model": self.model_id, "dim": self.dim}))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"{self.model_id}: expected {self.dim}-d vectors, got {vectors.shape[1]}")
+            self._sync()
+            new = [i for i, k in enumerate(keys) if k not in self._rows]
+            new = list({keys[i]: i for i in new}.values())
+            if not new:
+                return
+            row_bytes = 4 * self.dim
+            with open(self.vectors_path, "ab") as f:
+                # drop rows left behind by a writer that died before recording their keys
+                f.truncate(self._keys_read // _KEY_BYTES * row_bytes)
+                f.write(vectors[new].tobytes())
+            # keys last, so a readable key always has its vector on disk
+            with open(self.keys_path, "ab") as f:
+                # drop a partial key left by a writer that died mid-write, so later keys stay aligned
+                f.truncate(self._keys_read)
+                f.write(b"".join(keys[i] for i in new))
+            self._sync()
+
+
+@lru_cache(maxsize=None)
+def get_store(model_id: str, cache_dir: str = str(EMBED_CACHE_DIR)) -> EmbeddingStore:
+    return EmbeddingStore(model_id, Path(cache_dir))
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends chunks it has not seen before to the model.
+
+    Vectors are keyed by the hash of the normalised chunk text within a per-model
+    store, so a revised paper, a second copy of a CFP or shared boilerplate only
+    pays for the chunks that changed. Queries are passed through uncached.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_id: Optional[str] = None, store: Optional[EmbeddingStore] = None):
+        self.embeddings = embeddings
+        self.model_id = model_id or model_id_for(embeddings)
+        self.store = store or get_store(self.model_id)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [chunk_key(t) for t in texts]
+        found = self.store.get(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = np.asarray(self.embeddings.embed_documents(list(missing.values())), dtype=np.float32)
+            self.store.put(list(missing), vectors)
+            found.update(zip(missing, vectors))
+        record_cache("embedding", True, len(texts) - len(missing))
+        record_cache("embedding", False, len(missing))
+        return [found[k].tolist() for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+def cached_embeddings(embeddings: Embeddings, model_id: Optional[str] = None) -> CachedEmbeddings:
+    return CachedEmbeddings(embeddings, model_id)
@@ -0,0 +1,68 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from src.utils.tracing import logger
+
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# torch:     full-precision PyTorch, as before
+# onnx:      the model's ONNX export on ONNX Runtime (CPU)
+# onnx-int8: the dynamically int8-quantised ONNX export; AVX2 build by default,
+#            model_qint8_avx512_vnni.onnx / model_qint8_arm64.onnx suit other CPUs
+# The ONNX backends need `pip install "sentence-transformers[onnx]"`.
+EMBED_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+BACKENDS = {
+    "torch": {},
+    "onnx": {"backend": "onnx"},
+    "onnx-int8": {"backend": "onnx", "model_kwargs": {"file_name": ONNX_INT8_FILE}},
+}
+
+FAISS_CACHE_DIR = Path(".cache/faiss")
+
+
+def backend_available(backend: str) -> bool:
+    if backend not in BACKENDS:
+        return False
+    try:
+        import sentence_transformers  # noqa: F401
+        if BACKENDS[backend].get("backend") == "onnx":
+            import onnxruntime  # noqa: F401
+            import optimum.onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def resolve_backend(backend: str = None) -> str:
+    """The backend get_embeddings actually loads for `backend` (default: $EMBEDDING_BACKEND).
+
+    An ONNX backend whose dependencies are missing falls back to torch with a warning.
+    """
+    backend = backend or EMBED_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if backend != "torch" and not backend_available(backend):
+        logger.warning("Embedding backend %s needs sentence-transformers[onnx]; using torch", backend)
+        return "torch"
+    return backend
+
+
+@lru_cache(maxsize=None)
+def get_embeddings(backend: str = None, model_name: str = EMBED_MODEL) -> HuggingFaceEmbeddings:
+    """Shared embedding model for `backend` (default: $EMBEDDING_BACKEND), loaded once per process."""
+    backend = resolve_backend(backend)
+    # backend / file_name end up in model_kwargs, which the embedding cache uses as part of the model id
+    return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=dict(BACKENDS[backend]))
+
+
+def faiss_cache_dir(backend: str = None) -> Path:
+    """On-disk FAISS indexes per loaded backend: quantised vectors must not mix with full-precision ones."""
+    # after a fallback to torch the vectors are full precision, so they belong with torch's indexes
+    backend = resolve_backend(backend)
+    return FAISS_CACHE_DIR if backend == "torch" else FAISS_CACHE_DIR / backend
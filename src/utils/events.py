@@ -0,0 +1,189 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Optional, Tuple
+
+from src.utils.tracing import current_trace, logger, record_error
+
+# Event types a bot stream can carry:
+#   progress - status messages (index building, retrieval, ...)
+#   token    - raw output text, in order
+#   section  - a rendered HTML block (sent instead of tokens when render=html)
+#   metrics  - timings and counts for the run
+#   error    - the run failed; followed by metrics and done
+#   done     - last event of every stream
+EVENT_TYPES = ("progress", "token", "section", "metrics", "error", "done")
+
+HEARTBEAT_INTERVAL = 15.0   # seconds without events before a heartbeat is sent
+RETRY_MS = 2000             # reconnection delay suggested to SSE clients
+MAX_STREAMS = 64            # runs kept for resumption; finished ones are evicted first, running ones never
+
+_STREAMS: "OrderedDict[str, EventLog]" = OrderedDict()
+
+
+class StreamLimitError(RuntimeError):
+    """Every stream slot holds a running producer."""
+
+
+class EventLog:
+    """Ordered events of one bot run.
+
+    The run is produced independently of any connection, so a client that drops
+    can reconnect with its last event id and replay what it missed.
+    """
+
+    def __init__(self, stream_id: str, bot_id: Optional[str] = None):
+        self.id = stream_id
+        self.bot_id = bot_id
+        self.events = []
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None   # the producer, set by start_stream
+        self._changed = asyncio.Event()
+
+    def append(self, event: str, data: dict):
+        self.events.append((len(self.events), event, data))
+        self._notify()
+
+    def close(self):
+        """Mark the log finished, or cancel its producer if that is still running."""
+        task = self.task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            # the producer appends its error, metrics and done events, then closes the log
+            task.cancel()
+            return
+        self.closed = True
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self, after: int = -1, heartbeat: float = HEARTBEAT_INTERVAL) -> AsyncIterator[Optional[Tuple]]:
+        """Yield (seq, event, data) after `after`, waiting for new ones; None marks a heartbeat."""
+        pos = after + 1
+        while True:
+            while pos < len(self.events):
+                yield self.events[pos]
+                pos += 1
+            if self.closed:
+                return
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+
+def typed(source, event: str = "token"):
+    """Tag each chunk of a text generator as (event, data)."""
+    async def gen():
+        async for chunk in source:
+            text = getattr(chunk, "content", chunk)
+            if text:
+                yield event, ({"text": text} if event == "token" else {"message": text})
+    return gen()
+
+
+async def _produce(log: EventLog, source, render: bool):
+    renderer = None
+    if render:
+        from src.utils.formatter import IncrementalMarkdownRenderer
+        renderer = IncrementalMarkdownRenderer()
+
+    start = time.perf_counter()
+    first_token = None
+    chunks = chars = 0
+    try:
+        async for event, data in source:
+            if event == "token":
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                chunks += 1
+                chars += len(data["text"])
+                if renderer is not None:
+                    for fragment in renderer.feed(data["text"]):
+                        log.append("section", {"html": fragment})
+                    continue
+            log.append(event, data)
+        if renderer is not None:
+            for fragment in renderer.flush():
+                log.append("section", {"html": fragment})
+    except Exception as e:
+        logger.exception("Stream %s failed", log.id)
+        record_error("stream", e)
+        log.append("error", {"message": str(e)})
+    except asyncio.CancelledError:
+        log.append("error", {"message": "stream cancelled"})
+        raise
+    finally:
+        metrics = {
+            "elapsed": round(time.perf_counter() - start, 4),
+            "first_token": None if first_token is None else round(first_token, 4),
+            "chunks": chunks,
+            "chars": chars,
+        }
+        # the task runs in a copy of the request context, so it sees the request's trace
+        trace = current_trace()
+        if trace is not None:
+            metrics["trace"] = trace.summary()
+        log.append("metrics", metrics)
+        log.append("done", {})
+        log.close()
+
+
+def start_stream(source, render: bool = False, bot_id: Optional[str] = None) -> EventLog:
+    """Run an (event, data) generator in the background and return its log.
+
+    Raises StreamLimitError when all MAX_STREAMS slots hold running producers;
+    finished logs are evicted oldest first to make room.
+    """
+    while len(_STREAMS) >= MAX_STREAMS:
+        oldest = next((k for k, v in _STREAMS.items() if v.closed), None)
+        if oldest is None:
+            raise StreamLimitError(f"Too many streams in progress (limit {MAX_STREAMS}); retry shortly")
+        del _STREAMS[oldest]
+    log = EventLog(uuid.uuid4().hex, bot_id)
+    _STREAMS[log.id] = log
+    # the log holds the only strong reference to its task
+    log.task = asyncio.get_running_loop().create_task(_produce(log, source, render))
+    # a task cancelled before its first step never reaches _produce's finally
+    log.task.add_done_callback(lambda _: log.close())
+    return log
+
+
+def get_stream(stream_id: str) -> Optional[EventLog]:
+    return _STREAMS.get(stream_id)
+
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], int]:
+    """Split a "<stream_id>:<seq>" event id; a bad or missing id resumes from the start."""
+    stream_id, _, seq = (event_id or "").rpartition(":")
+    try:
+        return stream_id or None, int(seq)
+    except ValueError:
+        return None, -1
+
+
+def format_sse(stream_id: str, item) -> str:
+    if item is None:
+        return ": heartbeat\n\n"
+    seq, event, data = item
+    return f"id: {stream_id}:{seq}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def format_ndjson(stream_id: str, item) -> str:
+    if item is None:
+        return json.dumps({"event": "heartbeat"}) + "\n"
+    seq, event, data = item
+    return json.dumps({"id": f"{stream_id}:{seq}", "event": event, "data": data}) + "\n"
+
+
+async def encode(log: EventLog, protocol: str = "sse", after: int = -1):
+    """Serialise a log for the wire as SSE or NDJSON, starting after event `after`."""
+    fmt = format_ndjson if protocol == "ndjson" else format_sse
+    if fmt is format_sse:
+        yield f"retry: {RETRY_MS}\n\n"
+    async for item in log.follow(after):
+        yield fmt(log.id, item)
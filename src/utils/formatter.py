@@ -1,36 +1,98 @@
 import re
 import html
-from typing import Generator
+import time
+import asyncio
+from typing import AsyncIterator, Generator, Iterable, List, Optional
 
 SENTENCE_END_RE = re.compile(r'([.!?])(\s+)')
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+# Where a live chunk may end: after a sentence (plus closing quotes/brackets) or a line break
+CHUNK_BOUNDARY_RE = re.compile(r'[.!?]+["\')\]]*[ \t]+|\n+')
+WORD_BOUNDARY_RE = re.compile(r'\s+')
+
+# Runs clean_text collapses. Single spaces never match, so text without
+# irregular whitespace is left untouched.
+BLANK_LINES_RE = re.compile(r'\n{3,}')
+SPACES_RE = re.compile(r'[ \t]{2,}|\t')
+
+REVIEWER_HEADINGS = ["Title Assessment", "Abstract Evaluation", "Strengths", "Weaknesses", "Detailed Comments", "Overall Recommendation"]
+REVIEWER_HEADING_RE = re.compile(
+    r'^#*\s*(?:' + '|'.join(re.escape(h) for h in REVIEWER_HEADINGS) + ')',
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+STRENGTHS_RE = re.compile(r'(Strengths?[:\-])', flags=re.IGNORECASE)
+WEAKNESSES_RE = re.compile(r'(Weaknesses?[:\-])', flags=re.IGNORECASE)
+SCRIPT_RE = re.compile(r'<script.*?>.*?</script>', flags=re.DOTALL | re.IGNORECASE)
+
+
+def _normalize(txt: str) -> str:
+    """Newline and whitespace normalisation of clean_text, without the final strip."""
+    # Each pass is skipped unless a cheap substring check finds something to
+    # collapse, which is the common case for model output
+    if '\r' in txt:
+        txt = txt.replace('\r\n', '\n').replace('\r', '\n')
+    if '\n\n\n' in txt:
+        txt = BLANK_LINES_RE.sub('\n\n', txt)
+    if '  ' in txt or '\t' in txt:
+        txt = SPACES_RE.sub(' ', txt)
+    return txt
 
 
 def clean_text(text: str) -> str:
     if text is None:
         return ''
     # Normalize whitespace and remove excessive blank lines
-    txt = text.replace('\r\n', '\n').replace('\r', '\n')
-    txt = re.sub(r"\n{3,}", "\n\n", txt)
-    txt = re.sub(r"[ \t]+", " ", txt)
-    txt = txt.strip()
-    return txt
+    return _normalize(text).strip()
+
+
+class StreamNormalizer:
+    """clean_text over a token stream.
+
+    feed() returns the normalised text that is final so far; trailing
+    whitespace is held back because the next fragment may extend it. Joining
+    every feed() result and flush() gives exactly clean_text(whole text).
+    """
+
+    def __init__(self):
+        self._held = ''
+        self._started = False
+
+    def feed(self, fragment: str) -> str:
+        buf = self._held + (fragment or '')
+        body = buf.rstrip()
+        self._held = buf[len(body):]
+        if not body:
+            return ''
+        out = _normalize(body)
+        if not self._started:
+            out = out.lstrip()
+            self._started = bool(out)
+        return out
+
+    def flush(self) -> str:
+        # trailing whitespace is stripped, as in clean_text
+        self._held = ''
+        return ''
 
 
 def ensure_reviewer_headings(text: str) -> str:
     """Ensure reviewer output uses the canonical headings. If missing, try to split heuristically and insert headings."""
-    text = clean_text(text)
-    headings = ["Title Assessment", "Abstract Evaluation", "Strengths", "Weaknesses", "Detailed Comments", "Overall Recommendation"]
+    return _reviewer_headings(clean_text(text))
+
+
+def _reviewer_headings(text: str) -> str:
+    # text is already clean; its stripped slices are too
+    headings = REVIEWER_HEADINGS
 
     # If any expected heading is present, assume good structure
-    for h in headings:
-        if re.search(rf"^#*\s*{re.escape(h)}", text, flags=re.IGNORECASE | re.MULTILINE):
-            return text
+    if REVIEWER_HEADING_RE.search(text):
+        return text
 
     # Heuristic split: look for keyword anchors
     parts = {}
     # try to find Strengths / Weaknesses
-    m_strengths = re.search(r"(Strengths?[:\-])", text, flags=re.IGNORECASE)
-    m_weakness = re.search(r"(Weaknesses?[:\-])", text, flags=re.IGNORECASE)
+    m_strengths = STRENGTHS_RE.search(text)
+    m_weakness = WEAKNESSES_RE.search(text)
 
     if m_strengths and m_weakness:
         before = text[:m_strengths.start()].strip()
@@ -47,7 +109,7 @@ def ensure_reviewer_headings(text: str) -> str:
     out = []
     for h in headings:
         if h in parts:
-            out.append(f"## {h}\n{clean_text(parts[h])}\n")
+            out.append(f"## {h}\n{parts[h]}\n")
     return "\n".join(out) if out else text
 
 
@@ -57,24 +119,106 @@ def safe_markdown_to_html(md_text: str) -> str:
         import markdown
         html_text = markdown.markdown(md_text)
         # remove script tags
-        html_text = re.sub(r"<script.*?>.*?</script>", "", html_text, flags=re.DOTALL | re.IGNORECASE)
+        html_text = SCRIPT_RE.sub("", html_text)
         return html_text
     except Exception:
         return html.escape(md_text)
 
 
-def chunk_text_for_stream(text: str, max_chars: int = 240) -> Generator[str, None, None]:
-    """Yield chunks at sentence boundaries where possible."""
-    text = clean_text(text)
+# Separates rendered HTML fragments in a render=html stream
+BLOCK_SEPARATOR = '\x1e'
+FENCE_RE = re.compile(r'^\s{0,3}(```|~~~)')
+# Lines that may continue a block across a blank line: list items and indented text
+LIST_ITEM_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s')
+
+
+class IncrementalMarkdownRenderer:
+    """Render streamed markdown one block at a time.
+
+    feed() takes text fragments of any size and returns the HTML for every
+    block completed so far (blocks end at a blank line outside fenced code);
+    flush() renders whatever is left. Each block is rendered exactly once, so
+    total work is linear in the length of the output.
+
+    A blank line after a list or indented text does not end the block until
+    the next line shows it is neither a list item nor an indented
+    continuation, so loose lists render as one list, as they do in one shot.
+    """
+
+    def __init__(self):
+        self._partial = ''     # incomplete last line
+        self._block = []       # complete lines of the current block
+        self._in_fence = False
+        self._in_list = False  # the current block has a list item
+        self._open = False     # blank line seen; block kept until the next line decides
+
+    def _emit(self) -> List[str]:
+        text = '\n'.join(self._block).strip('\n')
+        self._block = []
+        self._in_list = False
+        return [safe_markdown_to_html(text)] if text.strip() else []
+
+    def _line(self, line: str) -> List[str]:
+        out = []
+        if self._open:
+            if not line.strip():
+                return out
+            self._open = False
+            if LIST_ITEM_RE.match(line) or line[:1] in (' ', '\t'):
+                self._block.append('')
+            else:
+                out = self._emit()
+        if FENCE_RE.match(line):
+            self._in_fence = not self._in_fence
+        if not self._in_fence and not line.strip():
+            if self._block and (self._in_list or self._block[-1][:1] in (' ', '\t')):
+                self._open = True
+            else:
+                out.extend(self._emit())
+        else:
+            self._block.append(line)
+            self._in_list = self._in_list or (not self._in_fence and bool(LIST_ITEM_RE.match(line)))
+        return out
+
+    def feed(self, text: str) -> List[str]:
+        out = []
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            out.extend(self._line(line))
+        return out
+
+    def flush(self) -> List[str]:
+        out = self._line(self._partial) if self._partial else []
+        self._partial = ''
+        self._in_fence = False
+        self._open = False
+        return out + self._emit()
+
+
+def render_markdown_blocks(chunks: Iterable[str]) -> Generator[str, None, None]:
+    """Yield rendered HTML fragments for a stream (or list) of markdown chunks."""
+    renderer = IncrementalMarkdownRenderer()
+    for chunk in chunks:
+        yield from renderer.feed(chunk)
+    yield from renderer.flush()
+
+
+def chunk_text_for_stream(text: str, max_chars: int = 240, clean: bool = True) -> Generator[str, None, None]:
+    """Yield chunks at sentence boundaries where possible.
+
+    Pass clean=False for text that already went through clean_text/format_for_bot.
+    """
+    text = clean_text(text) if clean else (text or '').strip()
     if not text:
         yield ''
         return
 
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = SENTENCE_SPLIT_RE.split(text)
     buf = ''
     for s in sentences:
         if len(buf) + len(s) + 1 <= max_chars:
-            buf = (buf + ' ' + s).strip()
+            buf = f"{buf} {s}" if buf else s
         else:
             if buf:
                 yield buf
@@ -83,10 +227,191 @@ def chunk_text_for_stream(text: str, max_chars: int = 240) -> Generator[str, Non
         yield buf
 
 
+class StreamChunker:
+    """Sentence chunker for live token streams.
+
+    feed() takes model fragments as they arrive and returns the chunks that
+    are ready: everything up to the last sentence or line break. The buffer
+    never holds more than max_chars, and text older than max_latency seconds
+    is released at a word boundary, so slow generation still shows progress.
+    Chunks are consecutive slices of clean_text(whole output) and keep their
+    trailing whitespace, so concatenating them restores the text.
+    """
+
+    def __init__(self, max_chars: int = 240, max_latency: float = 0.5, clock=time.monotonic):
+        self.max_chars = max_chars
+        self.max_latency = max_latency
+        self._clock = clock
+        self._normalizer = StreamNormalizer()
+        self._buf = ''
+        self._since = None  # when the oldest buffered text arrived
+
+    def _take(self, pos: int) -> str:
+        chunk, self._buf = self._buf[:pos], self._buf[pos:]
+        return chunk
+
+    def _drain(self, now: float) -> List[str]:
+        out = []
+        while self._buf:
+            limit = min(len(self._buf), self.max_chars)
+            pos = 0
+            for m in CHUNK_BOUNDARY_RE.finditer(self._buf, 0, limit):
+                pos = m.end()
+            if not pos and len(self._buf) > self.max_chars:
+                # no boundary within max_chars: cut at the last word, or hard cut
+                pos = max((m.end() for m in WORD_BOUNDARY_RE.finditer(self._buf, 0, limit)), default=limit)
+            if not pos:
+                break
+            out.append(self._take(pos))
+            self._since = now
+        if not self._buf:
+            self._since = None
+        return out
+
+    def _overdue(self, now: float) -> List[str]:
+        if self._since is None or now - self._since < self.max_latency:
+            return []
+        pos = max((m.end() for m in WORD_BOUNDARY_RE.finditer(self._buf)), default=0)
+        if not pos:
+            return []
+        chunk = self._take(pos)
+        self._since = now
+        return [chunk]
+
+    def feed(self, fragment: str, now: Optional[float] = None) -> List[str]:
+        now = self._clock() if now is None else now
+        text = self._normalizer.feed(fragment)
+        if text:
+            if self._since is None:
+                self._since = now
+            self._buf += text
+        return self._drain(now) + self._overdue(now)
+
+    def poll(self, now: Optional[float] = None) -> List[str]:
+        """Release overdue text while the model is silent."""
+        return self._overdue(self._clock() if now is None else now)
+
+    def flush(self) -> List[str]:
+        self._normalizer.flush()
+        self._since = None
+        chunk, self._buf = self._buf, ''
+        return [chunk] if chunk else []
+
+
+async def stream_chunks(tokens: AsyncIterator, max_chars: int = 240, max_latency: float = 0.5) -> AsyncIterator[str]:
+    """Re-chunk an async token stream (strings or message chunks) with StreamChunker."""
+    chunker = StreamChunker(max_chars=max_chars, max_latency=max_latency)
+    tokens = tokens.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(tokens.__anext__())
+            # wake up at the latency deadline even if the model has not sent anything
+            done, _ = await asyncio.wait({pending}, timeout=max_latency)
+            if not done:
+                for chunk in chunker.poll():
+                    yield chunk
+                continue
+            future, pending = pending, None
+            try:
+                token = future.result()
+            except StopAsyncIteration:
+                break
+            for chunk in chunker.feed(getattr(token, 'content', token)):
+                yield chunk
+    finally:
+        if pending is not None:
+            pending.cancel()
+    for chunk in chunker.flush():
+        yield chunk
+
+
+class BotStreamFormatter:
+    """format_for_bot over a live stream of clean_text slices (the chunks of stream_chunks).
+
+    Joining every feed() result and flush() gives format_for_bot(bot_id, whole text).
+    reviewer: text is held until a canonical heading appears and then passes
+    through unchanged; without any heading the sections are built once at the end.
+    conference: the summary heading goes out with the first text and the
+    first line streams as it arrives; after it only the blank-line gap is
+    rewritten.
+    Other bots pass through; the chunks are already clean_text.
+    """
+
+    def __init__(self, bot_id: str):
+        self.bot_id = bot_id
+        self._buf = ''
+        self._scanned = 0       # reviewer: buffer length already searched for a heading
+        self._state = 'first'   # conference: 'first' line, 'gap' before the rest, 'rest'
+        self._started = False
+        self._through = bot_id not in ('reviewer', 'conference')
+
+    def feed(self, chunk: str) -> str:
+        if self._through:
+            return chunk
+        self._buf += chunk
+        if self.bot_id == 'reviewer':
+            # a heading can start a little before the new text (line start, '#', spaces)
+            if not REVIEWER_HEADING_RE.search(self._buf, max(0, self._scanned - 64)):
+                self._scanned = len(self._buf)
+                return ''
+            self._through = True
+            out, self._buf = self._buf, ''
+            return out
+
+        out = ''
+        if self._state == 'first':
+            if not self._buf:
+                return ''
+            line = self._buf.splitlines(keepends=True)[0]
+            content = line.splitlines()[0]
+            body = content.rstrip()
+            if body and not self._started:
+                out, self._started = "### Summary\n", True
+            out += body
+            if content == line:
+                # first line not complete: hold its trailing whitespace, which strip() drops
+                self._buf = content[len(body):]
+                return out
+            self._buf = self._buf[len(line):]
+            self._state = 'gap'
+        if self._state == 'gap':
+            rest = self._buf.lstrip()
+            self._buf = ''
+            if not rest:
+                return out
+            self._state = 'rest'
+            return f"{out}\n\n{rest}"
+        out, self._buf = self._buf, ''
+        return out
+
+    def flush(self) -> str:
+        buf, self._buf = self._buf, ''
+        if self._through or not buf:
+            return buf
+        if self.bot_id == 'reviewer':
+            return _reviewer_headings(buf)
+        # conference: only trailing whitespace is left, which format_for_bot strips
+        return ''
+
+
+async def format_stream(bot_id: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Apply BotStreamFormatter to an async stream of chunks, skipping empty output."""
+    formatter = BotStreamFormatter(bot_id)
+    async for chunk in chunks:
+        out = formatter.feed(chunk)
+        if out:
+            yield out
+    out = formatter.flush()
+    if out:
+        yield out
+
+
 def format_for_bot(bot_id: str, text: str) -> str:
     text = clean_text(text)
     if bot_id == 'reviewer':
-        return ensure_reviewer_headings(text)
+        return _reviewer_headings(text)
     if bot_id == 'analyst':
         # For analyst, prefer an explicit markdown structure if present
         return text
@@ -102,4 +427,4 @@ def format_for_bot(bot_id: str, text: str) -> str:
             if rest:
                 return f"### Summary\n{first}\n\n{rest}"
             return f"### Summary\n{first}"
-    return text
\ No newline at end of file
+    return text
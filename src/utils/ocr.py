@@ -0,0 +1,142 @@
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from langchain_community.document_loaders import PyMuPDFLoader
+
+from src.utils import doccache
+from src.utils.tracing import METRICS, logger, record_cache, span
+
+# Pages with less extractable text than this are treated as scanned
+MIN_TEXT_CHARS = 25
+OCR_DPI = 300
+OCR_LANG = "eng"
+OCR_CACHE_DIR = Path(".cache/ocr")
+OCR_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# One OCR process pool per process, rebuilt only when the worker count changes
+_POOL = None
+_POOL_WORKERS = None
+_POOL_LOCK = threading.Lock()
+
+
+def _ocr_page(path, page_no, dpi=OCR_DPI, lang=OCR_LANG, cache_dir=str(OCR_CACHE_DIR)):
+    """Rasterise one page and OCR it, reusing cached text for an identical image.
+
+    Runs in a pool worker, so it takes only picklable arguments and opens the
+    PDF itself. Returns (page_no, text, cache_hit).
+    """
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        png = doc[page_no].get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY).tobytes("png")
+    # the rendered image identifies the page whatever file it came from
+    key = hashlib.sha1(png + f"|{dpi}|{lang}".encode()).hexdigest()
+    cache_file = Path(cache_dir) / f"{key}.txt"
+    if cache_file.exists():
+        return page_no, cache_file.read_text(encoding="utf-8"), True
+
+    import io
+    import pytesseract
+    from PIL import Image
+
+    text = pytesseract.image_to_string(Image.open(io.BytesIO(png)), lang=lang)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    # unique name: the single-page path runs in the server's threads, not a worker process
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", prefix=cache_file.stem + ".", dir=cache_file.parent)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, cache_file)
+    return page_no, text, False
+
+
+def _pool(workers):
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            old = _POOL
+            # spawn: the web server is multi-threaded, and forking a threaded process is unsafe
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _POOL_WORKERS = workers
+            if old is not None:
+                # work already submitted still finishes; the old workers exit afterwards
+                old.shutdown(wait=False)
+        return _POOL
+
+
+@lru_cache(maxsize=1)
+def ocr_available():
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def scanned_pages(docs, min_chars=MIN_TEXT_CHARS):
+    """Indexes of page documents whose text layer is (nearly) empty."""
+    return [i for i, d in enumerate(docs) if len(d.page_content.strip()) < min_chars]
+
+
+def load_pdf(path, ocr=True, workers=OCR_WORKERS, dpi=OCR_DPI, lang=OCR_LANG, cache=True):
+    """Load a PDF (local path or URL) as one Document per page, OCR-ing scanned pages.
+
+    Pages come from PyMuPDFLoader as before; pages without a text layer are
+    rasterised and OCR'd in a process pool, with results cached per page
+    image under .cache/ocr. Without pytesseract/tesseract the text layer is
+    returned unchanged. The parsed pages are cached by content hash under
+    .cache/docs (src/utils/doccache.py), so re-chunking or re-embedding the
+    same file skips parsing.
+    """
+    # URLs are downloaded to a temporary file here; loader.file_path is the local copy
+    loader = PyMuPDFLoader(path)
+    local = str(loader.file_path)
+    source = loader.web_path or local
+    key = doccache.cache_key(doccache.document_hash(local), dpi=dpi, lang=lang) if cache else None
+    if cache:
+        cached = doccache.read_pages(key)
+        # a copy stored while tesseract was missing is re-parsed once OCR is possible
+        usable = cached is not None and not (cached["pending_ocr"] and ocr and ocr_available())
+        record_cache("parsed_doc", usable)
+        if usable:
+            return doccache.with_location(cached["docs"], source, local)
+
+    docs = loader.load()
+    todo = scanned_pages(docs)
+    if todo and ocr and ocr_available():
+        _ocr_docs(path, local, docs, todo, workers, dpi, lang)
+        todo = []
+    elif todo and ocr:
+        logger.warning("%s: %d page(s) have no text layer but tesseract is not available", path, len(todo))
+    if cache:
+        doccache.write_pages(key, docs, doccache.page_layout(local), pending_ocr=len(todo))
+    return docs
+
+
+def _ocr_docs(path, local, docs, todo, workers, dpi, lang):
+    pages = [docs[i].metadata.get("page", i) for i in todo]
+    start = time.perf_counter()
+    with span("ocr"):
+        if len(pages) == 1:
+            results = [_ocr_page(local, pages[0], dpi, lang)]
+        else:
+            pool = _pool(workers)
+            results = list(pool.map(_ocr_page, [local] * len(pages), pages,
+                                    [dpi] * len(pages), [lang] * len(pages)))
+    elapsed = time.perf_counter() - start
+
+    for i, (_, text, hit) in zip(todo, results):
+        docs[i].page_content = text
+        docs[i].metadata["ocr"] = True
+        record_cache("ocr_page", hit)
+    hits = sum(1 for _, _, hit in results if hit)
+    METRICS.inc("bot_ocr_pages_total", len(results))
+    logger.info("%s: OCR %d page(s) (%d cached) in %.2fs, %.1f pages/s",
+                path, len(results), hits, elapsed, len(results) / elapsed if elapsed else float("inf"))
@@ -0,0 +1,95 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+# Hooks registered here run for every stage in the process; a hook is called as
+# hook(event, stage, **info) with event one of "start", "end", "retry", "error".
+GLOBAL_HOOKS: List[Callable] = []
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# Client-library errors for timeouts and dropped connections (groq / openai, httpx),
+# matched by name so this module does not import the clients
+TRANSIENT_ERROR_NAMES = {"APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException"}
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for failures worth retrying: timeouts, connection errors, HTTP 408/429 and 5xx."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 429) or status >= 500
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class Stage:
+    """A single LLM step with declared inputs and output.
+
+    Subclasses set `inputs`, `output` and implement `build_prompt`. Calling the
+    stage invokes the LLM (created lazily if none was injected), retries
+    transient failures (see is_transient) with exponential backoff and reports
+    timings to hooks. Any other error is raised on the first attempt.
+    """
+
+    name: str = "stage"
+    inputs: tuple = ()
+    output: str = "output"
+    model: str = DEFAULT_MODEL
+    retries: int = 2
+    backoff: float = 0.5
+
+    def __init__(self, llm=None, hooks: Optional[List[Callable]] = None, **values):
+        missing = [k for k in self.inputs if k not in values]
+        if missing:
+            raise TypeError(f"{type(self).__name__} missing input(s): {', '.join(missing)}")
+        self.llm = llm
+        self.hooks = list(hooks or [])
+        self.values = values
+
+    def __getattr__(self, item):
+        # expose declared inputs as attributes (task.text, task.draft, ...)
+        values = self.__dict__.get("values", {})
+        if item in values:
+            return values[item]
+        raise AttributeError(item)
+
+    def build_prompt(self, **values) -> str:
+        raise NotImplementedError
+
+    def parse(self, response) -> str:
+        return response.content if hasattr(response, "content") else response
+
+    def _emit(self, event, **info):
+        for hook in GLOBAL_HOOKS + self.hooks:
+            try:
+                hook(event, self, **info)
+            except Exception:
+                pass
+
+    def __call__(self) -> Dict[str, str]:
+        prompt = self.build_prompt(**self.values)
+        if self.llm is None:
+            from langchain_groq import ChatGroq
+            self.llm = ChatGroq(model=self.model)
+
+        self._emit("start", prompt_chars=len(prompt))
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.llm.invoke(prompt)
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                if attempt >= self.retries or not is_transient(e):
+                    self._emit("error", elapsed=elapsed, attempt=attempt, error=e)
+                    raise
+                self._emit("retry", elapsed=elapsed, attempt=attempt, error=e)
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+                continue
+            result = self.parse(response)
+            self._emit("end", elapsed=time.perf_counter() - start, attempt=attempt,
+                       usage=getattr(response, "usage_metadata", None))
+            return {self.output: result}
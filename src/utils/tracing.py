@@ -0,0 +1,255 @@
+import asyncio
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.utils.stage import GLOBAL_HOOKS
+
+logger = logging.getLogger("conferencebot")
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Trace:
+    """Timings, token counts, cache results and errors of one request."""
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.start = time.perf_counter()
+        self.stages: Dict[str, list] = {}   # stage -> [calls, seconds]
+        self.tokens = {"prompt": 0, "completion": 0, "total": 0}
+        self.cache: Dict[str, Dict[str, int]] = {}
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, elapsed: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "elapsed_ms": round((time.perf_counter() - self.start) * 1000, 1),
+                "stages": {s: {"calls": n, "ms": round(t * 1000, 1)} for s, (n, t) in self.stages.items()},
+                "tokens": dict(self.tokens),
+                "cache": {c: dict(r) for c, r in self.cache.items()},
+                "errors": list(self.errors),
+            }
+
+    def headers(self) -> Dict[str, str]:
+        """Server-Timing for the stage timings, X-Trace for the full summary."""
+        with self._lock:
+            timing = ", ".join(f"{s};dur={t * 1000:.1f}" for s, (_, t) in self.stages.items())
+        return {"Server-Timing": timing, "X-Trace": json.dumps(self.summary(), separators=(",", ":"))}
+
+
+_TRACE: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace(name: str = "") -> Trace:
+    """Start collecting for the current request; work started from this context reports into it."""
+    trace = Trace(name)
+    _TRACE.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _TRACE.get()
+
+
+class _Metrics:
+    """Process-wide counters, gauges and histograms rendered by /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, list] = {}    # stage -> bucket counts + [count, sum]
+        self.counters: Dict[tuple, float] = {}
+        self.gauges: Dict[tuple, float] = {}
+
+    def observe(self, stage: str, elapsed: float):
+        with self._lock:
+            hist = self.stages.setdefault(stage, [0] * (len(BUCKETS) + 1) + [0, 0.0])
+            hist[bisect.bisect_left(BUCKETS, elapsed)] += 1
+            hist[-2] += 1
+            hist[-1] += elapsed
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP bot_stage_seconds Time spent per pipeline stage.",
+            "# TYPE bot_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, hist in sorted(self.stages.items()):
+                stage = _escape_label(stage)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), hist):
+                    cumulative += count
+                    lines.append(f'bot_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'bot_stage_seconds_count{{stage="{stage}"}} {hist[-2]}')
+                lines.append(f'bot_stage_seconds_sum{{stage="{stage}"}} {hist[-1]:.6f}')
+            for kind, values in (("counter", self.counters), ("gauge", self.gauges)):
+                seen = set()
+                for (name, labels), value in sorted(values.items()):
+                    if name not in seen:
+                        seen.add(name)
+                        lines.append(f"# TYPE {name} {kind}")
+                    label_text = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_text}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value) -> str:
+    """Label value escaping of the Prometheus text format (backslash, quote, newline)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = _Metrics()
+
+
+def record_stage(stage: str, elapsed: float):
+    METRICS.observe(stage, elapsed)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_stage(stage, elapsed)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block as `stage`; an exception escaping it is counted as an error of that stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record_error(stage, e)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    if not count:
+        return
+    result = "hit" if hit else "miss"
+    METRICS.inc("bot_cache_total", count, cache=cache, result=result)
+    trace = current_trace()
+    if trace is not None:
+        with trace._lock:
+            counts = trace.cache.setdefault(cache, {"hit": 0, "miss": 0})
+            counts[result] += count
+
+
+def record_tokens(prompt: int = 0, completion: int = 0, total: int = 0):
+    total = total or prompt + completion
+    for kind, count in (("prompt", prompt), ("completion", completion)):
+        if count:
+            METRICS.inc("bot_tokens_total", count, kind=kind)
+    trace = current_trace()
+    if trace is not None:
+        with trace._lock:
+            trace.tokens["prompt"] += prompt
+            trace.tokens["completion"] += completion
+            trace.tokens["total"] += total
+
+
+def record_error(stage: str, error: BaseException):
+    """Count an error of `stage` (callers that handle the error log it themselves)."""
+    METRICS.inc("bot_errors_total", stage=stage, type=type(error).__name__)
+    trace = current_trace()
+    if trace is not None:
+        with trace._lock:
+            trace.errors.append(f"{stage}: {type(error).__name__}: {error}")
+
+
+def record_request(bot_id: str, outcome: str):
+    METRICS.inc("bot_requests_total", bot=bot_id, outcome=outcome)
+
+
+def _usage(response) -> dict:
+    """Token usage from an LLMResult (Groq reports it in llm_output or on the message)."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return {"prompt": usage.get("prompt_tokens", 0), "completion": usage.get("completion_tokens", 0),
+                "total": usage.get("total_tokens", 0)}
+    for generations in response.generations:
+        for generation in generations:
+            meta = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if meta:
+                return {"prompt": meta.get("input_tokens", 0), "completion": meta.get("output_tokens", 0),
+                        "total": meta.get("total_tokens", 0)}
+    return {}
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Measure how late the event loop wakes up; a blocked loop delays every request in the worker."""
+    loop = asyncio.get_running_loop()
+    pid = os.getpid()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        METRICS.observe("event_loop_lag", lag)
+        METRICS.set("bot_event_loop_lag_seconds", lag, pid=pid)
+
+
+class TracingCallback(BaseCallbackHandler):
+    """LangChain callback timing every model call as the "llm" stage and counting its tokens."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._starts = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            record_stage("llm", time.perf_counter() - start)
+        usage = _usage(response)
+        if usage:
+            record_tokens(**usage)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            record_stage("llm", time.perf_counter() - start)
+        record_error("llm", error)
+
+
+TRACING_CALLBACK = TracingCallback()
+
+
+def _stage_hook(event, stage, **info):
+    # writer stages: timing per stage name; the model call itself is traced by the callback
+    if event == "end":
+        record_stage(f"stage_{stage.name}", info["elapsed"])
+    elif event in ("retry", "error"):
+        record_error(f"stage_{stage.name}", info["error"])
+
+
+GLOBAL_HOOKS.append(_stage_hook)